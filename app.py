@@ -14,9 +14,13 @@ from flask import Flask
 from flask_login import LoginManager
 from config.settings import Config
 from models.database import db, init_db
-from models.user import get_user_by_id
+from models.user import get_user_snapshot
+from utils.metrics import init_app as init_metrics
+from utils.assets import init_app as init_assets
+from utils.compression import init_app as init_compression
 from routes.auth import auth_bp
 from routes.main import main_bp
+from routes.metrics import metrics_bp
 from routes.api import (
     descriptions_bp,
     saved_descriptions_bp,
@@ -40,6 +44,13 @@ def create_app():
     # Initialize database
     init_db(app)
     
+    # Record request latencies for /metrics
+    init_metrics(app)
+    
+    # Fingerprinted static assets and compressed responses
+    init_assets(app)
+    init_compression(app)
+    
     # Initialize Flask-Login
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -47,12 +58,12 @@ def create_app():
     
     @login_manager.user_loader
     def load_user(user_id):
-        """Load user by ID"""
+        """Load user by ID from the per-process user cache"""
         try:
             # Ensure user_id is a valid integer
             if not user_id or not str(user_id).isdigit():
                 return None
-            return get_user_by_id(int(user_id))
+            return get_user_snapshot(int(user_id))
         except (ValueError, TypeError):
             return None
     
@@ -64,6 +75,7 @@ def create_app():
     # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
+    app.register_blueprint(metrics_bp)
     
     # Register API blueprints
     app.register_blueprint(descriptions_bp)
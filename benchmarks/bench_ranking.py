@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark example ranking: the original linear scorer vs the indexed rankers
+
+Usage:
+    python -m benchmarks.bench_ranking --docs 100000 --queries 200
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from collections import namedtuple
+
+from utils.example_index import ExampleIndex
+from utils.ranking import RANKERS
+
+Row = namedtuple('Row', ['id', 'description_type', 'category', 'title', 'tags', 'content', 'topic'])
+
+BRANDS = {
+    'Fender': ['Stratocaster', 'Telecaster', 'Jazzmaster', 'Mustang', 'Jaguar'],
+    'Gibson': ['Les Paul', 'SG', 'Explorer', 'Flying V', 'ES-335'],
+    'Ibanez': ['RG', 'JEM', 'Artcore', 'Talman', 'S'],
+    'Yamaha': ['Pacifica', 'Revstar', 'FG800', 'APX', 'SA2200'],
+    'Martin': ['D-28', 'OM-21', '000-15', 'D-18', 'GPC'],
+    'Taylor': ['814ce', 'GS Mini', '214ce', 'Academy', 'Builder'],
+    'PRS': ['Custom 24', 'Silver Sky', 'McCarty', 'SE Hollowbody', 'Paul'],
+    'Gretsch': ['White Falcon', 'Duo Jet', 'Streamliner', 'Country', 'Penguin'],
+    'ESP': ['Eclipse', 'Viper', 'Horizon', 'Snakebyte', 'Arrow'],
+    'Epiphone': ['Casino', 'Sheraton', 'Dot', 'Riviera', 'Hummingbird'],
+}
+
+# Category with inflected forms used in documents and queries
+CATEGORIES = {
+    'Elektryczna': ['elektryczna', 'elektrycznej', 'elektryczną', 'elektrycznych'],
+    'Akustyczna': ['akustyczna', 'akustycznej', 'akustyczną', 'akustycznych'],
+    'Klasyczna': ['klasyczna', 'klasycznej', 'klasyczną', 'klasycznych'],
+    'Basowa': ['basowa', 'basowej', 'basową', 'basowych'],
+}
+
+TAGS = ['vintage', 'metal', 'blues', 'jazz', 'rock', 'folk', 'studio', 'koncert', 'premium', 'budżetowa']
+
+FILLER = (
+    'gitara brzmienie gryf korpus przetworniki mostek struny progi klucze lakier drewno '
+    'mahoń klon palisander olcha jesion świerk cedr heban dźwięk sustain selektor '
+    'potencjometr wzmacniacz scena nagrania muzyk początkujący zaawansowany wygodny '
+    'klasyczny nowoczesny ciepły jasny pełny selektywny mocny delikatny ręcznie wykonany'
+).split()
+
+GUITAR_FORMS = ['gitara', 'gitary', 'gitarze', 'gitarę', 'gitarą', 'gitar']
+
+
+def make_corpus(doc_count, seed):
+    """Generate synthetic Polish guitar descriptions with a known topic"""
+    rng = random.Random(seed)
+    topics = [(brand, model) for brand, models in BRANDS.items() for model in models]
+    rows = []
+    for doc_id in range(1, doc_count + 1):
+        brand, model = rng.choice(topics)
+        category = rng.choice(list(CATEGORIES))
+        words = [brand, model, rng.choice(GUITAR_FORMS), rng.choice(CATEGORIES[category])]
+        words.extend(rng.choice(FILLER) for _ in range(rng.randint(20, 60)))
+        # Other brands show up as noise in comparisons
+        if rng.random() < 0.3:
+            words.append(rng.choice(list(BRANDS)))
+        rng.shuffle(words)
+        tags = rng.sample(TAGS, rng.randint(1, 3))
+        rows.append(Row(
+            id=doc_id,
+            description_type='guitar',
+            category=category,
+            title=f'{brand} {model} #{doc_id}',
+            tags=json.dumps(tags) if rng.random() < 0.5 else ','.join(tags),
+            content=' '.join(words) + '.',
+            topic=(brand, model)
+        ))
+    return rows, topics
+
+
+def make_queries(topics, query_count, seed):
+    """Generate user inputs that describe one topic in free text"""
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(query_count):
+        brand, model = rng.choice(topics)
+        category = rng.choice(list(CATEGORIES))
+        text = (
+            f'{brand} {model}, {rng.choice(GUITAR_FORMS)} {rng.choice(CATEGORIES[category])} '
+            f'{" ".join(rng.sample(FILLER, 3))}'
+        )
+        queries.append(((brand, model), text))
+    return queries
+
+
+def legacy_rank(rows, input_text, limit=3):
+    """The original linear scorer from AIService._find_relevant_examples"""
+    scored_examples = []
+    input_lower = input_text.lower()
+    input_words = input_lower.split()
+    for desc in rows:
+        score = 0
+        if desc.category and desc.category.lower() in input_lower:
+            score += 3
+        if desc.title and desc.title.lower() in input_lower:
+            score += 2
+        if desc.tags:
+            try:
+                tags_list = json.loads(desc.tags) if desc.tags.startswith('[') else desc.tags.split(',')
+            except ValueError:
+                tags_list = desc.tags.split(',')
+            for tag in tags_list:
+                tag_clean = tag.strip().lower()
+                if tag_clean and tag_clean in input_lower:
+                    score += 1
+        content_lower = desc.content.lower()
+        for word in input_words:
+            if len(word) > 3 and word in content_lower:
+                score += 0.5
+        if score > 0:
+            scored_examples.append((desc.id, score))
+    scored_examples.sort(key=lambda x: x[1], reverse=True)
+    return [doc_id for doc_id, score in scored_examples[:limit]]
+
+
+def measure(name, rank, queries, topic_by_id):
+    """Time a ranking function and compute precision@3 against the topic"""
+    latencies = []
+    hits = 0
+    for topic, text in queries:
+        start = time.perf_counter()
+        result = rank(text)
+        latencies.append(time.perf_counter() - start)
+        hits += sum(1 for doc_id in result if topic_by_id[doc_id] == topic)
+    latencies.sort()
+    return {
+        'ranker': name,
+        'queries': len(queries),
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        'precision_at_3': hits / (3 * len(queries))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark example rankers')
+    parser.add_argument('--docs', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--legacy-queries', type=int, default=10,
+                        help='queries for the linear scorer, which is much slower')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    rows, topics = make_corpus(args.docs, args.seed)
+    queries = make_queries(topics, args.queries, args.seed)
+    topic_by_id = {row.id: row.topic for row in rows}
+
+    index = ExampleIndex()
+    start = time.perf_counter()
+    index.build(rows)
+    build_time = time.perf_counter() - start
+
+    results = []
+    if args.legacy_queries:
+        results.append(measure('legacy', lambda text: legacy_rank(rows, text),
+                               queries[:args.legacy_queries], topic_by_id))
+    for name, ranker_class in RANKERS.items():
+        ranker = ranker_class()
+        results.append(measure(name, lambda text: index.search(ranker, 'guitar', text, 3),
+                               queries, topic_by_id))
+
+    if args.json:
+        print(json.dumps({'docs': args.docs, 'index_build_s': build_time, 'results': results}, indent=2))
+        return
+
+    print(f'Corpus: {args.docs} descriptions, index built in {build_time:.2f}s')
+    print(f'{"ranker":<10} {"queries":>8} {"mean ms":>10} {"p50 ms":>10} {"p95 ms":>10} {"P@3":>7}')
+    for result in results:
+        print(f'{result["ranker"]:<10} {result["queries"]:>8} {result["mean_ms"]:>10.2f} '
+              f'{result["p50_ms"]:>10.2f} {result["p95_ms"]:>10.2f} {result["precision_at_3"]:>7.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark correction sampling: load-all + random.sample vs sampling in the database
+
+Usage:
+    python -m benchmarks.bench_sampling
+    python -m benchmarks.bench_sampling --rows 10000 100000 1000000 --repeats 20
+    python -m benchmarks.bench_sampling --database-url postgresql://... --rows 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+CORRECTION_TYPES = ['grammar', 'style', 'factual', 'general']
+
+
+def seed_corrections(db, ModelCorrection, user_id, total_rows, batch_size=10000):
+    """Top the corrections table up to total_rows with a fast bulk insert"""
+    existing = ModelCorrection.query.count()
+    rng = random.Random(existing)
+    while existing < total_rows:
+        batch = min(batch_size, total_rows - existing)
+        db.session.execute(ModelCorrection.__table__.insert(), [
+            {
+                'original_text': f'oryginalny tekst {existing + i} ' * 5,
+                'corrected_text': f'poprawiony tekst {existing + i} ' * 5,
+                'description_type': rng.choice(['guitar', 'company']),
+                'correction_type': rng.choice(CORRECTION_TYPES),
+                'user_id': user_id,
+                'is_applied': rng.random() < 0.1,
+                'notes': ''
+            } for i in range(batch)
+        ])
+        db.session.commit()
+        existing += batch
+
+
+def measure(function, repeats):
+    """Return (median seconds, peak traced memory in bytes) after one warm-up call
+
+    The warm-up loads what the sampler caches between calls (the id bounds),
+    so the timings show the steady state of a running app.
+    """
+    function()
+    timings = []
+    tracemalloc.start()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark correction sampling')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    database_file = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        database_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+        os.environ['DATABASE_URL'] = f'sqlite:///{database_file}'
+
+    # Imported after DATABASE_URL is set, Config reads it at import time
+    from app import create_app
+    from models.database import db
+    from models.descriptions import ModelCorrection
+    from models.user import User
+    from utils.sampling import sample_corrections
+
+    app = create_app()
+    with app.app_context():
+        user_id = User.query.filter_by(username='admin').first().id
+
+        def load_all():
+            corrections = ModelCorrection.query.filter_by(is_applied=False, description_type='guitar').all()
+            return random.sample(corrections, min(args.k, len(corrections)))
+
+        print(f'{"rows":>10} {"method":<18} {"median ms":>10} {"peak KiB":>10}')
+        for total_rows in sorted(args.rows):
+            seed_corrections(db, ModelCorrection, user_id, total_rows)
+            methods = [
+                ('load_all', load_all),
+                ('db_probe', lambda: sample_corrections(args.k, 'guitar', rng=random)),
+                ('db_probe_strata', lambda: sample_corrections(args.k, 'guitar', stratify=True, rng=random)),
+            ]
+            for name, function in methods:
+                db.session.expunge_all()
+                median, peak = measure(function, args.repeats)
+                print(f'{total_rows:>10} {name:<18} {median * 1000:>10.2f} {peak / 1024:>10.1f}')
+
+    if database_file:
+        os.remove(database_file)
+
+
+if __name__ == '__main__':
+    main()
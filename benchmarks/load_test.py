@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for the Flask API
+
+Seeds a database with configurable volumes, serves the real application on a
+local HTTP server with the LLM replaced by fake_openai_server, and drives the
+main endpoints concurrently. Reports throughput and p50/p95/p99 latency per
+endpoint and can write them as JSON and compare against a previous run.
+
+Usage:
+    python -m benchmarks.load_test --saved 20000 --corrections 50000 --requests 500 --concurrency 16
+    python -m benchmarks.load_test --output results.json
+    python -m benchmarks.load_test --compare baseline.json --threshold 0.2
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+from benchmarks.bench_ranking import make_corpus, make_queries
+from benchmarks.bench_sampling import CORRECTION_TYPES
+from fake_openai_server import FakeOpenAIOptions, start_server
+
+LOAD_TEST_PASSWORD = 'loadtest123'
+
+ENDPOINTS = {
+    'generate': ('POST', '/api/descriptions/generate'),
+    'saved_list': ('GET', '/api/saved-descriptions/list'),
+    'dashboard': ('GET', '/api/learning-data/dashboard'),
+    'stats': ('GET', '/api/learning-data/stats'),
+    'examples_list': ('GET', '/api/examples/list'),
+    'prompts_list': ('GET', '/api/prompts/list'),
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, wall_time):
+    """Throughput and latency percentiles in milliseconds"""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall_time, 2) if wall_time else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def seed_saved_descriptions(db, count, user_ids, rng, seed, batch_size=5000):
+    """Bulk insert count synthetic saved descriptions with normalized tags"""
+    from models.descriptions import SavedDescription, Tag, saved_description_tags, normalize_tag_names
+
+    tag_ids = {tag.name: tag.id for tag in Tag.query.all()}
+    seeded = 0
+    while seeded < count:
+        rows, _ = make_corpus(min(batch_size, count - seeded), seed + seeded)
+        first_id = (db.session.query(db.func.max(SavedDescription.id)).scalar() or 0) + 1
+        descriptions = []
+        links = []
+        for offset, row in enumerate(rows):
+            description_id = first_id + offset
+            descriptions.append({
+                'id': description_id,
+                'title': row.title,
+                'content': row.content,
+                'description_type': rng.choice(['guitar', 'company']),
+                'category': row.category,
+                'user_id': rng.choice(user_ids),
+                'is_public': rng.random() < 0.5
+            })
+            for position, name in enumerate(normalize_tag_names(row.tags)):
+                if name not in tag_ids:
+                    tag_ids[name] = Tag.get_or_create_many([name])[0].id
+                links.append({'saved_description_id': description_id, 'tag_id': tag_ids[name], 'position': position})
+        db.session.execute(SavedDescription.__table__.insert(), descriptions)
+        db.session.execute(saved_description_tags.insert(), links)
+        db.session.commit()
+        seeded += len(rows)
+
+
+def seed_database(db, args):
+    """Bulk insert users, saved descriptions, tags, corrections, adjustments and prompts"""
+    from werkzeug.security import generate_password_hash
+    from models.descriptions import ModelCorrection, ModelAdjustment, AIPrompt
+    from models.user import User
+
+    if User.query.filter(User.username.like('loadtest_%')).count():
+        print('Database already seeded, skipping')
+        return
+
+    rng = random.Random(args.seed)
+    password_hash = generate_password_hash(LOAD_TEST_PASSWORD)
+    db.session.execute(User.__table__.insert(), [
+        {
+            'username': f'loadtest_{i}',
+            'email': f'loadtest_{i}@example.com',
+            'password_hash': password_hash,
+            'role': 'user',
+            'is_active': True
+        } for i in range(args.users)
+    ])
+    db.session.commit()
+    user_ids = [row.id for row in User.query.with_entities(User.id).filter(User.username.like('loadtest_%'))]
+
+    seed_saved_descriptions(db, args.saved, user_ids, rng, args.seed)
+
+    batch_size = 5000
+    for start in range(0, args.corrections, batch_size):
+        db.session.execute(ModelCorrection.__table__.insert(), [
+            {
+                'original_text': f'oryginalny tekst {i} ' * 5,
+                'corrected_text': f'poprawiony tekst {i} ' * 5,
+                'description_type': rng.choice(['guitar', 'company']),
+                'correction_type': rng.choice(CORRECTION_TYPES),
+                'user_id': rng.choice(user_ids),
+                'is_applied': rng.random() < 0.1,
+                'notes': ''
+            } for i in range(start, min(start + batch_size, args.corrections))
+        ])
+        db.session.commit()
+
+    if args.adjustments:
+        db.session.execute(ModelAdjustment.__table__.insert(), [
+            {
+                'adjustment_type': rng.choice(['prompt', 'style', 'length']),
+                'adjustment_key': f'klucz_{i}',
+                'adjustment_value': f'Dostosowanie numer {i}: pisz zwięźle i konkretnie',
+                'description_type': rng.choice(['guitar', 'company', None]),
+                'user_id': rng.choice(user_ids),
+                'is_active': rng.random() < 0.5,
+                'priority': rng.randint(1, 5)
+            } for i in range(args.adjustments)
+        ])
+
+    if args.prompts:
+        db.session.execute(AIPrompt.__table__.insert(), [
+            {
+                'prompt_type': rng.choice(['guitar', 'company']),
+                'title': f'Prompt {i}',
+                'content': f'Napisz opis w stylu numer {i}, podkreśl brzmienie i wykonanie.',
+                'is_active': rng.random() < 0.3,
+                'user_id': rng.choice(user_ids),
+                'version': 1
+            } for i in range(args.prompts)
+        ])
+    db.session.commit()
+
+
+class Client:
+    """Logged-in keep-alive HTTP client used by one worker thread"""
+
+    def __init__(self, host, port, username):
+        self.host = host
+        self.port = port
+        self.connection = None
+        self.cookie = None
+        status, headers, _ = self.request('POST', '/login', urlencode({
+            'username': username,
+            'password': LOAD_TEST_PASSWORD
+        }), 'application/x-www-form-urlencoded')
+        self.cookie = headers.get('Set-Cookie', '').split(';')[0]
+        if status != 302 or not self.cookie:
+            raise RuntimeError(f'Login failed for {username}')
+
+    def request(self, method, path, body=None, content_type='application/json'):
+        headers = {'Content-Type': content_type} if body is not None else {}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=120)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                return response.status, response.headers, data
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed an idle keep-alive connection
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+
+def run_endpoint(name, host, port, usernames, args, queries):
+    """Send args.requests requests to one endpoint from args.concurrency workers"""
+    method, path = ENDPOINTS[name]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    remaining = itertools.count()
+    total = args.warmup + args.requests
+
+    def worker(worker_id):
+        client = Client(host, port, usernames[worker_id % len(usernames)])
+        rng = random.Random(args.seed + worker_id)
+        while True:
+            number = next(remaining)
+            if number >= total:
+                return
+            body = None
+            if method == 'POST':
+                _, input_text = rng.choice(queries)
+                body = json.dumps({'type': rng.choice(['guitar', 'company']), 'input_text': input_text})
+            start = time.perf_counter()
+            status, _, _ = client.request(method, path, body)
+            elapsed = time.perf_counter() - start
+            if number < args.warmup:
+                continue
+            with lock:
+                latencies.append(elapsed)
+                if status >= 400:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - start)
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a baseline, return True when something regressed"""
+    regressed = False
+    print(f'\nComparison with baseline (threshold {threshold:.0%})')
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        p95_change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] if previous['p95_ms'] else 0
+        rps_change = (current['throughput_rps'] - previous['throughput_rps']) / previous['throughput_rps'] \
+            if previous['throughput_rps'] else 0
+        flag = ''
+        if p95_change > threshold or rps_change < -threshold:
+            flag = '  REGRESSION'
+            regressed = True
+        print(f'{name:<15} p95 {p95_change:+7.1%}  throughput {rps_change:+7.1%}{flag}')
+    return regressed
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Flask API with a fake LLM')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--saved', type=int, default=5000)
+    parser.add_argument('--corrections', type=int, default=10000)
+    parser.add_argument('--adjustments', type=int, default=50)
+    parser.add_argument('--prompts', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--llm-latency-ms', type=float, default=200, help='mean fake upstream latency')
+    parser.add_argument('--response-cache', action='store_true', help='keep the response cache enabled')
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='JSON results of a previous run')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    fake_server = start_server(FakeOpenAIOptions(
+        latency_ms=args.llm_latency_ms, completion_tokens=(150, 300), seed=args.seed
+    ))
+
+    database_file = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        database_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+        os.environ['DATABASE_URL'] = f'sqlite:///{database_file}'
+    os.environ.update({
+        'OPENAI_BASE_URL': fake_server.base_url,
+        'OPENAI_API_KEY': 'load-test',
+        'OPENAI_RPM_LIMIT': '0',
+        'OPENAI_TPM_LIMIT': '0',
+        'OPENAI_POOL_SIZE': str(max(16, args.concurrency)),
+        'RESPONSE_CACHE_ENABLED': 'true' if args.response_cache else 'false',
+        'LLM_CASSETTE_MODE': '',
+    })
+
+    # Imported after the environment is set, Config reads it at import time
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import create_app
+    from models.database import db
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = create_app()
+    with app.app_context():
+        start = time.perf_counter()
+        seed_database(db, args)
+        print(f'Seeded in {time.perf_counter() - start:.1f}s')
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+
+    usernames = [f'loadtest_{i}' for i in range(args.users)]
+    _, topics = make_corpus(1, args.seed)
+    queries = make_queries(topics, 500, args.seed)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'database': 'sqlite' if database_file else args.database_url.split(':')[0],
+            'volumes': {
+                'users': args.users, 'saved': args.saved, 'corrections': args.corrections,
+                'adjustments': args.adjustments, 'prompts': args.prompts
+            },
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'llm_latency_ms': args.llm_latency_ms,
+            'response_cache': args.response_cache,
+        },
+        'endpoints': {}
+    }
+
+    print(f'{"endpoint":<15} {"req":>6} {"err":>5} {"rps":>8} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+    for name in args.endpoints:
+        summary = run_endpoint(name, host, port, usernames, args, queries)
+        results['endpoints'][name] = summary
+        print(f'{name:<15} {summary["requests"]:>6} {summary["errors"]:>5} {summary["throughput_rps"]:>8.1f} '
+              f'{summary["p50_ms"]:>9.1f} {summary["p95_ms"]:>9.1f} {summary["p99_ms"]:>9.1f}')
+
+    server.shutdown()
+    fake_server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    regressed = False
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            regressed = compare(results, json.load(baseline_file), args.threshold)
+
+    if database_file:
+        os.remove(database_file)
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
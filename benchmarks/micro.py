@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the prompt assembly hot path
+
+Times the code that runs between request arrival and the upstream call:
+example ranking, example loading, learning context (cold and warm cache),
+the template render alone and the full guitar/company prompt build, for
+growing corpora. Besides wall
+time it reports the peak traced memory of a call and the net number of
+memory blocks a call leaves allocated (caches, leaks).
+
+Usage:
+    python -m benchmarks.micro --sizes 10 1000 100000
+    python -m benchmarks.micro --sizes 10 100 1000 10000 100000 1000000 --output micro.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_ranking import make_corpus, make_queries
+from benchmarks.bench_sampling import seed_corrections
+from benchmarks.load_test import percentile, seed_saved_descriptions
+
+
+def measure(function, inputs, trace):
+    """Wall time percentiles, then peak memory and retained blocks under tracemalloc"""
+    timings = []
+    for value in inputs:
+        start = time.perf_counter()
+        function(value)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    result = {
+        'calls': len(timings),
+        'median_us': round(statistics.median(timings) * 1e6, 1),
+        'p95_us': round(percentile(timings, 0.95) * 1e6, 1),
+    }
+
+    if trace:
+        peaks = []
+        gc.collect()
+        blocks_before = sys.getallocatedblocks()
+        tracemalloc.start()
+        for value in inputs[:trace]:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            function(value)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        tracemalloc.stop()
+        gc.collect()
+        result['peak_kib'] = round(max(peaks) / 1024, 1)
+        result['retained_blocks_per_call'] = round((sys.getallocatedblocks() - blocks_before) / len(peaks), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks for prompt assembly')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000],
+                        help='saved descriptions (and corrections) in the corpus')
+    parser.add_argument('--queries', type=int, default=200, help='timed calls per function')
+    parser.add_argument('--trace', type=int, default=50, help='calls measured under tracemalloc, 0 disables')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+
+    database_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_file}'
+
+    # Imported after DATABASE_URL is set, Config reads it at import time
+    from app import create_app
+    from models.database import db
+    from models.descriptions import SavedDescription, ModelCorrection
+    from models.user import User
+    from utils.ai_service import AIService, learning_context_cache
+    from utils.example_index import example_index
+    from utils.prompt_config import prompt_config_cache
+    from utils.prompt_templates import render_prompt
+
+    app = create_app()
+    results = []
+    with app.app_context():
+        service = AIService()
+        user_id = User.query.filter_by(username='admin').first().id
+        _, topics = make_corpus(1, args.seed)
+        queries = [text for _, text in make_queries(topics, args.queries, args.seed)]
+        rng = random.Random(args.seed)
+
+        # Learning contexts of the queries, so prompt_render times only the template
+        contexts = {}
+
+        def cold_context(text):
+            learning_context_cache.clear()
+            prompt_config_cache.clear()
+            return service.get_learning_context('guitar', text)
+
+        cases = [
+            ('find_relevant_examples', lambda text: service._find_relevant_examples('guitar', text)),
+            ('get_smart_examples', lambda text: service._get_smart_examples('guitar', text, random.Random(text))),
+            ('learning_context_cold', cold_context),
+            ('learning_context_warm', lambda text: service.get_learning_context('guitar', text)),
+            ('prompt_render', lambda text: render_prompt('guitar', service.get_prompt_config('guitar', user_id),
+                                                         contexts[text], text)),
+            ('guitar_prompt', lambda text: service.build_prompt('guitar', text, user_id)),
+            ('company_prompt', lambda text: service.build_prompt('company', text, user_id)),
+        ]
+
+        print(f'{"rows":>8} {"function":<24} {"median us":>10} {"p95 us":>10} {"peak KiB":>9} {"blocks":>8}')
+        for size in sorted(args.sizes):
+            existing = SavedDescription.query.count()
+            if size > existing:
+                seed_saved_descriptions(db, size - existing, [user_id], rng, args.seed + existing)
+            seed_corrections(db, ModelCorrection, user_id, size)
+            db.session.expunge_all()
+
+            example_index.reset()
+            learning_context_cache.clear()
+            start = time.perf_counter()
+            example_index.ensure_loaded()
+            index_seconds = time.perf_counter() - start
+            contexts.update((text, service.get_learning_context('guitar', text)) for text in queries)
+            print(f'{size:>8} {"index_build":<24} {index_seconds * 1000:>10.1f} ms (once)')
+            results.append({'rows': size, 'function': 'index_build', 'seconds': round(index_seconds, 4)})
+
+            for name, function in cases:
+                # One unmeasured call fills lazily built structures
+                function(queries[0])
+                measured = measure(function, queries, args.trace)
+                results.append(dict(measured, rows=size, function=name))
+                print(f'{size:>8} {name:<24} {measured["median_us"]:>10.1f} {measured["p95_us"]:>10.1f} '
+                      f'{measured.get("peak_kib", 0):>9.1f} {measured.get("retained_blocks_per_call", 0):>8.1f}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump({'sizes': sorted(args.sizes), 'results': results}, output_file, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    os.remove(database_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Static asset build for Guitar AI Application
+
+Copies every CSS and JS file under static/ to static/dist/ with a content
+hash in its name, writes gzip (and brotli, when installed) variants next to
+each copy and a manifest mapping source names to fingerprinted ones. Pages
+reference assets through asset_url(), which reads the manifest, so the copies
+can be cached by browsers forever.
+
+Usage:
+    python build_assets.py
+    python build_assets.py --clean
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+from utils.assets import DIST_DIRECTORY, ENCODING_SUFFIXES, MANIFEST_NAME
+from utils.compression import brotli, compress
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+ASSET_EXTENSIONS = ('.css', '.js')
+HASH_LENGTH = 12
+
+
+def find_assets(static_folder):
+    """Relative paths of the source assets, skipping earlier build output"""
+    for root, directories, files in os.walk(static_folder):
+        if os.path.relpath(root, static_folder) == '.':
+            directories[:] = [name for name in directories if name != DIST_DIRECTORY]
+        for name in sorted(files):
+            if name.endswith(ASSET_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+
+
+def fingerprint(relative_path, content):
+    """dist/<dir>/<name>.<hash><ext> for a source asset"""
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    stem, extension = os.path.splitext(relative_path)
+    return f'{DIST_DIRECTORY}/{stem}.{digest}{extension}'
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as output_file:
+        output_file.write(content)
+    os.replace(temporary_path, path)
+
+
+def build(static_folder):
+    """Write fingerprinted and precompressed assets and the manifest"""
+    encodings = ['gzip'] + (['br'] if brotli is not None else [])
+    manifest = {}
+    for relative_path in find_assets(static_folder):
+        with open(os.path.join(static_folder, relative_path), 'rb') as source_file:
+            content = source_file.read()
+        built_path = fingerprint(relative_path, content)
+        target = os.path.join(static_folder, built_path)
+        write_file(target, content)
+        sizes = [f'{len(content)} B']
+        for encoding in encodings:
+            # Built once, so use the highest compression level
+            compressed = compress(content, encoding, level=9)
+            write_file(target + ENCODING_SUFFIXES[encoding], compressed)
+            sizes.append(f'{encoding} {len(compressed)} B')
+        manifest[relative_path] = built_path
+        print(f"📦 {relative_path} -> {built_path} ({', '.join(sizes)})")
+
+    # The manifest goes last, pages switch to the new files only once they exist
+    write_file(
+        os.path.join(static_folder, DIST_DIRECTORY, MANIFEST_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+    )
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress static assets')
+    parser.add_argument('--static-folder', default=STATIC_FOLDER)
+    parser.add_argument('--clean', action='store_true', help='remove earlier build output first')
+    args = parser.parse_args()
+
+    if args.clean:
+        shutil.rmtree(os.path.join(args.static_folder, DIST_DIRECTORY), ignore_errors=True)
+
+    manifest = build(args.static_folder)
+    if not manifest:
+        print("❌ No CSS or JS assets found")
+        sys.exit(1)
+    if brotli is None:
+        print("ℹ️  brotli is not installed, only gzip variants were written")
+    print(f"✅ Built {len(manifest)} assets")
+
+
+if __name__ == '__main__':
+    main()
@@ -19,6 +19,84 @@ class Config:
     OPENAI_MODEL = "gpt-3.5-turbo"
     OPENAI_MAX_TOKENS = 1500
     OPENAI_TEMPERATURE = 0.7
+    # Alternative API endpoint, e.g. fake_openai_server.py for offline load tests
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+    
+    # OpenAI connection pool (one per process, shared by all threads)
+    OPENAI_POOL_SIZE = int(os.getenv('OPENAI_POOL_SIZE', 16))  # at least BATCH_CONCURRENCY
+    OPENAI_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', 60))  # in seconds
+    OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', 5))  # in seconds
+    OPENAI_READ_TIMEOUT = float(os.getenv('OPENAI_READ_TIMEOUT', 60))  # in seconds
+    
+    # Upstream quota, retries and circuit breaker (limits of 0 disable them)
+    OPENAI_RPM_LIMIT = int(os.getenv('OPENAI_RPM_LIMIT', 3500))  # requests per minute
+    OPENAI_TPM_LIMIT = int(os.getenv('OPENAI_TPM_LIMIT', 90000))  # tokens per minute
+    OPENAI_LIMITER_MAX_WAIT = float(os.getenv('OPENAI_LIMITER_MAX_WAIT', 30))  # in seconds
+    OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 4))
+    OPENAI_BACKOFF_BASE = float(os.getenv('OPENAI_BACKOFF_BASE', 0.5))  # in seconds
+    OPENAI_BACKOFF_MAX = float(os.getenv('OPENAI_BACKOFF_MAX', 30))  # in seconds
+    OPENAI_BREAKER_THRESHOLD = int(os.getenv('OPENAI_BREAKER_THRESHOLD', 5))  # consecutive failures
+    OPENAI_BREAKER_RESET = float(os.getenv('OPENAI_BREAKER_RESET', 30))  # in seconds
+    
+    # Record/replay of upstream responses: 'record', 'replay', 'auto' or empty to disable
+    LLM_CASSETTE_MODE = os.getenv('LLM_CASSETTE_MODE', '').lower()
+    LLM_CASSETTE_PATH = os.getenv('LLM_CASSETTE_PATH', 'llm_cassette.jsonl.gz')
+    LLM_CASSETTE_REPLAY_LATENCY = os.getenv('LLM_CASSETTE_REPLAY_LATENCY', 'false').lower() == 'true'
+    
+    # Example retrieval settings
+    EXAMPLE_RANKER = os.getenv('EXAMPLE_RANKER', 'bm25')  # 'bm25' or 'keyword'
+    # How often a process checks whether other processes changed the examples
+    EXAMPLE_INDEX_CHECK_INTERVAL = float(os.getenv('EXAMPLE_INDEX_CHECK_INTERVAL', 2))  # in seconds
+    
+    # Learning context cache (invalidated on commit, TTL bounds staleness
+    # across worker processes)
+    CONTEXT_CACHE_MAX_ENTRIES = int(os.getenv('CONTEXT_CACHE_MAX_ENTRIES', 2000))
+    CONTEXT_CACHE_TTL = int(os.getenv('CONTEXT_CACHE_TTL', 300))  # in seconds
+    # Estimated token budget of the learning context in a prompt (0 disables
+    # the limit), per description type as e.g. "guitar=1200,company=800"
+    CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', 1500))
+    CONTEXT_TOKEN_BUDGETS = {
+        description_type.strip(): int(budget)
+        for description_type, budget in (
+            item.split('=') for item in os.getenv('CONTEXT_TOKEN_BUDGETS', '').split(',') if item.strip()
+        )
+    }
+    # Resolved prompt, adjustments and model parameters per user and type
+    PROMPT_CONFIG_CACHE_MAX_ENTRIES = int(os.getenv('PROMPT_CONFIG_CACHE_MAX_ENTRIES', 500))
+    # How often a process checks whether other processes changed prompts or adjustments
+    PROMPT_CONFIG_CHECK_INTERVAL = float(os.getenv('PROMPT_CONFIG_CHECK_INTERVAL', 2))  # in seconds
+    
+    # Logged-in users cached per process for Flask-Login (invalidated on
+    # commit, TTL bounds how long other workers see a deactivated user)
+    USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', 1000))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))  # in seconds
+    
+    # Corrections included in the prompt are drawn from a pool sampled in the DB
+    CORRECTION_SAMPLE_SIZE = 5
+    CORRECTION_POOL_SIZE = int(os.getenv('CORRECTION_POOL_SIZE', 50))
+    CORRECTION_SAMPLE_STRATIFY = os.getenv('CORRECTION_SAMPLE_STRATIFY', 'false').lower() == 'true'
+    
+    # Persistent cache of generated descriptions
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 7 * 24 * 3600))  # in seconds
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 10000))
+    
+    # Batch generation
+    BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 500))
+    BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 8))  # parallel upstream calls
+    
+    # List endpoints
+    LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', 50))
+    LIST_MAX_PAGE_SIZE = int(os.getenv('LIST_MAX_PAGE_SIZE', 200))
+    
+    # Response compression (gzip, brotli when installed)
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # in bytes
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))
+    
+    # Metrics
+    PERSIST_PHASE_TIMINGS = os.getenv('PERSIST_PHASE_TIMINGS', 'true').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # bearer token required by /metrics when set
     
     # Flask settings
     DEBUG = True
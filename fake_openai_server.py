@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat completions API
+
+Serves /v1/chat/completions (including stream=true) with configurable
+latency, response sizes, error rates and 429 injection, so the application
+can be load-tested offline without spending tokens.
+
+Usage:
+    python fake_openai_server.py --port 8089 --latency-ms 400 --latency-dist lognormal
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=test python run.py
+
+Only the standard library (and utils.resilience for --rpm) is used.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.resilience import TokenBucket
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal', 'exponential')
+
+FILLER_WORDS = (
+    'gitara', 'brzmienie', 'gryf', 'korpus', 'przetworniki', 'mostek', 'progi',
+    'drewno', 'mahoń', 'klon', 'palisander', 'sustain', 'ciepły', 'selektywny',
+    'wykonanie', 'muzyków', 'scenie', 'studiu', 'charakter', 'klasyczny'
+)
+
+
+class FakeOpenAIOptions:
+    """Behaviour of the fake server, mirrors the command line flags"""
+
+    def __init__(self, latency_ms=300, latency_dist='lognormal', latency_jitter=0.5,
+                 token_delay_ms=10, completion_tokens=(150, 400), error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=1.0, rpm=0, seed=None):
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.latency_jitter = latency_jitter
+        self.token_delay_ms = token_delay_ms
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rpm = rpm
+        self.seed = seed
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the options, random source and counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address, options):
+        super().__init__(address, FakeOpenAIHandler)
+        self.options = options
+        self.rng = random.Random(options.seed)
+        self.quota = TokenBucket(options.rpm, capacity=max(1, options.rpm / 60)) if options.rpm else None
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'streams': 0, 'errors': 0, 'rate_limited': 0, 'completion_tokens': 0}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def latency(self):
+        """Seconds until the first byte, drawn from the configured distribution"""
+        mean = self.options.latency_ms / 1000
+        jitter = self.options.latency_jitter
+        with self.lock:
+            dist = self.options.latency_dist
+            if dist == 'uniform':
+                value = self.rng.uniform(mean * (1 - jitter), mean * (1 + jitter))
+            elif dist == 'normal':
+                value = self.rng.gauss(mean, mean * jitter)
+            elif dist == 'lognormal':
+                # Parameterised so the distribution mean equals latency_ms
+                sigma = jitter
+                value = self.rng.lognormvariate(math.log(mean or 1e-6) - sigma ** 2 / 2, sigma) if mean else 0
+            elif dist == 'exponential':
+                value = self.rng.expovariate(1 / mean) if mean else 0
+            else:
+                value = mean
+        return max(0.0, value)
+
+    def draw(self):
+        with self.lock:
+            return self.rng.random()
+
+    def completion_size(self):
+        with self.lock:
+            return self.rng.randint(*self.options.completion_tokens)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip('/') in ('/v1/models', '/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'gpt-3.5-turbo', 'object': 'model'}]})
+        elif self.path.rstrip('/') == '/stats':
+            with self.server.lock:
+                self._send_json(200, dict(self.server.counters))
+        else:
+            self._send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path.rstrip('/') not in ('/v1/chat/completions', '/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+            return
+        try:
+            payload = json.loads(body)
+            messages = payload['messages']
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {'error': {'message': 'Invalid request body', 'type': 'invalid_request_error'}})
+            return
+
+        server = self.server
+        server.count('requests')
+        options = server.options
+
+        # Quota and error injection happen before any latency, like upstream
+        if (server.quota and server.quota.reserve(1) > 0) or server.draw() < options.rate_limit_rate:
+            if server.quota:
+                server.quota.refund(1)
+            server.count('rate_limited')
+            self._send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                            {'Retry-After': str(options.retry_after)})
+            return
+        if server.draw() < options.error_rate:
+            server.count('errors')
+            self._send_json(500, {'error': {'message': 'Injected server error', 'type': 'server_error'}})
+            return
+
+        time.sleep(server.latency())
+        words = self._completion_words(messages)
+        prompt_tokens = sum(len(message.get('content') or '') // 4 + 4 for message in messages)
+        server.count('completion_tokens', len(words))
+        model = payload.get('model', 'gpt-3.5-turbo')
+        completion_id = 'chatcmpl-' + hashlib.sha1(body).hexdigest()[:24]
+
+        if payload.get('stream'):
+            server.count('streams')
+            self._stream(completion_id, model, words)
+            return
+
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ' '.join(words)},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(words),
+                'total_tokens': prompt_tokens + len(words)
+            }
+        })
+
+    def _completion_words(self, messages):
+        """Deterministic text for the prompt, JSON when the caller asks for JSON"""
+        prompt = (messages[-1].get('content') or '') if messages else ''
+        system = (messages[0].get('content') or '') if messages else ''
+        digest = int(hashlib.sha1(prompt.encode('utf-8')).hexdigest(), 16)
+        if 'JSON' in system:
+            category = FILLER_WORDS[digest % len(FILLER_WORDS)]
+            tags = ', '.join(FILLER_WORDS[(digest >> shift) % len(FILLER_WORDS)] for shift in (4, 8, 12))
+            return [json.dumps({'category': category, 'tags': tags}, ensure_ascii=False)]
+
+        size = self.server.completion_size()
+        return [FILLER_WORDS[(digest + index * 7) % len(FILLER_WORDS)] for index in range(size)]
+
+    def _stream(self, completion_id, model, words):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        token_delay = self.server.options.token_delay_ms / 1000
+        try:
+            for index, word in enumerate(words):
+                self._write_chunk(completion_id, model, {'content': word if index == 0 else ' ' + word})
+                if token_delay:
+                    time.sleep(token_delay)
+            self._write_chunk(completion_id, model, {}, finish_reason='stop')
+            self._write_raw(b'data: [DONE]\n\n')
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. an aborted SSE response
+            self.close_connection = True
+
+    def _write_chunk(self, completion_id, model, delta, finish_reason=None):
+        event = {
+            'id': completion_id,
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+        }
+        self._write_raw(('data: ' + json.dumps(event, ensure_ascii=False) + '\n\n').encode('utf-8'))
+
+    def _write_raw(self, data):
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_server(options=None, host='127.0.0.1', port=0):
+    """Start the fake server in a background thread and return it
+
+    Port 0 picks a free port, see server.base_url.
+    """
+    server = FakeOpenAIServer((host, port), options or FakeOpenAIOptions())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake OpenAI chat completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=300, help='mean time to first byte')
+    parser.add_argument('--latency-dist', choices=LATENCY_DISTRIBUTIONS, default='lognormal')
+    parser.add_argument('--latency-jitter', type=float, default=0.5, help='spread relative to the mean')
+    parser.add_argument('--token-delay-ms', type=float, default=10, help='delay between streamed tokens')
+    parser.add_argument('--completion-tokens', type=int, nargs=2, default=[150, 400], metavar=('MIN', 'MAX'))
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 500 responses')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of injected 429 responses')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with 429')
+    parser.add_argument('--rpm', type=int, default=0, help='enforce a requests per minute quota with 429s')
+    parser.add_argument('--seed', type=int, help='random seed for reproducible runs')
+    args = parser.parse_args()
+
+    options = FakeOpenAIOptions(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        latency_jitter=args.latency_jitter,
+        token_delay_ms=args.token_delay_ms,
+        completion_tokens=tuple(args.completion_tokens),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        rpm=args.rpm,
+        seed=args.seed
+    )
+    server = FakeOpenAIServer((args.host, args.port), options)
+    print(f"🎸 Fake OpenAI server on {server.base_url}")
+    print(f"   Set OPENAI_BASE_URL={server.base_url} to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+if __name__ == '__main__':
+    main()
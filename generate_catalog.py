@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Offline bulk catalog generation for Guitar AI Application
+
+Streams a JSONL or CSV product catalog, generates descriptions with AIService
+and writes results to a JSONL output file and to the database.
+
+Each input record needs a description text and optionally a type and an id:
+    {"id": "SKU-1", "type": "guitar", "input_text": "Fender Stratocaster ..."}
+Records in the backlog format ({"request_id", "title", "body"}) are read
+natively: the title and body become the input text.
+
+Usage:
+    python generate_catalog.py catalog.jsonl results.jsonl
+    python generate_catalog.py catalog.csv results.jsonl --type company --concurrency 16
+    python generate_catalog.py catalog.jsonl results.jsonl --resume
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from itertools import islice
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from app import create_app
+from config.settings import Config
+from models.database import db
+from models.descriptions import ReturnedDescription
+from models.user import User
+from utils.ai_service import AIService, DESCRIPTION_TYPES
+from utils.prompt_templates import is_description_type
+
+
+def normalize_record(raw, default_type):
+    """Map a raw catalog record to {id, type, input_text}, with an error for unusable fields"""
+    record_id = raw.get('id') or raw.get('request_id') or raw.get('sku')
+    input_text = raw.get('input_text') or raw.get('description') or ''
+    description_type = raw.get('type') or default_type
+    if not input_text:
+        # Backlog style records: title and body
+        input_text = '\n\n'.join(str(raw[field]) for field in ('title', 'body') if raw.get(field))
+    for name, value in (('input_text', input_text), ('type', description_type)):
+        if isinstance(value, (dict, list)):
+            return {'id': record_id, 'type': default_type, 'input_text': '', 'error': f'Field {name} must be text'}
+    return {
+        'id': record_id,
+        # Numbers (e.g. from a JSON catalog) are used as text
+        'type': str(description_type).strip().lower(),
+        'input_text': str(input_text).strip()
+    }
+
+
+def read_records(binary_file, input_format, default_type):
+    """Yield normalized records one at a time, never loading the whole file"""
+    if input_format == 'csv':
+        text_file = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+        for raw in csv.DictReader(text_file):
+            yield normalize_record(raw, default_type)
+        # Keep the binary file open for progress reporting
+        text_file.detach()
+        return
+
+    for line in binary_file:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            raw = json.loads(line)
+        except ValueError as e:
+            yield {'id': None, 'type': default_type, 'input_text': '', 'error': f'Invalid JSON: {e}'}
+            continue
+        if not isinstance(raw, dict):
+            yield {'id': None, 'type': default_type, 'input_text': '', 'error': 'Record is not a JSON object'}
+            continue
+        yield normalize_record(raw, default_type)
+
+
+def load_checkpoint(path):
+    """Return the saved checkpoint or None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically"""
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_path, path)
+
+
+def process_chunk(ai_service, records, user_id, args):
+    """Generate one chunk and return (output lines in input order, description ids)
+
+    The ReturnedDescription rows are flushed, not committed: the caller
+    commits them once the output and the checkpoint are written.
+    """
+    results = {}
+    valid = []
+    for position, record in enumerate(records):
+        if record.get('error'):
+            results[position] = {'success': False, 'error': record['error']}
+        elif not is_description_type(record['type']) or not record['input_text']:
+            results[position] = {'success': False, 'error': 'Missing input text or unknown type'}
+        else:
+            valid.append(position)
+
+    items = [records[position] for position in valid]
+    for index, result in ai_service.generate_batch(items, user_id, not args.no_cache, args.concurrency):
+        results[valid[index]] = result
+
+    returned_descriptions = {}
+    if not args.no_db:
+        for position in valid:
+            result = results[position]
+            if result['success']:
+                cache_hit = result.get('cached', False)
+                returned_descriptions[position] = ReturnedDescription(
+                    input_text=records[position]['input_text'],
+                    generated_description=result['description'],
+                    description_type=records[position]['type'],
+                    user_id=user_id,
+                    tokens_used=0 if cache_hit else result.get('tokens_used'),
+                    model_version=result.get('model_version'),
+                    cache_hit=cache_hit,
+                    prompt_tokens_estimate=result.get('prompt_tokens_estimate')
+                )
+        db.session.add_all(returned_descriptions.values())
+        db.session.flush()
+
+    lines = []
+    for position, record in enumerate(records):
+        result = results[position]
+        line = {'id': record['id'], 'type': record['type'], 'success': result['success']}
+        if result['success']:
+            line['description'] = result['description']
+            line['cached'] = result.get('cached', False)
+            if position in returned_descriptions:
+                line['description_id'] = returned_descriptions[position].id
+        else:
+            line['error'] = result['error']
+        lines.append(line)
+    return lines, [description.id for description in returned_descriptions.values()]
+
+
+def resolve_checkpoint(checkpoint, user_id):
+    """Apply the pending chunk of a checkpoint if its descriptions were committed
+
+    A chunk is recorded as pending before its database commit; if the run
+    stopped before the commit, the chunk is generated again on resume.
+    """
+    pending = checkpoint.pop('pending', None)
+    if pending is None:
+        return checkpoint
+    description_ids = pending.pop('description_ids')
+    committed = ReturnedDescription.query.filter(
+        ReturnedDescription.id.in_(description_ids),
+        ReturnedDescription.user_id == user_id
+    ).count()
+    if committed == len(description_ids):
+        checkpoint.update(pending)
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate descriptions for a JSONL/CSV catalog')
+    parser.add_argument('input', help='catalog file (.jsonl or .csv)')
+    parser.add_argument('output', help='JSONL file with one result per input record')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='input format, detected from the extension by default')
+    parser.add_argument('--type', default='guitar', choices=DESCRIPTION_TYPES, help='type for records without one')
+    parser.add_argument('--user', default='admin', help='user who owns the generated descriptions')
+    parser.add_argument('--concurrency', type=int, default=Config.BATCH_CONCURRENCY, help='parallel upstream calls')
+    parser.add_argument('--chunk-size', type=int, help='records per checkpoint (default: 4 x concurrency)')
+    parser.add_argument('--resume', action='store_true', help='continue from the checkpoint next to the output file')
+    parser.add_argument('--no-db', action='store_true', help='only write the output file')
+    parser.add_argument('--no-cache', action='store_true', help='bypass the response cache')
+    args = parser.parse_args()
+
+    input_format = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    chunk_size = args.chunk_size or args.concurrency * 4
+    checkpoint_path = args.output + '.checkpoint'
+
+    if not os.path.isfile(args.input):
+        print(f"❌ Input file {args.input} not found")
+        sys.exit(1)
+
+    checkpoint = load_checkpoint(checkpoint_path) if args.resume else None
+    if checkpoint is None and os.path.exists(args.output) and os.path.getsize(args.output):
+        print(f"❌ {args.output} already exists, use --resume or remove it")
+        sys.exit(1)
+    if checkpoint and checkpoint['input'] != os.path.abspath(args.input):
+        print(f"❌ {checkpoint_path} belongs to {checkpoint['input']}, not {os.path.abspath(args.input)}")
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        user = User.query.filter_by(username=args.user).first()
+        if not user:
+            print(f"❌ User {args.user} not found")
+            sys.exit(1)
+
+        if checkpoint:
+            checkpoint = resolve_checkpoint(checkpoint, user.id)
+        ai_service = AIService()
+        records_done = checkpoint['records_done'] if checkpoint else 0
+        totals = dict(checkpoint['totals']) if checkpoint else {'succeeded': 0, 'failed': 0, 'cached': 0}
+        input_size = os.path.getsize(args.input)
+
+        with open(args.input, 'rb') as input_file, open(args.output, 'ab') as output_file:
+            if checkpoint:
+                # Drop output written after the last checkpoint
+                output_file.truncate(checkpoint['output_bytes'])
+                print(f"↪️  Resuming after {records_done} records")
+
+            records = read_records(input_file, input_format, args.type)
+            for _ in islice(records, records_done):
+                pass
+
+            start_time = time.time()
+            processed_now = 0
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+
+                lines, description_ids = process_chunk(ai_service, chunk, user.id, args)
+                chunk_start = {
+                    'input': os.path.abspath(args.input),
+                    'records_done': records_done,
+                    'output_bytes': output_file.tell(),
+                    'totals': dict(totals)
+                }
+                output_file.write(''.join(json.dumps(line, ensure_ascii=False) + '\n' for line in lines).encode('utf-8'))
+                output_file.flush()
+                os.fsync(output_file.fileno())
+
+                for line in lines:
+                    if line['success']:
+                        totals['succeeded'] += 1
+                        totals['cached'] += 1 if line.get('cached') else 0
+                    else:
+                        totals['failed'] += 1
+                records_done += len(chunk)
+                processed_now += len(chunk)
+                done = {'records_done': records_done, 'output_bytes': output_file.tell(), 'totals': totals}
+
+                # Output first, then the chunk as pending, then the database
+                # commit: a run stopped at any point resumes without
+                # duplicate or missing descriptions
+                if description_ids:
+                    save_checkpoint(checkpoint_path, dict(chunk_start, pending=dict(done, description_ids=description_ids)))
+                    db.session.commit()
+                save_checkpoint(checkpoint_path, dict(chunk_start, **done))
+
+                elapsed = time.time() - start_time
+                progress = input_file.tell() / input_size * 100 if input_size else 100
+                print(
+                    f"📦 {records_done} records (~{progress:.1f}%) | "
+                    f"{processed_now / elapsed:.1f} records/s | "
+                    f"ok {totals['succeeded']}, errors {totals['failed']}, cached {totals['cached']}",
+                    flush=True
+                )
+
+        elapsed = time.time() - start_time
+        print(f"\n✅ Done: {records_done} records, {processed_now} in this run in {elapsed:.1f}s")
+        print(f"   Succeeded: {totals['succeeded']}, failed: {totals['failed']}, from cache: {totals['cached']}")
+        print(f"   Results: {args.output}")
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,8 +13,12 @@ load_dotenv()
 from app import create_app
 from models.database import db
 from models.user import User
-from models.descriptions import SavedDescription, ReturnedDescription, ModelCorrection, ModelAdjustment, AIPrompt
+from models.descriptions import SavedDescription, ReturnedDescription, ModelCorrection, ModelAdjustment, AIPrompt, Tag
+from models.migrations import MIGRATIONS, applied_versions, migrate
+from models.stats import UserStats, rebuild_user_stats
+from models.resource_versions import GlobalVersion, ResourceVersion
 from werkzeug.security import generate_password_hash
+from datetime import datetime
 
 def init_db():
     """Initialize the database with tables and default data"""
@@ -45,6 +49,125 @@ def init_db():
         print("\n🎸 Guitar AI Database initialized successfully!")
         print("📝 You can now run the application with: python run.py")
 
+def run_migrations():
+    """Apply pending schema migrations and show the schema version"""
+    app = create_app()
+    
+    with app.app_context():
+        # create_app() already applies pending migrations on startup
+        for version, name in migrate():
+            print(f"✅ Applied migration {version}: {name}")
+        
+        applied = applied_versions()
+        for version, name, _ in MIGRATIONS:
+            status = "✅" if version in applied else "⏳"
+            print(f"{status} {version:>3}  {name}")
+
+def hot_queries():
+    """Queries of the main endpoints, as the routes build them"""
+    user_id = 1
+    cursor_time = datetime.utcnow()
+    return {
+        'saved descriptions list': SavedDescription.query.filter_by(user_id=user_id)
+            .order_by(SavedDescription.created_at.desc(), SavedDescription.id.desc()).limit(51),
+        'saved descriptions next page': SavedDescription.query.filter_by(user_id=user_id)
+            .filter(SavedDescription.created_at <= cursor_time,
+                    (SavedDescription.created_at < cursor_time) | (SavedDescription.id < 100))
+            .order_by(SavedDescription.created_at.desc(), SavedDescription.id.desc()).limit(51),
+        'examples list': SavedDescription.query.filter_by(user_id=user_id, is_public=True)
+            .order_by(SavedDescription.created_at.desc(), SavedDescription.id.desc()).limit(51),
+        'prompts list': AIPrompt.query.filter_by(user_id=user_id)
+            .order_by(AIPrompt.created_at.desc(), AIPrompt.id.desc()).limit(51),
+        'active prompt': AIPrompt.query.filter_by(user_id=user_id, prompt_type='guitar', is_active=True).limit(1),
+        'dashboard corrections': ModelCorrection.query.filter_by(user_id=user_id)
+            .order_by(ModelCorrection.created_at.desc()).limit(10),
+        'dashboard generated': ReturnedDescription.query.filter_by(user_id=user_id)
+            .order_by(ReturnedDescription.created_at.desc()).limit(10),
+        'user stats': UserStats.query.filter_by(user_id=user_id),
+        'resource versions': ResourceVersion.query.filter(
+            ResourceVersion.user_id == user_id,
+            ResourceVersion.resource.in_(['corrections', 'saved_descriptions', 'generations'])
+        ),
+        'global version': GlobalVersion.query.with_entities(GlobalVersion.version).filter_by(resource='adjustments'),
+        'corrections list': ModelCorrection.query.filter_by(user_id=user_id)
+            .order_by(ModelCorrection.created_at.desc()),
+        'correction pool probe': ModelCorrection.query.filter_by(is_applied=False, description_type='guitar')
+            .filter(ModelCorrection.id >= 100).order_by(ModelCorrection.id).limit(1),
+        'active adjustments': ModelAdjustment.query.with_entities(
+            ModelAdjustment.adjustment_type, ModelAdjustment.adjustment_value
+        ).filter_by(is_active=True).filter(
+            (ModelAdjustment.description_type == 'guitar') | (ModelAdjustment.description_type.is_(None))
+        ).order_by(ModelAdjustment.priority.desc()),
+        'public examples by type': SavedDescription.query.with_entities(SavedDescription.id)
+            .filter_by(is_public=True, description_type='guitar').order_by(SavedDescription.id),
+        'tags by name': Tag.query.filter(Tag.normalized_name.in_(['vintage', 'rock'])),
+    }
+
+def explain(query):
+    """Query plan lines of a query on SQLite (EXPLAIN QUERY PLAN) or other databases (EXPLAIN)"""
+    compiled = query.statement.compile(db.engine, compile_kwargs={'render_postcompile': True})
+    if db.engine.dialect.name == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        # The raw driver call skips SQLAlchemy's type processing
+        params = tuple(str(value) if isinstance(value, datetime) else value for value in params)
+    else:
+        prefix = 'EXPLAIN '
+        params = compiled.params
+    rows = db.session.connection().exec_driver_sql(prefix + str(compiled), params).fetchall()
+    return [str(row[-1]) for row in rows]
+
+def unindexed_steps(plan):
+    """Plan lines of full table scans and sorts not served by an index (SQLite)"""
+    # SQLite reports full table scans as "SCAN <table>" without an index
+    # and sorts it cannot serve from an index as temp b-trees
+    return [line for line in plan
+            if (line.startswith('SCAN ') and 'INDEX' not in line) or 'TEMP B-TREE' in line]
+
+def check_plans():
+    """Fail when a hot query scans a whole table or sorts without an index"""
+    app = create_app()
+    problems = 0
+    
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        for name, query in hot_queries().items():
+            plan = explain(query)
+            bad = unindexed_steps(plan)
+            status = "❌" if bad else "✅"
+            problems += bool(bad)
+            print(f"{status} {name}")
+            for line in plan:
+                print(f"      {line}")
+    
+    if dialect != 'sqlite':
+        print("\nℹ️  Plans are only checked automatically on SQLite")
+    elif problems:
+        print(f"\n❌ {problems} queries without a matching index")
+        sys.exit(1)
+    else:
+        print("\n✅ All hot queries use indexes")
+
+def rebuild_stats():
+    """Recompute every user's statistics counters from the tables"""
+    app = create_app()
+    
+    with app.app_context():
+        rebuilt = rebuild_user_stats()
+        db.session.commit()
+        print(f"✅ Rebuilt statistics of {rebuilt} users")
+
+COMMANDS = {
+    'init': init_db,
+    'migrate': run_migrations,
+    'check-plans': check_plans,
+    'rebuild-stats': rebuild_stats,
+}
+
 if __name__ == '__main__':
-    init_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'init'
+    if command not in COMMANDS:
+        print(f"Usage: python manage_db.py [{' | '.join(COMMANDS)}]")
+        sys.exit(1)
+    COMMANDS[command]()
 
@@ -1,8 +1,51 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 
 db = SQLAlchemy()
 
+def insert_ignoring_conflicts(connection, table, rows):
+    """Insert rows, skipping those that conflict with an existing unique key
+
+    Concurrent workers inserting the same row both succeed this way instead
+    of one of them failing the whole transaction with an IntegrityError.
+    """
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = (sqlite if dialect == 'sqlite' else postgresql).insert
+        connection.execute(insert(table).on_conflict_do_nothing(), rows)
+        return
+    for row in rows:
+        try:
+            with connection.begin_nested():
+                connection.execute(table.insert().values(**row))
+        except IntegrityError:
+            continue
+
+def add_missing_columns():
+    """Add columns declared on models but missing from existing tables
+
+    db.create_all() only creates missing tables, so new nullable columns are
+    added here with ALTER TABLE.
+    """
+    inspector = db.inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            added.append(f'{table.name}.{column.name}')
+    db.session.commit()
+    return added
+
 def init_db(app):
     """Initialize the database with the Flask app"""
     db.init_app(app)
@@ -10,6 +53,13 @@ def init_db(app):
     with app.app_context():
         # Create all tables with UTF-8 encoding
         db.create_all()
+        for column in add_missing_columns():
+            print(f"✅ Dodano kolumnę {column}")
+        
+        # Apply versioned schema migrations (indexes, data backfills)
+        from models.migrations import migrate
+        for version, name in migrate():
+            print(f"✅ Migracja {version}: {name}")
         
         # Create default admin user if it doesn't exist
         from models.user import User
@@ -25,8 +75,13 @@ def init_db(app):
             db.session.commit()
             print("✅ Domyślny użytkownik admin został utworzony")
         
+        # Move tags stored as strings into the normalized tags table
+        from models.descriptions import SavedDescription, migrate_legacy_tags
+        migrated = migrate_legacy_tags()
+        if migrated:
+            print(f"✅ Przeniesiono tagi {migrated} opisów do tabeli tagów")
+        
         # Add some Polish example descriptions if none exist
-        from models.descriptions import SavedDescription
         if SavedDescription.query.count() == 0:
             # Fallback examples if config examples don't exist
             fallback_guitar_examples = [
@@ -56,10 +111,10 @@ def init_db(app):
                     content=example,
                     description_type='guitar',
                     category='Elektryczna',
-                    tags='przykład,polski,gitara',
                     user_id=admin_user.id,
                     is_public=True
                 )
+                saved_desc.set_tags(['przykład', 'polski', 'gitara'])
                 db.session.add(saved_desc)
             
             # Add Polish company examples
@@ -69,10 +124,10 @@ def init_db(app):
                     content=example,
                     description_type='company',
                     category='Producent',
-                    tags='przykład,polski,firma',
                     user_id=admin_user.id,
                     is_public=True
                 )
+                saved_desc.set_tags(['przykład', 'polski', 'firma'])
                 db.session.add(saved_desc)
             
             db.session.commit()
@@ -1,29 +1,180 @@
-from models.database import db
+from models.database import db, insert_ignoring_conflicts
 from datetime import datetime
+import json
+
+TAG_MAX_LENGTH = 100
+CONTENT_PREVIEW_LENGTH = 200
+
+def normalize_tag_names(value):
+    """Turn a list, JSON list or comma separated string of tags into clean unique names
+
+    Names keep the case and order they were entered in; duplicates differing
+    only in case are dropped.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value) if value.lstrip().startswith(('[', '"')) else value
+        except ValueError:
+            parsed = value
+        value = parsed.split(',') if isinstance(parsed, str) else parsed
+    names = {}
+    for tag in value:
+        name = str(tag).strip()[:TAG_MAX_LENGTH]
+        if name:
+            names.setdefault(tag_key(name), name)
+    return list(names.values())
+
+def tag_key(name):
+    """Case-insensitive form of a tag name that tags are matched on"""
+    return name.strip().lower()
+
+class Tag(db.Model):
+    """Model for normalized description tags"""
+    
+    __tablename__ = 'tags'
+    __table_args__ = (
+        # Tags are looked up and deduplicated case-insensitively
+        db.Index('ix_tags_normalized_name', 'normalized_name', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(TAG_MAX_LENGTH), unique=True, nullable=False, index=True)  # display name, as first entered
+    normalized_name = db.Column(db.String(TAG_MAX_LENGTH))  # tag_key(name)
+    
+    @classmethod
+    def get_or_create_many(cls, names):
+        """Return Tag rows for the given names, creating missing ones
+
+        Names are matched case-insensitively; a new tag keeps the case it was
+        first entered with. Missing tags are inserted ignoring conflicts, so a
+        concurrent request creating the same tag does not fail this one.
+        """
+        if not names:
+            return []
+        keys = {}
+        for name in names:
+            keys.setdefault(tag_key(name), name)
+        existing = {tag.normalized_name: tag for tag in cls.query.filter(cls.normalized_name.in_(keys)).all()}
+        missing = [key for key in keys if key not in existing]
+        if missing:
+            insert_ignoring_conflicts(db.session.connection(), cls.__table__, [
+                {'name': keys[key], 'normalized_name': key} for key in missing
+            ])
+            existing.update({tag.normalized_name: tag for tag in cls.query.filter(cls.normalized_name.in_(missing)).all()})
+        return [existing[key] for key in keys]
+    
+    def __repr__(self):
+        return f'<Tag {self.name}>'
+
+class SavedDescriptionTag(db.Model):
+    """Tag of a saved description at its position in the entered order"""
+    
+    __tablename__ = 'saved_description_tags'
+    __table_args__ = (
+        db.Index('ix_saved_description_tags_tag_id', 'tag_id', 'saved_description_id'),
+    )
+    
+    saved_description_id = db.Column(db.Integer, db.ForeignKey('saved_descriptions.id', ondelete='CASCADE'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True)
+    position = db.Column(db.Integer, default=0)
+    
+    tag = db.relationship('Tag', lazy='joined')
+
+saved_description_tags = SavedDescriptionTag.__table__
 
 class SavedDescription(db.Model):
     """Model for saved reference descriptions"""
     
     __tablename__ = 'saved_descriptions'
+    __table_args__ = (
+        # User lists (keyset on created_at, id) and examples lists
+        db.Index('ix_saved_descriptions_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_saved_descriptions_user_public_created', 'user_id', 'is_public', 'created_at', 'id'),
+        # Example index load and random examples per type
+        db.Index('ix_saved_descriptions_public_type', 'is_public', 'description_type', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     description_type = db.Column(db.String(20), nullable=False)  # 'guitar' or 'company'
     category = db.Column(db.String(100))  # e.g., 'electric', 'acoustic', 'vintage', etc.
-    tags = db.Column(db.Text)  # JSON string of tags
+    tags = db.Column(db.Text)  # Legacy tag string, moved to the tags table by migrate_legacy_tags()
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_public = db.Column(db.Boolean, default=False)
+    # Start of the content for list views, cut in SQL and loaded only on request
+    content_preview = db.column_property(db.func.substr(content, 1, CONTENT_PREVIEW_LENGTH), deferred=True)
+    
+    # Relationships; tags are written through tag_links, tag_entries is for queries
+    tag_links = db.relationship('SavedDescriptionTag', lazy='selectin', order_by='SavedDescriptionTag.position', cascade='all, delete-orphan')
+    tag_entries = db.relationship('Tag', secondary=saved_description_tags, order_by=saved_description_tags.c.position, viewonly=True, backref=db.backref('saved_descriptions', viewonly=True))
+    
+    @property
+    def tag_names(self):
+        """Tag names of this description in the order they were entered"""
+        return [link.tag.name for link in self.tag_links]
+    
+    def set_tags(self, value):
+        """Replace tags from a list, JSON list or comma separated string"""
+        tags = Tag.get_or_create_many(normalize_tag_names(value))
+        links = {link.tag_id: link for link in self.tag_links}
+        new_links = []
+        for position, tag in enumerate(tags):
+            link = links.get(tag.id) or SavedDescriptionTag(tag=tag)
+            link.position = position
+            new_links.append(link)
+        self.tag_links = new_links
+    
+    @classmethod
+    def filter_by_tags(cls, query, tags):
+        """Restrict a query to descriptions having all of the given tags, in any case"""
+        for name in normalize_tag_names(tags):
+            query = query.filter(cls.tag_entries.any(Tag.normalized_name == tag_key(name)))
+        return query
     
     def __repr__(self):
         return f'<SavedDescription {self.title}>'
 
+def load_tag_names(description_ids):
+    """Map SavedDescription ids (a list or a select of ids) to their tag names"""
+    rows = db.session.query(saved_description_tags.c.saved_description_id, Tag.name)\
+        .join(Tag, Tag.id == saved_description_tags.c.tag_id)\
+        .filter(saved_description_tags.c.saved_description_id.in_(description_ids))\
+        .order_by(saved_description_tags.c.saved_description_id, saved_description_tags.c.position)
+    tag_names = {}
+    for description_id, name in rows:
+        tag_names.setdefault(description_id, []).append(name)
+    return tag_names
+
+def migrate_legacy_tags(batch_size=500):
+    """Move tags from the legacy text column into the tags table, returns migrated row count"""
+    migrated = 0
+    while True:
+        descriptions = SavedDescription.query.filter(SavedDescription.tags.isnot(None))\
+            .order_by(SavedDescription.id).limit(batch_size).all()
+        if not descriptions:
+            return migrated
+        for description in descriptions:
+            names = normalize_tag_names(description.tags)
+            for name in description.tag_names:
+                if name not in names:
+                    names.append(name)
+            description.set_tags(names)
+            description.tags = None
+        db.session.commit()
+        migrated += len(descriptions)
+
 class ReturnedDescription(db.Model):
     """Model for AI-generated descriptions"""
     
     __tablename__ = 'returned_descriptions'
+    __table_args__ = (
+        db.Index('ix_returned_descriptions_user_created', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     input_text = db.Column(db.Text, nullable=False)
@@ -34,15 +185,55 @@ class ReturnedDescription(db.Model):
     tokens_used = db.Column(db.Integer)
     model_version = db.Column(db.String(50))
     processing_time = db.Column(db.Float)  # in seconds
+    time_to_first_token = db.Column(db.Float)  # in seconds, streamed generations only
     was_saved = db.Column(db.Boolean, default=False)
+    cache_hit = db.Column(db.Boolean, default=False)  # served from GenerationCache
+    # Per-phase breakdown of processing_time in seconds, see utils.metrics
+    context_query_time = db.Column(db.Float)
+    ranking_time = db.Column(db.Float)
+    prompt_build_time = db.Column(db.Float)
+    response_cache_time = db.Column(db.Float)
+    upstream_time = db.Column(db.Float)
+    prompt_tokens_estimate = db.Column(db.Integer)
+    
+    def set_phase_timings(self, timings):
+        """Copy phase timings collected by utils.metrics.track_phases"""
+        self.context_query_time = timings.get('context_queries')
+        self.ranking_time = timings.get('ranking')
+        self.prompt_build_time = timings.get('prompt_build')
+        self.response_cache_time = timings.get('response_cache')
+        self.upstream_time = timings.get('upstream')
     
     def __repr__(self):
         return f'<ReturnedDescription {self.id}>'
 
+class GenerationCache(db.Model):
+    """Model for cached AI responses keyed by a hash of the full request"""
+    
+    __tablename__ = 'generation_cache'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False, index=True)  # SHA-256 hex digest
+    description = db.Column(db.Text, nullable=False)
+    tokens_used = db.Column(db.Integer)
+    model_version = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    last_hit_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    hit_count = db.Column(db.Integer, default=0)
+    
+    def __repr__(self):
+        return f'<GenerationCache {self.cache_key[:12]}>'
+
 class ModelCorrection(db.Model):
     """Model for storing corrections to improve AI model"""
     
     __tablename__ = 'model_corrections'
+    __table_args__ = (
+        db.Index('ix_model_corrections_user_created', 'user_id', 'created_at'),
+        # Correction pool sampling probes ids of unapplied corrections per type
+        db.Index('ix_model_corrections_pending_type', 'is_applied', 'description_type', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     original_text = db.Column(db.Text, nullable=False)
@@ -65,6 +256,10 @@ class ModelAdjustment(db.Model):
     """Model for storing model adjustments and preferences"""
     
     __tablename__ = 'model_adjustments'
+    __table_args__ = (
+        # Active adjustments in priority order, filtered by type inside the index
+        db.Index('ix_model_adjustments_active_priority', 'is_active', 'priority', 'description_type'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     adjustment_type = db.Column(db.String(50), nullable=False)  # 'prompt', 'temperature', 'max_tokens', etc.
@@ -83,6 +278,10 @@ class AIPrompt(db.Model):
     """Model for storing AI prompts"""
     
     __tablename__ = 'ai_prompts'
+    __table_args__ = (
+        db.Index('ix_ai_prompts_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_ai_prompts_user_type_active', 'user_id', 'prompt_type', 'is_active'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     prompt_type = db.Column(db.String(20), nullable=False)  # 'guitar' or 'company'
@@ -0,0 +1,69 @@
+from itertools import chain
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# (model classes, callback) pairs notified after a successful commit
+_commit_listeners = []
+
+CHANGES_KEY = 'committed_changes'
+
+
+def on_commit(models, callback):
+    """Call callback(changes) after every commit that touched one of the models
+
+    changes is a set of (model class, primary key) tuples. The primary key is
+    None for bulk INSERT/UPDATE/DELETE statements, which may have touched any row.
+    """
+    _commit_listeners.append((tuple(models), callback))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_changes(session, flush_context):
+    """Remember which rows were written in the current transaction"""
+    changes = session.info.setdefault(CHANGES_KEY, set())
+    for instance in chain(session.new, session.dirty, session.deleted):
+        changes.add((type(instance), getattr(instance, 'id', None)))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_changes(orm_execute_state):
+    """Remember bulk query.update()/query.delete() and table INSERT statements"""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    model = None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        model = mapper.class_
+    else:
+        # Core statements like Model.__table__.insert() carry no mapper
+        model = _model_of_table(getattr(orm_execute_state.statement, 'table', None))
+    if model is not None:
+        changes = orm_execute_state.session.info.setdefault(CHANGES_KEY, set())
+        changes.add((model, None))
+
+
+def _model_of_table(table):
+    """Listened-to model class mapped to a table, if any"""
+    for models, _ in _commit_listeners:
+        for model in models:
+            if getattr(model, '__table__', None) is table:
+                return model
+    return None
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_commit_listeners(session):
+    """Dispatch the collected changes to the registered listeners"""
+    changes = session.info.pop(CHANGES_KEY, None)
+    if not changes:
+        return
+    for models, callback in _commit_listeners:
+        relevant = {change for change in changes if issubclass(change[0], models)}
+        if relevant:
+            callback(relevant)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    """Forget changes from a transaction that was rolled back"""
+    session.info.pop(CHANGES_KEY, None)
@@ -0,0 +1,135 @@
+from datetime import datetime
+from models.database import db, insert_ignoring_conflicts
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+# Applied migrations, one row per version
+schema_versions = db.Table(
+    'schema_versions',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(200), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False)
+)
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """Register a schema migration; versions run once each, in ascending order"""
+    def register(function):
+        if any(existing_version == version for existing_version, _, _ in MIGRATIONS):
+            raise ValueError(f'Duplicate migration version {version}')
+        MIGRATIONS.append((version, name, function))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return function
+    return register
+
+
+def applied_versions():
+    """Versions already recorded in schema_versions"""
+    # IF NOT EXISTS, so workers starting together do not race to create it
+    with db.engine.begin() as connection:
+        connection.execute(CreateTable(schema_versions, if_not_exists=True))
+    return {row.version for row in db.session.execute(db.select(schema_versions.c.version))}
+
+
+def record_applied(version, name):
+    """Record a migration as applied; a row another worker recorded first is kept"""
+    insert_ignoring_conflicts(db.session.connection(), schema_versions, [
+        {'version': version, 'name': name, 'applied_at': datetime.utcnow()}
+    ])
+
+
+def pending_migrations():
+    """(version, name, function) of migrations not applied yet"""
+    applied = applied_versions()
+    return [entry for entry in MIGRATIONS if entry[0] not in applied]
+
+
+def migrate():
+    """Apply pending migrations, each in its own transaction; returns the applied ones
+
+    Several workers may start at once: migrations only create missing
+    indexes and backfill missing values, and a migration that fails because
+    another worker applied it meanwhile is skipped.
+    """
+    applied = []
+    for version, name, function in pending_migrations():
+        try:
+            function()
+            record_applied(version, name)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            if version in applied_versions():
+                continue
+            raise
+        applied.append((version, name))
+    return applied
+
+
+def create_indexes(*names):
+    """Create indexes declared on the models by name, skipping existing ones"""
+    indexes = {index.name: index for table in db.metadata.sorted_tables for index in table.indexes}
+    for name in names:
+        db.session.execute(CreateIndex(indexes[name], if_not_exists=True))
+
+
+@migration(1, 'Composite indexes for list, dashboard and learning context queries')
+def add_composite_indexes():
+    create_indexes(
+        'ix_saved_descriptions_user_created',
+        'ix_saved_descriptions_user_public_created',
+        'ix_saved_descriptions_public_type',
+        'ix_returned_descriptions_user_created',
+        'ix_model_corrections_user_created',
+        'ix_model_corrections_pending_type',
+        'ix_model_adjustments_active_priority',
+        'ix_ai_prompts_user_created',
+        'ix_ai_prompts_user_type_active'
+    )
+
+
+@migration(2, 'Backfill missing created_at so keyset pagination can seek on it')
+def backfill_created_at():
+    from models.descriptions import SavedDescription, AIPrompt
+    now = datetime.utcnow()
+    for model in (SavedDescription, AIPrompt):
+        db.session.execute(
+            db.update(model)
+            .where(model.created_at.is_(None))
+            .values(created_at=db.func.coalesce(model.updated_at, now))
+        )
+
+
+@migration(3, 'Case-insensitive tag names and entered tag order')
+def add_tag_normalized_names():
+    from models.descriptions import Tag, saved_description_tags, tag_key
+    tags = Tag.__table__
+    rows = db.session.execute(db.select(tags.c.id, tags.c.name).where(tags.c.normalized_name.is_(None))).all()
+    if rows:
+        db.session.execute(
+            tags.update().where(tags.c.id == db.bindparam('tag_id')).values(normalized_name=db.bindparam('key')),
+            [{'tag_id': tag_id, 'key': tag_key(name)} for tag_id, name in rows]
+        )
+    create_indexes('ix_tags_normalized_name')
+    # Tags used to be listed by name, so that is the order existing links keep
+    links = db.session.execute(
+        db.select(saved_description_tags.c.saved_description_id, saved_description_tags.c.tag_id)
+        .join(tags, tags.c.id == saved_description_tags.c.tag_id)
+        .where(saved_description_tags.c.position.is_(None))
+        .order_by(saved_description_tags.c.saved_description_id, tags.c.name)
+    ).all()
+    positions = []
+    previous_id, position = None, 0
+    for description_id, tag_id in links:
+        position = position + 1 if description_id == previous_id else 0
+        previous_id = description_id
+        positions.append({'description_id': description_id, 'link_tag_id': tag_id, 'new_position': position})
+    if positions:
+        db.session.execute(
+            saved_description_tags.update().where(
+                saved_description_tags.c.saved_description_id == db.bindparam('description_id'),
+                saved_description_tags.c.tag_id == db.bindparam('link_tag_id')
+            ).values(position=db.bindparam('new_position')),
+            positions
+        )
@@ -0,0 +1,147 @@
+from models.database import db
+from models.descriptions import SavedDescription, ReturnedDescription, ModelCorrection, ModelAdjustment, AIPrompt
+from itertools import chain
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Model -> resource name whose version a write to the model bumps
+RESOURCES = {
+    SavedDescription: 'saved_descriptions',
+    ReturnedDescription: 'generations',
+    ModelCorrection: 'corrections',
+    AIPrompt: 'prompts',
+}
+
+# Versions shared by all users, bumped at most once per committed transaction
+PUBLIC_EXAMPLES = 'public_examples'
+# Adjustments apply to every user, whether they are global or user-owned
+ADJUSTMENTS = 'adjustments'
+PENDING_GLOBAL_KEY = 'pending_global_versions'
+BUMPED_GLOBAL_KEY = 'bumped_global_versions'
+COMMITTED_GLOBAL_KEY = 'committed_global_versions'
+
+class ResourceVersion(db.Model):
+    """Per-user version stamp of a resource, bumped by every write to it"""
+
+    __tablename__ = 'resource_versions'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    resource = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResourceVersion {self.user_id}:{self.resource}={self.version}>'
+
+class GlobalVersion(db.Model):
+    """Version stamp of a resource shared by all users"""
+
+    __tablename__ = 'global_versions'
+
+    resource = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<GlobalVersion {self.resource}={self.version}>'
+
+def get_versions(user_id, resources):
+    """Map each resource to its current version for a user (0 before the first write)"""
+    rows = db.session.execute(
+        db.select(ResourceVersion.resource, ResourceVersion.version).where(
+            ResourceVersion.user_id == user_id,
+            ResourceVersion.resource.in_(resources)
+        )
+    )
+    versions = dict.fromkeys(resources, 0)
+    versions.update({resource: version for resource, version in rows})
+    return versions
+
+def get_global_version(resource):
+    """Current version of a shared resource (0 before the first write)"""
+    version = db.session.execute(
+        db.select(GlobalVersion.version).where(GlobalVersion.resource == resource)
+    ).scalar()
+    return version or 0
+
+def committed_global_version(session, resource):
+    """Version of a shared resource produced by the session's last commit, if it bumped it"""
+    return session.info.get(COMMITTED_GLOBAL_KEY, {}).get(resource)
+
+def _upsert_increment(connection, table, keys):
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = (sqlite if dialect == 'sqlite' else postgresql).insert
+        statement = insert(table).values(version=1, **keys)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[table.c[key] for key in keys],
+            set_={'version': table.c.version + 1}
+        ))
+        return
+    updated = connection.execute(
+        table.update()
+        .where(*[table.c[key] == value for key, value in keys.items()])
+        .values(version=table.c.version + 1)
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert().values(version=1, **keys))
+
+def _bump(connection, user_id, resource):
+    _upsert_increment(connection, ResourceVersion.__table__, {'user_id': user_id, 'resource': resource})
+
+def _global_resources(instance):
+    """Shared resources a pending write of the instance changes"""
+    if isinstance(instance, SavedDescription):
+        # Private rows are not examples, unless they just stopped being one
+        history = db.inspect(instance).attrs.is_public.history
+        if instance.is_public or True in history.deleted:
+            return (PUBLIC_EXAMPLES,)
+    elif isinstance(instance, ModelAdjustment):
+        return (ADJUSTMENTS,)
+    return ()
+
+@event.listens_for(Session, 'before_flush')
+def _bump_written_resources(session, flush_context, instances):
+    """Bump the versions of resources written in this flush, in the same transaction"""
+    bumps = set()
+    # session.dirty also lists objects whose attributes were set to equal values
+    modified = [instance for instance in session.dirty if session.is_modified(instance)]
+    for instance in chain(session.new, session.deleted, modified):
+        resource = RESOURCES.get(type(instance))
+        if resource is not None and instance.user_id is not None:
+            bumps.add((instance.user_id, resource))
+        pending = _global_resources(instance)
+        if pending:
+            session.info.setdefault(PENDING_GLOBAL_KEY, set()).update(pending)
+
+    if bumps:
+        # Core statements on the session connection, so no autoflush recursion
+        connection = session.connection()
+        for user_id, resource in sorted(bumps):
+            _bump(connection, user_id, resource)
+
+@event.listens_for(Session, 'before_commit')
+def _bump_global_versions(session):
+    """Bump each shared resource written in the transaction once, and remember the result"""
+    # Flush first, the commit's own flush would run after this hook
+    session.flush()
+    pending = session.info.pop(PENDING_GLOBAL_KEY, None)
+    if not pending:
+        return
+    connection = session.connection()
+    table = GlobalVersion.__table__
+    bumped = {}
+    for resource in sorted(pending):
+        _upsert_increment(connection, table, {'resource': resource})
+        bumped[resource] = connection.execute(
+            db.select(table.c.version).where(table.c.resource == resource)
+        ).scalar()
+    session.info.setdefault(BUMPED_GLOBAL_KEY, {}).update(bumped)
+
+@event.listens_for(Session, 'after_commit')
+def _publish_global_versions(session):
+    session.info[COMMITTED_GLOBAL_KEY] = session.info.pop(BUMPED_GLOBAL_KEY, {})
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_global_versions(session):
+    session.info.pop(PENDING_GLOBAL_KEY, None)
+    session.info.pop(BUMPED_GLOBAL_KEY, None)
@@ -0,0 +1,189 @@
+from models.database import db, insert_ignoring_conflicts
+from models.descriptions import SavedDescription, ReturnedDescription, ModelCorrection
+from datetime import datetime, timedelta
+from sqlalchemy import event, literal, union_all
+from sqlalchemy.orm import Session
+import json
+
+RECENT_WINDOW = timedelta(days=7)
+BUCKET_FORMAT = '%Y-%m-%dT%H'  # hourly buckets, the window is exact to the hour
+
+# Counted model -> (total column, recent activity kind or None)
+TRACKED_MODELS = {
+    ModelCorrection: ('total_corrections', 'corrections'),
+    SavedDescription: ('total_saved_descriptions', None),
+    ReturnedDescription: ('total_generated_descriptions', 'generated'),
+}
+
+class UserStats(db.Model):
+    """Per-user counters kept up to date on every flush
+
+    recent_activity holds hourly counts of the last 7 days per kind as JSON,
+    so the rolling window is summed without touching the history tables.
+    """
+
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_corrections = db.Column(db.Integer, nullable=False, default=0)
+    total_saved_descriptions = db.Column(db.Integer, nullable=False, default=0)
+    total_generated_descriptions = db.Column(db.Integer, nullable=False, default=0)
+    recent_activity = db.Column(db.Text, nullable=False, default='{}')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def recent(self, kind, now=None):
+        """Count of kind in the rolling 7-day window"""
+        cutoff = _bucket((now or datetime.utcnow()) - RECENT_WINDOW)
+        buckets = json.loads(self.recent_activity or '{}').get(kind, {})
+        return sum(count for bucket, count in buckets.items() if bucket >= cutoff)
+
+    def as_dict(self):
+        return {
+            'total_corrections': self.total_corrections,
+            'total_saved_descriptions': self.total_saved_descriptions,
+            'total_generated_descriptions': self.total_generated_descriptions,
+            'recent_corrections': self.recent('corrections'),
+            'recent_generated': self.recent('generated')
+        }
+
+    def __repr__(self):
+        return f'<UserStats {self.user_id}>'
+
+def _bucket(moment):
+    return moment.strftime(BUCKET_FORMAT)
+
+def _add_recent(activity, kind, bucket, delta, cutoff):
+    """Apply a delta to one hourly bucket and drop buckets outside the window"""
+    buckets = activity.setdefault(kind, {})
+    if bucket >= cutoff:
+        buckets[bucket] = buckets.get(bucket, 0) + delta
+    for old_bucket in [key for key, count in buckets.items() if key < cutoff or count <= 0]:
+        del buckets[old_bucket]
+
+@event.listens_for(Session, 'before_flush')
+def _count_flushed_rows(session, flush_context, instances):
+    """Apply inserted and deleted tracked rows to the owners' counters
+
+    Runs inside the writing transaction, so counters commit or roll back
+    together with the rows. A user without a stats row gets one counted from
+    the tables first, so no committed write is missed by both paths.
+    """
+    now = datetime.utcnow()
+    totals = {}
+    recent = {}
+    for instances_changed, sign in ((session.new, 1), (session.deleted, -1)):
+        for instance in instances_changed:
+            tracked = TRACKED_MODELS.get(type(instance))
+            if tracked is None or instance.user_id is None:
+                continue
+            column, kind = tracked
+            user_totals = totals.setdefault(instance.user_id, {})
+            user_totals[column] = user_totals.get(column, 0) + sign
+            if kind:
+                bucket = _bucket(instance.created_at or now)
+                user_recent = recent.setdefault(instance.user_id, {}).setdefault(kind, {})
+                user_recent[bucket] = user_recent.get(bucket, 0) + sign
+
+    if not totals:
+        return
+
+    # Core statements on the session connection, so no autoflush recursion
+    connection = session.connection()
+    table = UserStats.__table__
+    cutoff = _bucket(now - RECENT_WINDOW)
+    for user_id, user_totals in totals.items():
+        increment = table.update().where(table.c.user_id == user_id).values(
+            updated_at=now,
+            **{column: table.c[column] + delta for column, delta in user_totals.items()}
+        )
+        # The UPDATE locks the row, so the read-modify-write below is safe
+        if not connection.execute(increment).rowcount:
+            # The count excludes this flush's rows, which the increment adds
+            insert_ignoring_conflicts(connection, table, _count_stats(connection.execute, [user_id], now))
+            connection.execute(increment)
+        if user_id not in recent:
+            continue
+
+        activity = json.loads(connection.execute(
+            db.select(table.c.recent_activity).where(table.c.user_id == user_id)
+        ).scalar() or '{}')
+        for kind, buckets in recent[user_id].items():
+            for bucket, delta in buckets.items():
+                _add_recent(activity, kind, bucket, delta, cutoff)
+        connection.execute(
+            table.update().where(table.c.user_id == user_id).values(
+                recent_activity=json.dumps(activity, separators=(',', ':'))
+            )
+        )
+
+def rebuild_user_stats(user_ids=None):
+    """Recompute stats rows from the tables with a single query
+
+    Covers the given users (all users with any activity when None) and
+    returns the number of rows written. The caller commits.
+    """
+    rows = _count_stats(db.session.execute, user_ids, datetime.utcnow())
+    if rows:
+        table = UserStats.__table__
+        db.session.execute(table.delete().where(table.c.user_id.in_([row['user_id'] for row in rows])))
+        db.session.execute(table.insert(), rows)
+    return len(rows)
+
+def _count_stats(execute, user_ids, now):
+    """Stats rows of the given users (all users with any activity when None) counted from the tables"""
+    since = now - RECENT_WINDOW
+
+    # One UNION ALL statement: per-user totals, plus creation times of the
+    # rows inside the window (at most 7 days of activity) for the buckets
+    selects = []
+    for model, (column, kind) in TRACKED_MODELS.items():
+        totals = db.select(
+            literal(column).label('name'),
+            model.user_id,
+            literal(None, db.DateTime).label('created_at'),
+            db.func.count().label('count')
+        ).group_by(model.user_id)
+        if user_ids is not None:
+            totals = totals.where(model.user_id.in_(user_ids))
+        selects.append(totals)
+        if kind:
+            recent = db.select(
+                literal(kind).label('name'),
+                model.user_id,
+                model.created_at,
+                literal(1).label('count')
+            ).where(model.created_at >= since)
+            if user_ids is not None:
+                recent = recent.where(model.user_id.in_(user_ids))
+            selects.append(recent)
+
+    users = {user_id: {'totals': {}, 'activity': {}} for user_id in (user_ids or [])}
+    cutoff = _bucket(since)
+    for name, user_id, created_at, count in execute(union_all(*selects)):
+        user = users.setdefault(user_id, {'totals': {}, 'activity': {}})
+        if created_at is None:
+            user['totals'][name] = count
+        else:
+            _add_recent(user['activity'], name, _bucket(created_at), count, cutoff)
+
+    return [
+        dict(
+            {column: user['totals'].get(column, 0) for column, _ in TRACKED_MODELS.values()},
+            user_id=user_id,
+            recent_activity=json.dumps(user['activity'], separators=(',', ':')),
+            updated_at=now
+        )
+        for user_id, user in users.items()
+    ]
+
+def get_user_stats(user_id):
+    """Stats row of a user, built on first access"""
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        # A row created meanwhile by a concurrent write wins, that write
+        # counted the tables itself
+        rows = _count_stats(db.session.execute, [user_id], datetime.utcnow())
+        insert_ignoring_conflicts(db.session.connection(), UserStats.__table__, rows)
+        db.session.commit()
+        stats = db.session.get(UserStats, user_id)
+    return stats
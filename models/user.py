@@ -1,6 +1,10 @@
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from config.settings import Config
 from models.database import db
+from models.events import on_commit
+from utils.cache import LRUCache
+from collections import namedtuple
 from datetime import datetime
 
 class User(UserMixin, db.Model):
@@ -51,6 +55,38 @@ def get_user_by_id(user_id):
     """Get user by ID"""
     return User.query.get(user_id)
 
+class UserSnapshot(namedtuple('UserSnapshot', ['id', 'username', 'email', 'role', 'is_active']), UserMixin):
+    """Immutable copy of a user's login fields, safe to share between requests"""
+    
+    __slots__ = ()
+    
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email, user.role, bool(user.is_active))
+
+# User id -> UserSnapshot, or None for ids without a user
+user_cache = LRUCache(Config.USER_CACHE_MAX_ENTRIES, Config.USER_CACHE_TTL)
+
+def _invalidate_users(changes):
+    """Drop cached users changed by a committed transaction"""
+    for _, primary_key in changes:
+        if primary_key is None:
+            user_cache.clear()
+            return
+        user_cache.delete(primary_key)
+
+on_commit([User], _invalidate_users)
+
+def get_user_snapshot(user_id):
+    """Get an active user's snapshot by ID, cached per process"""
+    def load():
+        user = get_user_by_id(user_id)
+        return UserSnapshot.from_user(user) if user else None
+    snapshot = user_cache.get_or_load(user_id, load)
+    if snapshot is None or not snapshot.is_active:
+        return None
+    return snapshot
+
 def verify_user(username, password):
     """Verify user credentials"""
     user = get_user_by_username(username)
@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
 from models.database import db
 from models.descriptions import ReturnedDescription
-from utils.ai_service import AIService
+from utils.ai_service import AIService, DESCRIPTION_TYPES
+from utils.prompt_templates import is_description_type
+from utils.metrics import phase, track_phases
+from config.settings import Config
 import time
+import json
 
 descriptions_bp = Blueprint('descriptions', __name__, url_prefix='/api/descriptions')
 ai_service = AIService()
@@ -16,6 +20,7 @@ def generate_description():
         data = request.get_json()
         description_type = data.get('type')  # 'guitar' or 'company'
         input_text = data.get('input_text')
+        use_cache = not data.get('no_cache', False)
         
         if not input_text or not description_type:
             return jsonify({
@@ -23,35 +28,48 @@ def generate_description():
                 'error': 'Missing required fields: input_text and type'
             }), 400
         
+        if not is_description_type(description_type):
+            return jsonify({
+                'success': False,
+                'error': f'Unknown type, expected one of: {", ".join(DESCRIPTION_TYPES)}'
+            }), 400
+        
         start_time = time.time()
         
-        if description_type == 'guitar':
-            result = ai_service.generate_guitar_description(input_text, current_user.id)
-        else:
-            result = ai_service.generate_company_description(input_text, current_user.id)
+        with track_phases() as timings:
+            result = ai_service.generate_description(description_type, input_text, current_user.id, use_cache)
         
         processing_time = time.time() - start_time
         
         if result['success']:
+            cache_hit = result.get('cached', False)
+            
             # Save the returned description to database
             returned_desc = ReturnedDescription(
                 input_text=input_text,
                 generated_description=result['description'],
                 description_type=description_type,
                 user_id=current_user.id,
-                tokens_used=result.get('tokens_used'),
+                tokens_used=0 if cache_hit else result.get('tokens_used'),
                 model_version=result.get('model_version'),
-                processing_time=processing_time
+                processing_time=processing_time,
+                cache_hit=cache_hit,
+                prompt_tokens_estimate=result.get('prompt_tokens_estimate')
             )
-            db.session.add(returned_desc)
-            db.session.commit()
+            if Config.PERSIST_PHASE_TIMINGS:
+                returned_desc.set_phase_timings(timings)
+            with track_phases(timings), phase('db_write'):
+                db.session.add(returned_desc)
+                db.session.commit()
             
             return jsonify({
                 'success': True,
                 'description': result['description'],
                 'type': description_type,
                 'description_id': returned_desc.id,
-                'processing_time': processing_time
+                'processing_time': processing_time,
+                'phase_timings': timings.as_dict(),
+                'cached': cache_hit
             })
         else:
             return jsonify({
@@ -65,6 +83,183 @@ def generate_description():
             'error': str(e)
         }), 500
 
+@descriptions_bp.route('/generate-stream', methods=['POST'])
+@login_required
+def generate_description_stream():
+    """Generate AI description, streaming tokens as server-sent events"""
+    data = request.get_json()
+    description_type = data.get('type')  # 'guitar' or 'company'
+    input_text = data.get('input_text')
+    use_cache = not data.get('no_cache', False)
+    
+    if not input_text or not description_type:
+        return jsonify({
+            'success': False,
+            'error': 'Missing required fields: input_text and type'
+        }), 400
+    
+    if not is_description_type(description_type):
+        return jsonify({
+            'success': False,
+            'error': f'Unknown type, expected one of: {", ".join(DESCRIPTION_TYPES)}'
+        }), 400
+    
+    user_id = current_user.id
+    
+    def format_event(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    
+    def generate():
+        start_time = time.time()
+        try:
+            with track_phases() as timings:
+                for event in ai_service.stream_description(description_type, input_text, user_id, use_cache):
+                    if event['event'] == 'token':
+                        yield format_event('token', {'content': event['content']})
+                    elif event['event'] == 'error':
+                        yield format_event('error', {'success': False, 'error': event['error']})
+                        return
+                    else:
+                        processing_time = time.time() - start_time
+                        cache_hit = event['cached']
+                        
+                        # Save the returned description to database
+                        returned_desc = ReturnedDescription(
+                            input_text=input_text,
+                            generated_description=event['description'],
+                            description_type=description_type,
+                            user_id=user_id,
+                            tokens_used=0 if cache_hit else event.get('tokens_used'),
+                            model_version=event.get('model_version'),
+                            processing_time=processing_time,
+                            time_to_first_token=event.get('time_to_first_token'),
+                            cache_hit=cache_hit,
+                            prompt_tokens_estimate=event.get('prompt_tokens_estimate')
+                        )
+                        if Config.PERSIST_PHASE_TIMINGS:
+                            returned_desc.set_phase_timings(timings)
+                        with phase('db_write'):
+                            db.session.add(returned_desc)
+                            db.session.commit()
+                        
+                        yield format_event('done', {
+                            'success': True,
+                            'description': event['description'],
+                            'type': description_type,
+                            'description_id': returned_desc.id,
+                            'processing_time': processing_time,
+                            'time_to_first_token': event.get('time_to_first_token'),
+                            'phase_timings': timings.as_dict(),
+                            'cached': cache_hit
+                        })
+        except Exception as e:
+            db.session.rollback()
+            yield format_event('error', {'success': False, 'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@descriptions_bp.route('/batch', methods=['POST'])
+@login_required
+def generate_description_batch():
+    """Generate many AI descriptions, streaming one JSON line per item as it completes"""
+    data = request.get_json()
+    items = data.get('items')
+    use_cache = not data.get('no_cache', False)
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({
+            'success': False,
+            'error': 'Missing required field: items (list of {type, input_text})'
+        }), 400
+    
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        return jsonify({
+            'success': False,
+            'error': f'Too many items, the limit is {Config.BATCH_MAX_ITEMS}'
+        }), 400
+    
+    user_id = current_user.id
+    
+    def generate():
+        start_time = time.time()
+        returned_descriptions = {}
+        failed = 0
+        saved = False
+        results = ai_service.generate_batch(items, user_id, use_cache, Config.BATCH_CONCURRENCY)
+        
+        def save_returned_descriptions():
+            # Save all returned descriptions in a single transaction
+            with phase('db_write'):
+                db.session.add_all(returned_descriptions.values())
+                db.session.commit()
+        
+        try:
+            for index, result in results:
+                processing_time = time.time() - start_time
+                if result['success']:
+                    cache_hit = result.get('cached', False)
+                    returned_descriptions[index] = ReturnedDescription(
+                        input_text=items[index]['input_text'],
+                        generated_description=result['description'],
+                        description_type=items[index]['type'],
+                        user_id=user_id,
+                        tokens_used=0 if cache_hit else result.get('tokens_used'),
+                        model_version=result.get('model_version'),
+                        processing_time=processing_time,
+                        cache_hit=cache_hit,
+                        prompt_tokens_estimate=result.get('prompt_tokens_estimate')
+                    )
+                    line = {
+                        'index': index,
+                        'success': True,
+                        'description': result['description'],
+                        'type': items[index]['type'],
+                        'processing_time': processing_time,
+                        'cached': cache_hit
+                    }
+                else:
+                    failed += 1
+                    line = {
+                        'index': index,
+                        'success': False,
+                        'error': result['error']
+                    }
+                yield json.dumps(line, ensure_ascii=False) + '\n'
+            
+            saved = True
+            save_returned_descriptions()
+            
+            yield json.dumps({
+                'done': True,
+                'success': True,
+                'succeeded': len(returned_descriptions),
+                'failed': failed,
+                'description_ids': {index: desc.id for index, desc in returned_descriptions.items()},
+                'processing_time': time.time() - start_time
+            }, ensure_ascii=False) + '\n'
+        except Exception as e:
+            db.session.rollback()
+            yield json.dumps({'done': True, 'success': False, 'error': str(e)}, ensure_ascii=False) + '\n'
+        finally:
+            # On a client disconnect or an error mid-batch, cancel the upstream
+            # calls not started yet and keep the descriptions already returned
+            results.close()
+            if not saved and returned_descriptions:
+                try:
+                    save_returned_descriptions()
+                except Exception:
+                    db.session.rollback()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @descriptions_bp.route('/<int:description_id>', methods=['GET'])
 @login_required
 def get_generated_description(description_id):
@@ -91,7 +286,17 @@ def get_generated_description(description_id):
                 'created_at': description.created_at.isoformat(),
                 'tokens_used': description.tokens_used,
                 'model_version': description.model_version,
-                'processing_time': description.processing_time
+                'processing_time': description.processing_time,
+                'time_to_first_token': description.time_to_first_token,
+                'cache_hit': description.cache_hit,
+                'prompt_tokens_estimate': description.prompt_tokens_estimate,
+                'phase_timings': {
+                    'context_queries': description.context_query_time,
+                    'ranking': description.ranking_time,
+                    'prompt_build': description.prompt_build_time,
+                    'response_cache': description.response_cache_time,
+                    'upstream': description.upstream_time
+                }
             }
         })
         
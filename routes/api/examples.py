@@ -2,11 +2,25 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from models.database import db
 from models.descriptions import SavedDescription
+from utils.example_index import example_index
+from utils.etags import conditional
+from utils.pagination import InvalidPageRequest, ListField, isoformat, paginate, parse_page_args
 from datetime import datetime
-import json
 
 examples_bp = Blueprint('examples', __name__, url_prefix='/api/examples')
 
+LIST_FIELDS = {
+    'id': ListField(SavedDescription.id, lambda example: example.id),
+    'title': ListField(SavedDescription.title, lambda example: example.title),
+    'content': ListField(SavedDescription.content, lambda example: example.content),
+    'preview': ListField(SavedDescription.content_preview, lambda example: example.content_preview),
+    'type': ListField(SavedDescription.description_type, lambda example: example.description_type),
+    'category': ListField(SavedDescription.category, lambda example: example.category),
+    'tags': ListField(SavedDescription.tag_links, lambda example: ', '.join(example.tag_names)),
+    'created_at': ListField(SavedDescription.created_at, lambda example: isoformat(example.created_at)),
+    'updated_at': ListField(SavedDescription.updated_at, lambda example: isoformat(example.updated_at))
+}
+
 @examples_bp.route('/add', methods=['POST'])
 @login_required
 def add_example():
@@ -36,15 +50,16 @@ def add_example():
             content=data['content'],
             description_type=data['type'],
             category=data['category'],
-            tags=data.get('tags', ''),
             user_id=current_user.id,
             is_public=True,  # Manual examples are always public for learning
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
+        example.set_tags(data.get('tags', ''))
         
         db.session.add(example)
         db.session.commit()
+        example_index.add(example)
         
         return jsonify({
             'success': True,
@@ -61,32 +76,32 @@ def add_example():
 
 @examples_bp.route('/list', methods=['GET'])
 @login_required
+@conditional('saved_descriptions')
 def list_examples():
-    """List all manual examples for the current user"""
+    """List a page of manual examples for the current user, newest first"""
     try:
-        examples = SavedDescription.query.filter_by(
+        cursor, limit, fields = parse_page_args(request.args, LIST_FIELDS)
+        examples_query = SavedDescription.query.filter_by(
             user_id=current_user.id,
             is_public=True
-        ).order_by(SavedDescription.created_at.desc()).all()
-        
-        examples_data = []
-        for example in examples:
-            examples_data.append({
-                'id': example.id,
-                'title': example.title,
-                'content': example.content,
-                'type': example.description_type,
-                'category': example.category,
-                'tags': example.tags,
-                'created_at': example.created_at.isoformat() if example.created_at else None,
-                'updated_at': example.updated_at.isoformat() if example.updated_at else None
-            })
+        )
+        if request.args.get('tag'):
+            examples_query = SavedDescription.filter_by_tags(examples_query, request.args['tag'])
+        examples_data, next_cursor = paginate(
+            examples_query, SavedDescription, LIST_FIELDS, fields, cursor, limit
+        )
         
         return jsonify({
             'success': True,
-            'examples': examples_data
+            'examples': examples_data,
+            'next_cursor': next_cursor
         })
         
+    except InvalidPageRequest as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -112,6 +127,7 @@ def delete_example(example_id):
         
         db.session.delete(example)
         db.session.commit()
+        example_index.remove(example_id)
         
         return jsonify({
             'success': True,
@@ -152,12 +168,13 @@ def update_example(example_id):
         if 'category' in data:
             example.category = data['category']
         if 'tags' in data:
-            example.tags = data['tags']
+            example.set_tags(data['tags'])
         if 'type' in data and data['type'] in ['guitar', 'company']:
             example.description_type = data['type']
         
         example.updated_at = datetime.utcnow()
         db.session.commit()
+        example_index.add(example)
         
         return jsonify({
             'success': True,
@@ -176,9 +193,12 @@ def update_example(example_id):
 def list_public_examples():
     """List all public examples (for learning context)"""
     try:
-        examples = SavedDescription.query.filter_by(
+        examples_query = SavedDescription.query.filter_by(
             is_public=True
-        ).order_by(SavedDescription.created_at.desc()).limit(50).all()
+        )
+        if request.args.get('tag'):
+            examples_query = SavedDescription.filter_by_tags(examples_query, request.args['tag'])
+        examples = examples_query.order_by(SavedDescription.created_at.desc()).limit(50).all()
         
         examples_data = []
         for example in examples:
@@ -188,7 +208,7 @@ def list_public_examples():
                 'content': example.content,
                 'type': example.description_type,
                 'category': example.category,
-                'tags': example.tags
+                'tags': ', '.join(example.tag_names)
             })
         
         return jsonify({
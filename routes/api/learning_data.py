@@ -1,12 +1,17 @@
 from flask import Blueprint, jsonify
 from flask_login import login_required, current_user
 from models.descriptions import SavedDescription, ReturnedDescription, ModelCorrection
+from models.stats import get_user_stats as get_user_stats_row
+from utils.etags import conditional
+from utils.ai_service import learning_context_cache
+from utils.llm_client import llm_client
 import json
 
 learning_data_bp = Blueprint('learning_data', __name__, url_prefix='/api/learning-data')
 
 @learning_data_bp.route('/dashboard', methods=['GET'])
 @login_required
+@conditional('corrections', 'saved_descriptions', 'generations')
 def get_learning_data():
     """Get learning data for dashboard display"""
     try:
@@ -45,7 +50,7 @@ def get_learning_data():
                     'content': s.content,
                     'type': s.description_type,
                     'category': s.category,
-                    'tags': s.tags if s.tags else '',
+                    'tags': ', '.join(s.tag_names),
                     'timestamp': s.created_at.isoformat(),
                     'is_public': s.is_public
                 } for s in saved_descriptions
@@ -72,35 +77,28 @@ def get_learning_data():
 @learning_data_bp.route('/stats', methods=['GET'])
 @login_required
 def get_user_stats():
-    """Get user statistics"""
+    """Get user statistics from the maintained per-user counters"""
     try:
-        total_corrections = ModelCorrection.query.filter_by(user_id=current_user.id).count()
-        total_saved = SavedDescription.query.filter_by(user_id=current_user.id).count()
-        total_generated = ReturnedDescription.query.filter_by(user_id=current_user.id).count()
-        
-        # Get recent activity count (last 7 days)
-        from datetime import datetime, timedelta
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        
-        recent_corrections = ModelCorrection.query.filter(
-            ModelCorrection.user_id == current_user.id,
-            ModelCorrection.created_at >= week_ago
-        ).count()
-        
-        recent_generated = ReturnedDescription.query.filter(
-            ReturnedDescription.user_id == current_user.id,
-            ReturnedDescription.created_at >= week_ago
-        ).count()
+        return jsonify({
+            'success': True,
+            'stats': get_user_stats_row(current_user.id).as_dict()
+        })
         
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@learning_data_bp.route('/cache-stats', methods=['GET'])
+@login_required
+def get_cache_stats():
+    """Get learning context cache and upstream limiter counters"""
+    try:
         return jsonify({
             'success': True,
-            'stats': {
-                'total_corrections': total_corrections,
-                'total_saved_descriptions': total_saved,
-                'total_generated_descriptions': total_generated,
-                'recent_corrections': recent_corrections,
-                'recent_generated': recent_generated
-            }
+            'cache': learning_context_cache.stats(),
+            'upstream': llm_client.stats()
         })
         
     except Exception as e:
@@ -2,35 +2,44 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from models.database import db
 from models.descriptions import AIPrompt
+from utils.etags import conditional
+from utils.pagination import InvalidPageRequest, ListField, isoformat, paginate, parse_page_args
 from datetime import datetime
 
 prompts_bp = Blueprint('prompts', __name__, url_prefix='/api/prompts')
 
+LIST_FIELDS = {
+    'id': ListField(AIPrompt.id, lambda prompt: prompt.id),
+    'prompt_type': ListField(AIPrompt.prompt_type, lambda prompt: prompt.prompt_type),
+    'title': ListField(AIPrompt.title, lambda prompt: prompt.title),
+    'content': ListField(AIPrompt.content, lambda prompt: prompt.content),
+    'is_active': ListField(AIPrompt.is_active, lambda prompt: prompt.is_active),
+    'version': ListField(AIPrompt.version, lambda prompt: prompt.version),
+    'created_at': ListField(AIPrompt.created_at, lambda prompt: isoformat(prompt.created_at)),
+    'updated_at': ListField(AIPrompt.updated_at, lambda prompt: isoformat(prompt.updated_at))
+}
+
 @prompts_bp.route('/list', methods=['GET'])
 @login_required
+@conditional('prompts')
 def list_prompts():
-    """List all prompts for the current user"""
+    """List a page of prompts for the current user, newest first"""
     try:
-        prompts = AIPrompt.query.filter_by(user_id=current_user.id).order_by(AIPrompt.created_at.desc()).all()
-        
-        prompts_data = []
-        for prompt in prompts:
-            prompts_data.append({
-                'id': prompt.id,
-                'prompt_type': prompt.prompt_type,
-                'title': prompt.title,
-                'content': prompt.content,
-                'is_active': prompt.is_active,
-                'version': prompt.version,
-                'created_at': prompt.created_at.isoformat() if prompt.created_at else None,
-                'updated_at': prompt.updated_at.isoformat() if prompt.updated_at else None
-            })
+        cursor, limit, fields = parse_page_args(request.args, LIST_FIELDS)
+        prompts_query = AIPrompt.query.filter_by(user_id=current_user.id)
+        prompts_data, next_cursor = paginate(prompts_query, AIPrompt, LIST_FIELDS, fields, cursor, limit)
         
         return jsonify({
             'success': True,
-            'prompts': prompts_data
+            'prompts': prompts_data,
+            'next_cursor': next_cursor
         })
         
+    except InvalidPageRequest as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -242,6 +251,7 @@ def activate_prompt(prompt_id):
         # Activate this prompt
         prompt.is_active = True
         prompt.updated_at = datetime.utcnow()
+        prompt.version += 1
         
         db.session.commit()
         
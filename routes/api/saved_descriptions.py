@@ -3,9 +3,24 @@ from flask_login import login_required, current_user
 from models.database import db
 from models.descriptions import SavedDescription
 from utils.ai_service import AIService
-import json
+from utils.example_index import example_index
+from utils.etags import conditional
+from utils.pagination import InvalidPageRequest, ListField, isoformat, paginate, parse_page_args
 
 saved_descriptions_bp = Blueprint('saved_descriptions', __name__, url_prefix='/api/saved-descriptions')
+ai_service = AIService()
+
+LIST_FIELDS = {
+    'id': ListField(SavedDescription.id, lambda desc: desc.id),
+    'title': ListField(SavedDescription.title, lambda desc: desc.title),
+    'content': ListField(SavedDescription.content, lambda desc: desc.content),
+    'preview': ListField(SavedDescription.content_preview, lambda desc: desc.content_preview),
+    'type': ListField(SavedDescription.description_type, lambda desc: desc.description_type),
+    'category': ListField(SavedDescription.category, lambda desc: desc.category),
+    'tags': ListField(SavedDescription.tag_links, lambda desc: desc.tag_names),
+    'created_at': ListField(SavedDescription.created_at, lambda desc: isoformat(desc.created_at)),
+    'is_public': ListField(SavedDescription.is_public, lambda desc: desc.is_public)
+}
 
 @saved_descriptions_bp.route('/save', methods=['POST'])
 @login_required
@@ -31,13 +46,14 @@ def save_description():
             content=content,
             description_type=description_type,
             category=category,
-            tags=json.dumps(tags),
             user_id=current_user.id,
             is_public=is_public
         )
+        saved_desc.set_tags(tags)
         
         db.session.add(saved_desc)
         db.session.commit()
+        example_index.add(saved_desc)
         
         return jsonify({
             'success': True,
@@ -53,28 +69,29 @@ def save_description():
 
 @saved_descriptions_bp.route('/list', methods=['GET'])
 @login_required
+@conditional('saved_descriptions')
 def list_saved_descriptions():
-    """Get user's saved descriptions"""
+    """Get a page of the user's saved descriptions, newest first"""
     try:
-        descriptions = SavedDescription.query.filter_by(user_id=current_user.id)\
-            .order_by(SavedDescription.created_at.desc()).all()
+        cursor, limit, fields = parse_page_args(request.args, LIST_FIELDS)
+        descriptions_query = SavedDescription.query.filter_by(user_id=current_user.id)
+        if request.args.get('tag'):
+            descriptions_query = SavedDescription.filter_by_tags(descriptions_query, request.args['tag'])
+        descriptions, next_cursor = paginate(
+            descriptions_query, SavedDescription, LIST_FIELDS, fields, cursor, limit
+        )
         
         return jsonify({
             'success': True,
-            'descriptions': [
-                {
-                    'id': desc.id,
-                    'title': desc.title,
-                    'content': desc.content,
-                    'type': desc.description_type,
-                    'category': desc.category,
-                    'tags': json.loads(desc.tags) if desc.tags else [],
-                    'created_at': desc.created_at.isoformat(),
-                    'is_public': desc.is_public
-                } for desc in descriptions
-            ]
+            'descriptions': descriptions,
+            'next_cursor': next_cursor
         })
         
+    except InvalidPageRequest as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -102,15 +119,6 @@ def get_saved_description(description_id):
         
         print(f"Found description: {description.title}")
         
-        # Handle tags safely
-        tags = []
-        if description.tags:
-            try:
-                tags = json.loads(description.tags)
-            except json.JSONDecodeError:
-                # If tags is not valid JSON, treat it as a simple string
-                tags = [description.tags] if description.tags.strip() else []
-        
         response_data = {
             'success': True,
             'description': {
@@ -119,7 +127,7 @@ def get_saved_description(description_id):
                 'content': description.content,
                 'type': description.description_type,
                 'category': description.category,
-                'tags': tags,
+                'tags': description.tag_names,
                 'created_at': description.created_at.isoformat(),
                 'is_public': description.is_public
             }
@@ -153,6 +161,7 @@ def delete_saved_description(description_id):
         
         db.session.delete(description)
         db.session.commit()
+        example_index.remove(description_id)
         
         return jsonify({
             'success': True,
@@ -183,6 +192,7 @@ def toggle_description_active(description_id):
         
         description.is_public = not description.is_public
         db.session.commit()
+        example_index.add(description)
         
         return jsonify({
             'success': True,
@@ -259,7 +269,6 @@ def suggest_metadata():
                 'error': 'Missing required fields: content and type'
             }), 400
         
-        ai_service = AIService()
         result = ai_service.suggest_metadata(content, description_type)
         
         return jsonify(result)
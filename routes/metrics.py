@@ -0,0 +1,64 @@
+import hmac
+from flask import Blueprint, Response, request
+from config.settings import Config
+from models.user import user_cache
+from utils.ai_service import learning_context_cache
+from utils.llm_client import llm_client
+from utils.metrics import metrics
+from utils.resilience import CircuitBreaker
+
+metrics_bp = Blueprint('metrics', __name__)
+
+CIRCUIT_STATES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+
+def collect_learning_context_cache():
+    """Learning context cache counters"""
+    stats = learning_context_cache.stats()
+    return [
+        ('guitar_ai_context_cache_entries', 'gauge', 'Entries in the learning context cache', stats['entries']),
+        ('guitar_ai_context_cache_hits_total', 'counter', 'Learning context cache hits', stats['hits']),
+        ('guitar_ai_context_cache_misses_total', 'counter', 'Learning context cache misses', stats['misses']),
+        ('guitar_ai_context_cache_evictions_total', 'counter', 'Learning context cache evictions', stats['evictions']),
+    ]
+
+
+def collect_user_cache():
+    """User loader cache counters"""
+    stats = user_cache.stats()
+    return [
+        ('guitar_ai_user_cache_entries', 'gauge', 'Entries in the user loader cache', stats['entries']),
+        ('guitar_ai_user_cache_hits_total', 'counter', 'User loader cache hits', stats['hits']),
+        ('guitar_ai_user_cache_misses_total', 'counter', 'User loader cache misses', stats['misses']),
+    ]
+
+
+def collect_upstream():
+    """Rate limiter, retry and circuit breaker counters of the LLM client"""
+    stats = llm_client.stats()
+    return [
+        ('guitar_ai_upstream_retries_total', 'counter', 'Retried upstream calls', stats['retries']),
+        ('guitar_ai_upstream_rejected_total', 'counter', 'Calls rejected by the open circuit breaker',
+         stats['rejected_calls']),
+        ('guitar_ai_upstream_throttled_total', 'counter', 'Calls delayed by the rate limiter',
+         stats['throttled_calls']),
+        ('guitar_ai_upstream_throttled_seconds_total', 'counter', 'Time spent waiting on the rate limiter',
+         stats['throttled_seconds']),
+        ('guitar_ai_upstream_circuit_state', 'gauge', 'Circuit breaker state: 0 closed, 1 half open, 2 open',
+         CIRCUIT_STATES.get(stats['circuit_state'], -1)),
+    ]
+
+
+metrics.register_collector(collect_learning_context_cache)
+metrics.register_collector(collect_user_cache)
+metrics.register_collector(collect_upstream)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def export_metrics():
+    """Export metrics in the Prometheus text format"""
+    if Config.METRICS_TOKEN:
+        expected = f'Bearer {Config.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -8,6 +8,32 @@ let currentDeleteDescriptionId = null;
 let currentGeneratedDescription = null;
 let currentCorrectionSource = null;
 
+// Payloads of conditional GETs by URL, reused when the server answers 304
+const etagCache = new Map();
+
+// Fetch JSON with If-None-Match, reusing the cached payload on 304 Not Modified
+async function fetchWithEtag(url) {
+    const cached = etagCache.get(url);
+    // no-store keeps the browser cache from answering for us, so 304s arrive here
+    const response = await fetch(url, {
+        headers: cached ? {'If-None-Match': cached.etag} : {},
+        cache: 'no-store'
+    });
+    if (response.status === 304 && cached) {
+        return cached.data;
+    }
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag && data.success !== false) {
+        etagCache.set(url, {etag, data});
+    }
+    return data;
+}
+
 // Initialize when DOM is loaded
 document.addEventListener('DOMContentLoaded', function() {
     // Initialize Bootstrap tabs
@@ -114,18 +140,14 @@ function addExample() {
     });
 }
 
-// Load examples function
-function loadExamples() {
-    fetch('/api/examples/list')
-    .then(response => {
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        return response.json();
-    })
+// Load examples function, pass a cursor to append the next page
+function loadExamples(cursor) {
+    const params = new URLSearchParams({fields: 'id,title,type,category,tags,preview,created_at'});
+    if (cursor) params.set('cursor', cursor);
+    fetchWithEtag(`/api/examples/list?${params}`)
     .then(data => {
         if (data.success) {
-            displayExamples(data.examples);
+            displayExamples(data.examples, data.next_cursor, Boolean(cursor));
         } else {
             console.error('Błąd podczas ładowania przykładów:', data.error);
             showExampleMessage('Błąd podczas ładowania przykładów: ' + data.error, 'danger');
@@ -138,11 +160,11 @@ function loadExamples() {
 }
 
 // Display examples function
-function displayExamples(examples) {
+function displayExamples(examples, nextCursor, append) {
     const container = document.getElementById('examplesList');
     if (!container) return;
     
-    if (!examples || examples.length === 0) {
+    if (!append && (!examples || examples.length === 0)) {
         container.innerHTML = '<p class="text-muted">Brak przykładów...</p>';
         return;
     }
@@ -162,12 +184,32 @@ function displayExamples(examples) {
                     <strong>Tagi:</strong> ${example.tags || 'Brak'}
                 </div>
                 <div class="mt-1">
-                    <strong>Treść:</strong> ${example.content.substring(0, 200)}...
+                    <strong>Treść:</strong> ${example.preview}...
                 </div>
             </div>
         `;
     });
-    container.innerHTML = html;
+    renderListPage(container, html, nextCursor, append, 'loadExamples');
+}
+
+// Render a page of a paginated list with a "load more" button for the next one
+function renderListPage(container, html, nextCursor, append, loadFunction) {
+    const loadMore = container.querySelector('.load-more');
+    if (loadMore) loadMore.remove();
+    
+    if (append) {
+        container.insertAdjacentHTML('beforeend', html);
+    } else {
+        container.innerHTML = html;
+    }
+    
+    if (nextCursor) {
+        container.insertAdjacentHTML('beforeend', `
+            <button class="btn btn-outline-secondary btn-sm w-100 load-more" onclick="${loadFunction}('${nextCursor}')">
+                Załaduj więcej
+            </button>
+        `);
+    }
 }
 
 // Show example message function
@@ -202,8 +244,9 @@ function resetExampleForm() {
     }
 }
 
-// Generate description function
-function generateDescription(type) {
+// Generate description function (streams tokens as they arrive);
+// regenerate skips the response cache to get a new variant
+async function generateDescription(type, regenerate = false) {
     const inputElement = document.getElementById(type + 'Input');
     const outputElement = document.getElementById(type + 'Output');
     const actionsElement = document.getElementById(type + 'Actions');
@@ -219,42 +262,85 @@ function generateDescription(type) {
     }
     
     showLoading(true);
+    actionsElement.style.display = 'none';
+    let receivedFirstToken = false;
     
-    fetch('/api/descriptions/generate', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-            type: type,
-            input_text: inputElement.value
-        })
-    })
-    .then(response => {
+    try {
+        const response = await fetch('/api/descriptions/generate-stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                type: type,
+                input_text: inputElement.value,
+                no_cache: regenerate
+            })
+        });
+        
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
-        return response.json();
-    })
-    .then(data => {
+        
+        await readEventStream(response, (event, data) => {
+            if (event === 'token') {
+                if (!receivedFirstToken) {
+                    // Hide the spinner as soon as text starts arriving
+                    receivedFirstToken = true;
+                    showLoading(false);
+                    outputElement.textContent = '';
+                }
+                outputElement.textContent += data.content;
+            } else if (event === 'done') {
+                console.log('Full description received:', data.description);
+                console.log('Time to first token:', data.time_to_first_token);
+                outputElement.textContent = data.description;
+                actionsElement.style.display = 'block';
+                currentType = type;
+                currentOriginalText = data.description;
+                currentDescriptionId = data.description_id;
+            } else if (event === 'error') {
+                throw new Error(data.error);
+            }
+        });
         showLoading(false);
-        if (data.success) {
-            console.log('Full description received:', data.description);
-            console.log('Description length:', data.description.length);
-            outputElement.innerHTML = data.description.replace(/\n/g, '<br>');
-            actionsElement.style.display = 'block';
-            currentType = type;
-            currentOriginalText = data.description;
-            currentDescriptionId = data.description_id;
-        } else {
-            outputElement.innerHTML = '<p class="text-danger">Błąd: ' + data.error + '</p>';
-        }
-    })
-    .catch(error => {
+    } catch (error) {
         showLoading(false);
         console.error('Error generating description:', error);
         outputElement.innerHTML = '<p class="text-danger">Błąd: ' + error.message + '</p>';
-    });
+    }
+}
+
+// Read a text/event-stream response and call onEvent(event, data) for each event
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder('utf-8');
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) {
+                    event = line.slice(7);
+                } else if (line.startsWith('data: ')) {
+                    data += line.slice(6);
+                }
+            });
+            onEvent(event, data ? JSON.parse(data) : null);
+        }
+    }
 }
 
 // Save description function
@@ -404,7 +490,7 @@ async function viewDescription(descriptionId) {
             document.getElementById('viewTitle').textContent = desc.title;
             document.getElementById('viewContent').textContent = desc.content;
             document.getElementById('viewCategory').textContent = desc.category || 'Brak kategorii';
-            document.getElementById('viewTags').textContent = desc.tags || 'Brak tagów';
+            document.getElementById('viewTags').textContent = desc.tags && desc.tags.length ? desc.tags.join(', ') : 'Brak tagów';
             document.getElementById('viewStatus').textContent = desc.is_public ? 'Aktywny (publiczny)' : 'Nieaktywny (prywatny)';
             document.getElementById('viewCreatedAt').textContent = new Date(desc.created_at).toLocaleString('pl-PL');
             
@@ -923,13 +1009,7 @@ async function submitCorrection() {
 
 // Load learning data function
 function loadLearningData() {
-    fetch('/api/learning-data/dashboard')
-    .then(response => {
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        return response.json();
-    })
+    fetchWithEtag('/api/learning-data/dashboard')
     .then(data => {
         displayCorrections(data.corrections);
         displaySavedDescriptions(data.saved_descriptions);
@@ -1084,18 +1164,14 @@ function showMessage(message, type = 'info') {
     }, 5000);
 }
 
-// Load prompts function
-function loadPrompts() {
-    fetch('/api/prompts/list')
-    .then(response => {
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        return response.json();
-    })
+// Load prompts function, pass a cursor to append the next page
+function loadPrompts(cursor) {
+    const params = new URLSearchParams();
+    if (cursor) params.set('cursor', cursor);
+    fetchWithEtag(`/api/prompts/list?${params}`)
     .then(data => {
         if (data.success) {
-            displayPrompts(data.prompts);
+            displayPrompts(data.prompts, data.next_cursor, Boolean(cursor));
         } else {
             console.error('Błąd podczas ładowania promptów:', data.error);
             showPromptMessage('Błąd podczas ładowania promptów: ' + data.error, 'danger');
@@ -1108,11 +1184,11 @@ function loadPrompts() {
 }
 
 // Display prompts function
-function displayPrompts(prompts) {
+function displayPrompts(prompts, nextCursor, append) {
     const container = document.getElementById('promptsList');
     if (!container) return;
     
-    if (!prompts || prompts.length === 0) {
+    if (!append && (!prompts || prompts.length === 0)) {
         container.innerHTML = '<p class="text-muted">Brak promptów...</p>';
         return;
     }
@@ -1154,7 +1230,7 @@ function displayPrompts(prompts) {
             </div>
         `;
     });
-    container.innerHTML = html;
+    renderListPage(container, html, nextCursor, append, 'loadPrompts');
 }
 
 // Add prompt function
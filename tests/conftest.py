@@ -0,0 +1,53 @@
+"""
+Shared fixtures: one app on a temporary SQLite database for the whole run,
+and test clients logged in as a fresh user so tests do not see each other's rows
+"""
+
+import itertools
+import os
+import tempfile
+
+import pytest
+
+# Config reads DATABASE_URL at import time, and test modules may import it
+# while they are collected, so it is set before any of them
+DATABASE_FILE = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+os.environ['DATABASE_URL'] = f'sqlite:///{DATABASE_FILE}'
+
+PASSWORD = 'test-password'
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app():
+    """App with its schema built and migrated in the temporary database"""
+    from app import create_app
+
+    app = create_app()
+    app.config['TESTING'] = True
+    yield app
+    os.remove(DATABASE_FILE)
+
+
+@pytest.fixture
+def user(app):
+    """A new user without any rows of their own"""
+    from models.database import db
+    from models.user import User
+
+    number = next(_user_numbers)
+    with app.app_context():
+        user = User(username=f'test{number}', email=f'test{number}@example.com')
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+        return user.id, user.username
+
+
+@pytest.fixture
+def client(app, user):
+    """Test client logged in as user"""
+    client = app.test_client()
+    client.post('/login', data={'username': user[1], 'password': PASSWORD})
+    return client
@@ -0,0 +1,68 @@
+"""
+Conditional list responses (@conditional): ETags built from the user's
+resource versions, 304 answers and weak ETags on compressed bodies
+"""
+
+import gzip
+import json
+
+EXAMPLES_URL = '/api/examples/list'
+
+
+def add_example(client, content='Gitara elektryczna z klonowym gryfem.'):
+    response = client.post('/api/examples/add', json={
+        'type': 'guitar', 'title': 'Fender Stratocaster', 'category': 'strat', 'content': content
+    })
+    assert response.get_json()['success']
+
+
+def test_matching_if_none_match_gets_304(client):
+    add_example(client)
+    first = client.get(EXAMPLES_URL)
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    second = client.get(EXAMPLES_URL, headers={'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 304
+    assert second.get_data() == b''
+    assert second.headers['ETag'] == first.headers['ETag']
+
+
+def test_write_to_the_resource_changes_the_etag(client):
+    etag = client.get(EXAMPLES_URL).headers['ETag']
+
+    add_example(client)
+    response = client.get(EXAMPLES_URL, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert len(response.get_json()['examples']) == 1
+
+
+def test_write_to_another_resource_keeps_the_etag(client):
+    etag = client.get(EXAMPLES_URL).headers['ETag']
+
+    client.post('/api/prompts/add', json={'prompt_type': 'guitar', 'title': 'Prompt', 'content': 'Opisz gitarę.'})
+
+    assert client.get(EXAMPLES_URL, headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_etag_depends_on_the_query_string(client):
+    etag = client.get(EXAMPLES_URL).headers['ETag']
+
+    assert client.get(f'{EXAMPLES_URL}?limit=1', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_compressed_response_has_a_weak_etag_that_matches(client):
+    for _ in range(5):
+        add_example(client, 'Gitara elektryczna z klonowym gryfem. ' * 20)
+    headers = {'Accept-Encoding': 'gzip'}
+
+    response = client.get(EXAMPLES_URL, headers=headers)
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'].startswith('W/')
+    assert json.loads(gzip.decompress(response.get_data()))['success']
+    revalidated = client.get(EXAMPLES_URL, headers=dict(headers, **{'If-None-Match': response.headers['ETag']}))
+    assert revalidated.status_code == 304
@@ -0,0 +1,115 @@
+"""
+Keyset pagination of the list endpoints: page walks over tied created_at
+values and rejection of malformed cursor, limit and fields parameters
+"""
+
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from utils.pagination import InvalidPageRequest, decode_cursor, encode_cursor
+
+TIED = datetime(2024, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def rows(app, user):
+    """Descriptions and prompts of the user, most of them created at the same moment"""
+    from models.database import db
+    from models.descriptions import AIPrompt, SavedDescription
+
+    user_id = user[0]
+    with app.app_context():
+        for number in range(9):
+            created_at = TIED if number < 6 else datetime(2024, 2, number)
+            description = SavedDescription(
+                title=f'Opis {number}', content='Gitara elektryczna.', description_type='guitar',
+                category='strat', user_id=user_id, is_public=number % 3 != 0, created_at=created_at
+            )
+            description.set_tags(['vintage', f'tag{number}'])
+            db.session.add(description)
+            db.session.add(AIPrompt(
+                user_id=user_id, prompt_type='guitar', title=f'Prompt {number}',
+                content='Opisz gitarę.', created_at=created_at
+            ))
+        db.session.commit()
+        return {
+            'descriptions': [row.id for row in SavedDescription.query.filter_by(user_id=user_id)],
+            'examples': [row.id for row in SavedDescription.query.filter_by(user_id=user_id, is_public=True)],
+            'prompts': [row.id for row in AIPrompt.query.filter_by(user_id=user_id)],
+        }
+
+
+def walk(client, url, key, **params):
+    """Follow next_cursor to the last page, returning the items and the page count"""
+    items, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, **({'cursor': cursor} if cursor else {}))
+        response = client.get(url, query_string=query)
+        data = response.get_json()
+        assert response.status_code == 200 and data['success'], data
+        items.extend(data[key])
+        pages += 1
+        cursor = data['next_cursor']
+        if not cursor:
+            return items, pages
+
+
+@pytest.mark.parametrize('url, key', [
+    ('/api/saved-descriptions/list', 'descriptions'),
+    ('/api/examples/list', 'examples'),
+    ('/api/prompts/list', 'prompts'),
+])
+def test_page_walk_has_no_duplicates_or_gaps(client, rows, url, key):
+    items, pages = walk(client, url, key, limit=2, fields='id,created_at')
+
+    ids = [item['id'] for item in items]
+    assert sorted(ids) == sorted(rows[key])
+    assert len(ids) == len(set(ids))
+    assert pages == (len(rows[key]) + 1) // 2
+    # Newest first, ties broken by descending id
+    order = [(item['created_at'], item['id']) for item in items]
+    assert order == sorted(order, reverse=True)
+
+
+def test_page_size_matching_the_row_count_ends_without_an_empty_page(client, rows):
+    items, pages = walk(client, '/api/prompts/list', 'prompts', limit=len(rows['prompts']))
+
+    assert len(items) == len(rows['prompts'])
+    assert pages == 1
+
+
+def test_cursor_round_trip():
+    class Row:
+        id = 42
+        created_at = TIED
+
+    assert decode_cursor(encode_cursor(Row)) == (TIED, 42)
+
+
+def encoded(payload):
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+@pytest.mark.parametrize('cursor', [
+    'zzz',
+    'łódź',
+    encoded('not json'),
+    encoded(json.dumps(['yesterday', 1])),
+    encoded(json.dumps([TIED.isoformat(), 'one'])),
+    encoded(json.dumps([TIED.isoformat()])),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidPageRequest):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('query', ['cursor=zzz', 'limit=0', 'limit=abc', 'fields=id,nope'])
+@pytest.mark.parametrize('url', ['/api/saved-descriptions/list', '/api/examples/list', '/api/prompts/list'])
+def test_invalid_page_request_returns_400(client, url, query):
+    response = client.get(f'{url}?{query}')
+
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
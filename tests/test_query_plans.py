@@ -0,0 +1,76 @@
+"""
+Query plan checks: the hot queries of the main endpoints must use the
+composite indexes added by the schema migrations (SQLite EXPLAIN QUERY PLAN)
+"""
+
+import pytest
+
+# Hot query (see manage_db.hot_queries) -> index its plan has to use
+EXPECTED_INDEXES = {
+    'saved descriptions list': 'ix_saved_descriptions_user_created',
+    'saved descriptions next page': 'ix_saved_descriptions_user_created',
+    'examples list': 'ix_saved_descriptions_user_public_created',
+    'prompts list': 'ix_ai_prompts_user_created',
+    'active prompt': 'ix_ai_prompts_user_type_active',
+    'dashboard corrections': 'ix_model_corrections_user_created',
+    'dashboard generated': 'ix_returned_descriptions_user_created',
+    'corrections list': 'ix_model_corrections_user_created',
+    'correction pool probe': 'ix_model_corrections_pending_type',
+    'active adjustments': 'ix_model_adjustments_active_priority',
+    'public examples by type': 'ix_saved_descriptions_public_type',
+    'tags by name': 'ix_tags_normalized_name',
+}
+
+
+@pytest.fixture(autouse=True)
+def app_context(app):
+    with app.app_context():
+        yield
+
+
+def query_plans():
+    import manage_db
+    return {name: manage_db.explain(query) for name, query in manage_db.hot_queries().items()}
+
+
+def assert_plans_use_indexes(plans):
+    import manage_db
+    for name, plan in plans.items():
+        assert not manage_db.unindexed_steps(plan), f'{name}: {plan}'
+        if name in EXPECTED_INDEXES:
+            assert any(EXPECTED_INDEXES[name] in line for line in plan), f'{name}: {plan}'
+
+
+def test_hot_queries_use_indexes(app):
+    plans = query_plans()
+    assert set(EXPECTED_INDEXES) <= set(plans)
+    assert_plans_use_indexes(plans)
+
+
+def test_migrations_restore_missing_indexes(app):
+    from models.database import db
+    from models.migrations import MIGRATIONS, migrate, schema_versions
+
+    # A database from before the migrations: no indexes, no recorded versions
+    for index_name in set(EXPECTED_INDEXES.values()):
+        db.session.execute(db.text(f'DROP INDEX {index_name}'))
+    db.session.execute(schema_versions.delete())
+    db.session.commit()
+
+    applied = migrate()
+
+    assert [version for version, _ in applied] == [version for version, _, _ in MIGRATIONS]
+    assert_plans_use_indexes(query_plans())
+
+
+def test_recording_a_version_twice_is_ignored(app):
+    from models.database import db
+    from models.migrations import MIGRATIONS, applied_versions, record_applied
+
+    # What a second worker does when it finishes a migration after the first
+    version, name, _ = MIGRATIONS[0]
+    record_applied(version, name)
+    record_applied(version, name)
+    db.session.commit()
+
+    assert version in applied_versions()
@@ -0,0 +1,89 @@
+"""
+Example retrieval: Polish text analysis, the keyword and BM25 rankers, and
+incremental updates of the in-process example index
+"""
+
+from collections import namedtuple
+from types import SimpleNamespace
+
+import pytest
+
+from utils.example_index import ExampleIndex
+from utils.polish_text import analyze, fold_diacritics
+from utils.ranking import BM25Ranker, KeywordRanker
+
+Row = namedtuple('Row', ['id', 'description_type', 'category', 'title', 'tags', 'content'])
+
+ROWS = [
+    Row(1, 'guitar', 'strat', 'Fender Stratocaster', ['Fender', 'vintage'],
+        'Gitara elektryczna z klonowym gryfem i trzema przetwornikami single coil.'),
+    Row(2, 'guitar', 'les paul', 'Gibson Les Paul', ['Gibson'],
+        'Mahoniowy korpus i ciepłe brzmienie humbuckerów.'),
+    Row(3, 'guitar', 'klasyczna', 'Gitara klasyczna Łódź', ['nylon'],
+        'Struny nylonowe i gryf z cedru, idealna do nauki.'),
+    Row(4, 'company', 'producent', 'Fender', ['USA'],
+        'Amerykański producent gitar elektrycznych.'),
+]
+
+
+@pytest.fixture
+def index():
+    index = ExampleIndex()
+    index.build(ROWS)
+    return index
+
+
+def test_fold_diacritics_replaces_polish_and_other_letters():
+    assert fold_diacritics('Zażółć gęślą jaźń') == 'Zazolc gesla jazn'
+    assert fold_diacritics('ŁÓDŹ') == 'LODZ'
+    assert fold_diacritics('Café Über') == 'Cafe Uber'
+
+
+def test_analyze_matches_inflected_forms_and_drops_stopwords():
+    assert analyze('Gitarą elektryczną z klonowym gryfem') == analyze('gitara elektryczna, klonowy gryf')
+    assert analyze('gitara i gryf do nauki') == ['gitar', 'gryf', 'nauk']
+
+
+def test_keyword_ranker_matches_phrases_inside_words(index):
+    # "strat" is found inside "stratocaster", as in the original scorer
+    assert index.search(KeywordRanker(), 'guitar', 'Fender Stratocaster sunburst')[0] == 1
+
+
+def test_keyword_ranker_folds_diacritics(index):
+    assert index.search(KeywordRanker(), 'guitar', 'gitara klasyczna lodz')[0] == 3
+
+
+def test_bm25_ranks_the_closest_example_first(index):
+    results = index.search(BM25Ranker(), 'guitar', 'elektryczny klonowy gryf')
+    # Example 3 shares only "gryf", example 2 nothing at all
+    assert results == [1, 3]
+
+
+def test_rankers_only_score_the_requested_type(index):
+    for ranker in (KeywordRanker(), BM25Ranker()):
+        assert 4 not in index.search(ranker, 'guitar', 'Fender producent gitar elektrycznych')
+        assert index.search(ranker, 'company', 'Fender producent gitar elektrycznych') == [4]
+
+
+def test_add_and_remove_change_results_without_rebuild(index, monkeypatch):
+    def rebuild(*args):
+        raise AssertionError('the index was rebuilt')
+
+    monkeypatch.setattr(index, '_index_rows', rebuild)
+    monkeypatch.setattr(index, '_read_watermark', rebuild)
+    description = SimpleNamespace(
+        id=5, description_type='guitar', category='telecaster', title='Fender Telecaster',
+        tag_names=['Fender'], content='Jesionowy korpus i klonowy gryf.', is_public=True
+    )
+
+    index.add(description)
+    assert index.search(BM25Ranker(), 'guitar', 'telecaster jesionowy')[0] == 5
+
+    # Making an example private drops it, like deleting it does
+    description.is_public = False
+    index.add(description)
+    assert 5 not in index.search(BM25Ranker(), 'guitar', 'telecaster jesionowy')
+
+    index.remove(1)
+    assert 1 not in index.search(KeywordRanker(), 'guitar', 'Fender Stratocaster')
+    assert index.doc_count('guitar') == 2
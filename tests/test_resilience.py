@@ -0,0 +1,159 @@
+"""
+Upstream resilience: the token bucket rate limiter, the circuit breaker and
+the LLM client's retries, the latter against the fake OpenAI server
+"""
+
+import openai
+import pytest
+
+from fake_openai_server import FakeOpenAIOptions, start_server
+from utils.llm_client import LLMClient
+from utils.resilience import CircuitBreaker, CircuitOpenError, RateLimiter, RateLimitExceeded, TokenBucket
+
+MESSAGES = [{'role': 'user', 'content': 'Fender Stratocaster'}]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fake_server():
+    server = start_server(FakeOpenAIOptions(latency_ms=0, token_delay_ms=0, completion_tokens=(5, 10),
+                                            retry_after=0.05, seed=1))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(fake_server):
+    client = LLMClient(api_key='test', base_url=fake_server.base_url, max_retries=2)
+    yield client
+    client.close()
+
+
+def test_token_bucket_paces_callers_at_the_rate(clock):
+    bucket = TokenBucket(60, capacity=2, clock=clock)
+
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == 0
+    # One token per second: the third caller waits a second, the fourth two
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+
+    clock.advance(2)
+    bucket.refund(1)
+    assert bucket.available == pytest.approx(1.0)
+
+
+def test_rate_limiter_sleeps_then_rejects_waits_over_the_limit():
+    waits = []
+    limiter = RateLimiter(60, 0, max_wait=1.5, sleep=waits.append)
+    limiter.requests = TokenBucket(60, capacity=1)
+
+    limiter.acquire(10)
+    limiter.acquire(10)
+    assert waits == [pytest.approx(1.0, abs=0.1)]
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(10)
+    # The rejected call gave its reservation back
+    assert limiter.requests.available == pytest.approx(-1.0, abs=0.1)
+    assert limiter.throttled_calls == 1
+
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # After the timeout a single trial call goes through
+    clock.advance(10)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+    assert breaker.rejected_calls == 2
+
+
+def test_failed_trial_call_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock.advance(10)
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_client_retries_a_429_after_retry_after(client, fake_server, monkeypatch):
+    fake_server.options.rate_limit_rate = 1.0
+    pauses = []
+
+    def pause(seconds):
+        # The upstream recovers while the client backs off
+        pauses.append(seconds)
+        fake_server.options.rate_limit_rate = 0.0
+
+    monkeypatch.setattr(client.limiter, 'pause', pause)
+
+    response = client.chat(MESSAGES, max_tokens=50, temperature=0.7)
+
+    assert response.choices[0].message.content
+    assert fake_server.counters['rate_limited'] == 1
+    assert fake_server.counters['requests'] == 2
+    assert pauses[0] >= 0.05
+    assert client.retries == 1
+    # Running out of quota is not an upstream failure
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_gives_up_after_max_retries(client, fake_server, monkeypatch):
+    fake_server.options.rate_limit_rate = 1.0
+    monkeypatch.setattr(client.limiter, 'pause', lambda seconds: None)
+
+    with pytest.raises(openai.RateLimitError):
+        client.chat(MESSAGES, max_tokens=50, temperature=0.7)
+
+    assert fake_server.counters['requests'] == client.max_retries + 1
+
+
+def test_client_breaker_rejects_calls_without_reaching_the_upstream(client, fake_server):
+    fake_server.options.error_rate = 1.0
+    client.max_retries = 0
+    client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            client.chat(MESSAGES, max_tokens=50, temperature=0.7)
+    with pytest.raises(CircuitOpenError):
+        client.chat(MESSAGES, max_tokens=50, temperature=0.7)
+
+    assert fake_server.counters['requests'] == 2
+    assert client.stats()['circuit_state'] == CircuitBreaker.OPEN
@@ -1,283 +1,298 @@
-import openai
 import random
+import time
 from config.settings import Config
-from models.database import db
-from models.descriptions import SavedDescription, ModelCorrection, ModelAdjustment, AIPrompt
+from models.descriptions import SavedDescription, ModelCorrection
+from models.events import on_commit
+from utils.cache import LRUCache
+from utils.context_assembly import ContextAssembler
+from utils.example_index import example_index
+from utils.llm_client import llm_client as default_llm_client
+from utils.metrics import GENERATIONS, PROMPT_TOKENS, UPSTREAM_TOKENS, observe_phases, phase
+from utils.prompt_config import get_prompt_config
+from utils.prompt_templates import SYSTEM_PROMPT, description_types, is_description_type, render_prompt
+from utils.ranking import get_ranker
+from utils.response_cache import ResponseCache
+from utils.sampling import sample_corrections
+from utils.tokens import estimate_message_tokens, estimate_tokens
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy.orm import load_only
 import json
 
+# Live view of the registered description types; check membership with
+# is_description_type(), which also rejects unhashable values
+DESCRIPTION_TYPES = description_types.keys()
+
+CachedExample = namedtuple('CachedExample', ['id', 'category', 'tags', 'content', 'tokens'])
+
+# Context lines shared by every input of a description type
+TypeContext = namedtuple('TypeContext', ['corrections', 'adjustments'])
+
+# Learning context data keyed by (table name, description type) for
+# corrections and (table name, id) for examples
+learning_context_cache = LRUCache(Config.CONTEXT_CACHE_MAX_ENTRIES, Config.CONTEXT_CACHE_TTL)
+
+
+def _invalidate_learning_context(changes):
+    """Drop cached learning context touched by a committed transaction"""
+    for model, primary_key in changes:
+        if model is SavedDescription and primary_key is not None:
+            learning_context_cache.delete((model.__tablename__, primary_key))
+        else:
+            table_name = model.__tablename__
+            learning_context_cache.delete_where(lambda key: key[0] == table_name)
+
+
+on_commit([ModelCorrection, SavedDescription], _invalidate_learning_context)
+
+
 class AIService:
     """Service class for AI operations"""
     
-    def __init__(self):
-        openai.api_key = Config.OPENAI_API_KEY
+    def __init__(self, llm_client=None):
+        # All services in a process share one pooled client by default
+        self.llm_client = llm_client or default_llm_client
+        self.ranker = get_ranker(Config.EXAMPLE_RANKER)
+        self.response_cache = None
+        if Config.RESPONSE_CACHE_ENABLED:
+            self.response_cache = ResponseCache(Config.RESPONSE_CACHE_TTL, Config.RESPONSE_CACHE_MAX_ENTRIES)
     
-    def get_learning_context(self, description_type=None, input_text=None):
-        """Get learning context from database with smart filtering"""
-        context = ""
-        
-        # Get random corrections (up to 5)
-        corrections_query = ModelCorrection.query.filter_by(is_applied=False)
-        if description_type:
-            corrections_query = corrections_query.filter_by(description_type=description_type)
-        
-        # Get all corrections and randomly select up to 5
-        all_corrections = corrections_query.all()
-        if all_corrections:
-            # Randomly select up to 5 corrections
-            selected_corrections = random.sample(all_corrections, min(5, len(all_corrections)))
-            context += "\n\nPoprzednie poprawki do uwzględnienia:\n"
-            for correction in selected_corrections:
-                context += f"- {correction.original_text} → {correction.corrected_text}\n"
+    def get_learning_context(self, description_type=None, input_text=None, prompt_config=None, type_context=None):
+        """Get learning context from database with smart filtering, packed into the token budget
+
+        type_context can be passed to reuse the input-independent part, see
+        get_type_context(); only the examples are then picked per input.
+        """
+        if prompt_config is None:
+            prompt_config = get_prompt_config(description_type)
+        # Adjustments are explicit instructions and corrections are short, so
+        # they claim the budget before the (long) examples, which may be cut
+        assembler = ContextAssembler(prompt_config.context_budget)
+        corrections = assembler.section('corrections', "\n\nPoprzednie poprawki do uwzględnienia:\n", priority=1)
+        examples = assembler.section('examples', "\n\nPrzykładowe opisy:\n", priority=2)
+        adjustments = assembler.section('adjustments', "\n\nDostosowania modelu:\n", priority=0)
+        # Seeding by the input keeps the context (and so the response cache
+        # key) stable for repeated inputs while the underlying data is unchanged
+        rng = random.Random(input_text) if input_text else random
         
-        # Get smart-filtered saved descriptions as examples
-        saved_descriptions = self._get_smart_examples(description_type, input_text)
-        if saved_descriptions:
-            context += "\n\nPrzykładowe opisy:\n"
-            for desc in saved_descriptions:
-                # Include metadata in the context for better AI understanding
-                metadata_info = f"[{desc.category}]"
-                if desc.tags:
-                    try:
-                        tags_list = json.loads(desc.tags) if desc.tags.startswith('[') else desc.tags.split(',')
-                        if tags_list:
-                            metadata_info += f" (tagi: {', '.join(tags_list)})"
-                    except:
-                        if desc.tags.strip():
-                            metadata_info += f" (tagi: {desc.tags})"
-                
-                context += f"- {metadata_info} {desc.content}\n"
+        if type_context is None:
+            type_context = self.get_type_context(description_type, prompt_config, rng)
+        for line in type_context.corrections:
+            corrections.add(line)
         
-        # Get model adjustments
-        adjustments_query = ModelAdjustment.query.filter_by(is_active=True)
-        if description_type:
-            adjustments_query = adjustments_query.filter(
-                (ModelAdjustment.description_type == description_type) | 
-                (ModelAdjustment.description_type.is_(None))
-            )
+        # Get smart-filtered saved descriptions as examples, most relevant first
+        saved_descriptions = self._get_smart_examples(description_type, input_text, rng)
+        for desc in saved_descriptions:
+            # Include metadata in the context for better AI understanding
+            metadata_info = f"[{desc.category}]"
+            if desc.tags:
+                metadata_info += f" (tagi: {', '.join(desc.tags)})"
+            
+            examples.add(f"- {metadata_info} ", desc.content, desc.tokens, truncatable=True)
         
-        adjustments = adjustments_query.order_by(ModelAdjustment.priority.desc()).all()
+        for line in type_context.adjustments:
+            adjustments.add(line)
         
-        if adjustments:
-            context += "\n\nDostosowania modelu:\n"
-            for adj in adjustments:
-                context += f"- {adj.adjustment_type}: {adj.adjustment_value}\n"
+        return assembler.render()
+    
+    def get_type_context(self, description_type, prompt_config, rng=random):
+        """Correction and adjustment lines of a description type, which do not depend on the input"""
+        # Get random corrections (up to 5) from a pool sampled in the database
+        correction_lines = []
+        correction_pool = learning_context_cache.get_or_load(
+            (ModelCorrection.__tablename__, description_type),
+            lambda: self._load_corrections(description_type)
+        )
+        if correction_pool:
+            # Randomly select up to 5 corrections
+            sample_size = min(Config.CORRECTION_SAMPLE_SIZE, len(correction_pool))
+            selected_corrections = rng.sample(correction_pool, sample_size)
+            for original_text, corrected_text in selected_corrections:
+                correction_lines.append(f"- {original_text} → {corrected_text}")
         
-        return context
+        # Model adjustments come resolved with the prompt configuration
+        adjustment_lines = [
+            f"- {adjustment_type}: {adjustment_value}"
+            for adjustment_type, adjustment_value in prompt_config.adjustments
+        ]
+        return TypeContext(tuple(correction_lines), tuple(adjustment_lines))
     
-    def _get_smart_examples(self, description_type, input_text=None):
+    def _load_corrections(self, description_type):
+        """Sample a pool of unapplied corrections as (original, corrected) pairs"""
+        # The draw is seeded by the type and the correction id bounds, so all
+        # processes render the same prompt (and response cache key) until
+        # corrections change
+        with phase('context_queries'):
+            corrections = sample_corrections(
+                Config.CORRECTION_POOL_SIZE,
+                description_type,
+                stratify=Config.CORRECTION_SAMPLE_STRATIFY
+            )
+        return [(correction.original_text, correction.corrected_text) for correction in corrections]
+    
+    def _get_smart_examples(self, description_type, input_text=None, rng=random):
         """Get smart-filtered examples based on input text and metadata"""
-        saved_query = SavedDescription.query.filter_by(is_public=True)
-        if description_type:
-            saved_query = saved_query.filter_by(description_type=description_type)
-        
-        all_descriptions = saved_query.all()
-        if not all_descriptions:
-            return []
+        example_ids = []
         
         # If we have input text, try to find relevant examples
         if input_text:
-            relevant_examples = self._find_relevant_examples(all_descriptions, input_text)
-            if relevant_examples:
-                return relevant_examples[:3]  # Return up to 3 most relevant
+            example_ids = self._find_relevant_examples(description_type, input_text)
         
         # Fallback to random selection
-        return random.sample(all_descriptions, min(3, len(all_descriptions)))
-    
-    def _find_relevant_examples(self, descriptions, input_text):
-        """Find most relevant examples based on input text and metadata"""
-        scored_examples = []
-        
-        # Convert input text to lowercase for comparison
-        input_lower = input_text.lower()
-        
-        for desc in descriptions:
-            score = 0
-            
-            # Score based on category match
-            if desc.category and desc.category.lower() in input_lower:
-                score += 3
-            
-            # Score based on title match
-            if desc.title and desc.title.lower() in input_lower:
-                score += 2
-            
-            # Score based on tag matches
-            if desc.tags:
-                try:
-                    tags_list = json.loads(desc.tags) if desc.tags.startswith('[') else desc.tags.split(',')
-                    for tag in tags_list:
-                        tag_clean = tag.strip().lower()
-                        if tag_clean and tag_clean in input_lower:
-                            score += 1
-                except:
-                    # Handle simple comma-separated tags
-                    tags_list = desc.tags.split(',')
-                    for tag in tags_list:
-                        tag_clean = tag.strip().lower()
-                        if tag_clean and tag_clean in input_lower:
-                            score += 1
-            
-            # Score based on content keywords
-            content_lower = desc.content.lower()
-            input_words = input_lower.split()
-            for word in input_words:
-                if len(word) > 3 and word in content_lower:  # Only consider words longer than 3 chars
-                    score += 0.5
-            
-            if score > 0:
-                scored_examples.append((desc, score))
+        if not example_ids:
+            with phase('ranking'):
+                example_ids = example_index.random_ids(description_type, 3, rng)
         
-        # Sort by score (highest first) and return descriptions
-        scored_examples.sort(key=lambda x: x[1], reverse=True)
-        return [desc for desc, score in scored_examples]
-        
-        # Get model adjustments
-        adjustments_query = ModelAdjustment.query.filter_by(is_active=True)
-        if description_type:
-            adjustments_query = adjustments_query.filter(
-                (ModelAdjustment.description_type == description_type) | 
-                (ModelAdjustment.description_type.is_(None))
-            )
+        if not example_ids:
+            return []
         
-        adjustments = adjustments_query.order_by(ModelAdjustment.priority.desc()).all()
+        examples = {}
+        missing_ids = []
+        for example_id in example_ids:
+            cached = learning_context_cache.get((SavedDescription.__tablename__, example_id))
+            if cached is None:
+                missing_ids.append(example_id)
+            else:
+                examples[example_id] = cached
         
-        if adjustments:
-            context += "\n\nDostosowania modelu:\n"
-            for adj in adjustments:
-                context += f"- {adj.adjustment_type}: {adj.adjustment_value}\n"
+        if missing_ids:
+            with phase('context_queries'):
+                rows = SavedDescription.query.options(
+                    load_only(SavedDescription.id, SavedDescription.category, SavedDescription.content)
+                ).filter(SavedDescription.id.in_(missing_ids)).all()
+                for row in rows:
+                    example = CachedExample(row.id, row.category, row.tag_names, row.content, estimate_tokens(row.content))
+                    learning_context_cache.set((SavedDescription.__tablename__, row.id), example)
+                    examples[row.id] = example
         
-        return context
+        return [examples[example_id] for example_id in example_ids if example_id in examples]
+    
+    def _find_relevant_examples(self, description_type, input_text, limit=3):
+        """Find ids of the most relevant examples using the configured ranker"""
+        with phase('ranking'):
+            return example_index.search(self.ranker, description_type, input_text, limit)
+    
+    def get_prompt_config(self, description_type, user_id=None):
+        """Get the active prompt, adjustments and model parameters, cached per user and type"""
+        return get_prompt_config(description_type, user_id)
     
     def get_custom_prompt(self, description_type, user_id=None):
         """Get custom prompt for a specific description type"""
         try:
-            # Try to get user-specific prompt first
-            if user_id:
-                prompt = AIPrompt.query.filter_by(
-                    user_id=user_id,
-                    prompt_type=description_type,
-                    is_active=True
-                ).first()
-                if prompt:
-                    return prompt.content
-            
-            # Fallback to default prompts
-            return None
+            return self.get_prompt_config(description_type, user_id).prompt
         except Exception:
             return None
     
-    def generate_guitar_description(self, input_text, user_id=None):
+    def generate_description(self, description_type, input_text, user_id=None, use_cache=True):
+        """Generate a description of a registered type using AI in Polish"""
+        prompt_config = self.get_prompt_config(description_type, user_id)
+        prompt = self.build_prompt(description_type, input_text, user_id, prompt_config)
+        result = self._call_openai(prompt, prompt_config, use_cache)
+        return self._record_generation(description_type, result)
+    
+    def generate_guitar_description(self, input_text, user_id=None, use_cache=True):
         """Generate guitar description using AI in Polish"""
-        context = self.get_learning_context('guitar', input_text)
-        
-        # Try to get custom prompt first
-        custom_prompt = self.get_custom_prompt('guitar', user_id)
-        
-        if custom_prompt:
-            # Use custom prompt with context
-            prompt = f"""{custom_prompt}
-
-{context}
-
-Informacje wejściowe: {input_text}"""
-        else:
-            # Use default prompt
-            # Add Polish examples if no saved descriptions and examples exist
-            if not context:
-                try:
-                    # Try to get Polish examples from config
-                    if hasattr(Config, 'POLISH_GUITAR_EXAMPLES') and Config.POLISH_GUITAR_EXAMPLES:
-                        context = "\n\nPrzykładowe opisy gitar:\n"
-                        for example in Config.POLISH_GUITAR_EXAMPLES:
-                            context += f"- {example}\n"
-                    else:
-                        # Fallback examples if config examples don't exist
-                        context = "\n\nPrzykładowe opisy gitar:\n"
-                        fallback_examples = [
-                            "Fender Stratocaster to ikoniczna gitara elektryczna z charakterystycznym dźwiękiem idealnym do bluesa i rocka.",
-                            "Gibson Les Paul to legenda wśród gitar elektrycznych znana z ciepłego, pełnego brzmienia."
-                        ]
-                        for example in fallback_examples:
-                            context += f"- {example}\n"
-                except Exception:
-                    # If all else fails, use minimal context
-                    context = "\n\nUżywaj polskiej terminologii muzycznej i technicznej."
-            
-            prompt = f"""Jesteś ekspertem w dziedzinie gitar z głęboką znajomością instrumentów muzycznych. Stwórz szczegółowy, angażujący opis gitary w języku polskim na podstawie poniższych informacji.
-
-{context}
-
-Informacje wejściowe: {input_text}
-
-Uwaga: Przykłady zawierają metadane w nawiasach kwadratowych [kategoria] i (tagi: tag1, tag2). Użyj tych informacji, aby lepiej zrozumieć kontekst i styl opisu.
-
-Proszę o kompleksowy opis w języku polskim, który zawiera:
-- Specyfikacje techniczne
-- Charakterystykę dźwięku
-- Jakość wykonania i materiały
-- Docelową grupę odbiorców
-- Kontekst historyczny (jeśli istotny)
-
-Opis powinien być informacyjny, ale dostępny zarówno dla początkujących, jak i doświadczonych graczy. Używaj polskiej terminologii muzycznej i technicznej. Dostosuj styl do kategorii i tagów z przykładów, jeśli są dostępne."""
-        
-        return self._call_openai(prompt)
+        return self.generate_description('guitar', input_text, user_id, use_cache)
     
-    def generate_company_description(self, input_text, user_id=None):
+    def generate_company_description(self, input_text, user_id=None, use_cache=True):
         """Generate company description using AI in Polish"""
-        context = self.get_learning_context('company', input_text)
-        
-        # Try to get custom prompt first
-        custom_prompt = self.get_custom_prompt('company', user_id)
-        
-        if custom_prompt:
-            # Use custom prompt with context
-            prompt = f"""{custom_prompt}
-
-{context}
+        return self.generate_description('company', input_text, user_id, use_cache)
+    
+    def build_prompt(self, description_type, input_text, user_id=None, prompt_config=None, type_context=None):
+        """Build the full prompt for a description type
 
-Informacje wejściowe: {input_text}"""
+        prompt_config and type_context can be passed when the caller already
+        resolved them.
+        """
+        if prompt_config is None:
+            prompt_config = self.get_prompt_config(description_type, user_id)
+        with phase('prompt_build'):
+            context = self.get_learning_context(description_type, input_text, prompt_config, type_context)
+            return render_prompt(description_type, prompt_config, context, input_text)
+    
+    def _record_generation(self, description_type, result):
+        """Count a finished generation and its token usage in the metrics"""
+        if not result.get('success'):
+            outcome = 'error'
+        elif result.get('cached'):
+            outcome = 'cached'
         else:
-            # Use default prompt
-            # Add Polish examples if no saved descriptions and examples exist
-            if not context:
+            outcome = 'generated'
+        GENERATIONS.inc(type=description_type, outcome=outcome)
+        if outcome == 'generated':
+            if result.get('prompt_tokens_estimate'):
+                PROMPT_TOKENS.observe(result['prompt_tokens_estimate'], type=description_type)
+            if result.get('tokens_used'):
+                UPSTREAM_TOKENS.inc(result['tokens_used'])
+        return result
+    
+    def generate_batch(self, items, user_id=None, use_cache=True, max_workers=4):
+        """Generate descriptions for many inputs, yielding (index, result) as they complete
+
+        Prompt assembly and cache lookups need the database, so they run in the
+        calling thread; only the upstream calls run in a bounded thread pool.
+        Prompt configurations and the input-independent learning context are
+        resolved once per description type. Closing the generator (e.g. when
+        the client disconnects) cancels the upstream calls not started yet.
+        """
+        prompt_configs = {}
+        type_contexts = {}
+        cache_hits = []
+        cache_writes = []
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {}
+            for index, item in enumerate(items):
+                description_type = item.get('type') if isinstance(item, dict) else None
+                input_text = item.get('input_text') if isinstance(item, dict) else None
+                if not is_description_type(description_type) or not input_text:
+                    yield index, {
+                        'success': False,
+                        'error': f'Each item needs input_text and type ({", ".join(DESCRIPTION_TYPES)})'
+                    }
+                    continue
+                
                 try:
-                    # Try to get Polish examples from config
-                    if hasattr(Config, 'POLISH_COMPANY_EXAMPLES') and Config.POLISH_COMPANY_EXAMPLES:
-                        context = "\n\nPrzykładowe opisy firm:\n"
-                        for example in Config.POLISH_COMPANY_EXAMPLES:
-                            context += f"- {example}\n"
-                    else:
-                        # Fallback examples if config examples don't exist
-                        context = "\n\nPrzykładowe opisy firm:\n"
-                        fallback_examples = [
-                            "Fender to amerykański producent gitar elektrycznych znany z innowacyjnych rozwiązań.",
-                            "Gibson to legenda wśród producentów gitar premium z długą tradycją."
-                        ]
-                        for example in fallback_examples:
-                            context += f"- {example}\n"
-                except Exception:
-                    # If all else fails, use minimal context
-                    context = "\n\nUżywaj polskiej terminologii biznesowej i muzycznej."
+                    if description_type not in prompt_configs:
+                        prompt_configs[description_type] = self.get_prompt_config(description_type, user_id)
+                        type_contexts[description_type] = self.get_type_context(description_type, prompt_configs[description_type])
+                    prompt_config = prompt_configs[description_type]
+                    prompt = self.build_prompt(description_type, input_text, user_id, prompt_config, type_contexts[description_type])
+                    messages = self._build_messages(prompt)
+                    
+                    cache_key = self._cache_key(messages, prompt_config) if use_cache else None
+                    # Hits are recorded at the end, so the batch holds no
+                    # write transaction open while upstream calls run
+                    cached = self.response_cache.get(cache_key, record_hit=False) if cache_key else None
+                except Exception as e:
+                    yield index, {'success': False, 'error': str(e)}
+                    continue
+                
+                if cached:
+                    cache_hits.append(cache_key)
+                    cached['cached'] = True
+                    cached['prompt_tokens_estimate'] = estimate_message_tokens(messages)
+                    yield index, self._record_generation(description_type, cached)
+                    continue
+                
+                futures[executor.submit(self._request_completion, messages, prompt_config)] = (index, cache_key, description_type)
             
-            prompt = f"""Jesteś ekspertem w dziedzinie produkcji gitar i historii firm muzycznych. Stwórz szczegółowy opis firmy produkującej gitary w języku polskim na podstawie poniższych informacji.
-
-{context}
-
-Informacje wejściowe: {input_text}
-
-Uwaga: Przykłady zawierają metadane w nawiasach kwadratowych [kategoria] i (tagi: tag1, tag2). Użyj tych informacji, aby lepiej zrozumieć kontekst i styl opisu.
-
-Proszę o kompleksowy opis w języku polskim, który zawiera:
-- Historię firmy i jej założenie
-- Znaczące osiągnięcia i innowacje
-- Charakterystyczne produkty i modele
-- Filozofię i wartości firmy
-- Pozycję rynkową i reputację
-- Kluczowe osoby i kamienie milowe
-
-Opis powinien być angażujący i informacyjny dla entuzjastów gitar. Używaj polskiej terminologii biznesowej i muzycznej. Dostosuj styl do kategorii i tagów z przykładów, jeśli są dostępne."""
+            for future in as_completed(futures):
+                index, cache_key, description_type = futures[future]
+                result = future.result()
+                if result['success'] and cache_key:
+                    cache_writes.append((cache_key, result))
+                yield index, self._record_generation(description_type, result)
+        finally:
+            # Without waiting, so a closed generator does not block on calls
+            # still in flight; their results are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        return self._call_openai(prompt)
+        if cache_hits:
+            self.response_cache.record_hits(cache_hits)
+        for cache_key, result in cache_writes:
+            self.response_cache.set(cache_key, result)
     
     def suggest_metadata(self, content, description_type):
         """Suggest category and tags based on content"""
@@ -294,8 +309,7 @@ Odpowiedz w formacie JSON:
     "tags": "tag1, tag2, tag3, tag4"
 }}"""
 
-            response = openai.ChatCompletion.create(
-                model=Config.OPENAI_MODEL,
+            response = self.llm_client.chat(
                 messages=[
                     {"role": "system", "content": "Jesteś ekspertem w kategoryzacji opisów gitar i firm muzycznych. Odpowiadaj tylko w formacie JSON."},
                     {"role": "user", "content": prompt}
@@ -318,27 +332,128 @@ Odpowiedz w formacie JSON:
                 'tags': ''
             }
     
-    def _call_openai(self, prompt):
-        """Make API call to OpenAI"""
+    def stream_description(self, description_type, input_text, user_id=None, use_cache=True):
+        """Generate a description, yielding events as tokens arrive
+
+        Yields {'event': 'token', 'content': ...} for each chunk and finally
+        {'event': 'done', ...} with the full result or {'event': 'error', ...}.
+        """
+        start_time = time.time()
+        prompt_config = self.get_prompt_config(description_type, user_id)
+        prompt = self.build_prompt(description_type, input_text, user_id, prompt_config)
+        messages = self._build_messages(prompt)
+        prompt_tokens = estimate_message_tokens(messages)
+        
+        cache_key = self._cache_key(messages, prompt_config) if use_cache else None
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached:
+                cached.update(cached=True, prompt_tokens_estimate=prompt_tokens)
+                self._record_generation(description_type, cached)
+                yield {'event': 'token', 'content': cached['description']}
+                yield dict(cached, event='done', time_to_first_token=time.time() - start_time)
+                return
+        
+        parts = []
+        time_to_first_token = None
+        # Upstream waits of all chunks, observed as one upstream phase
+        upstream_waits = {}
         try:
-            response = openai.ChatCompletion.create(
-                model=Config.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "Jesteś ekspertem w dziedzinie gitar z głęboką znajomością instrumentów muzycznych, firm produkujących gitary i branży muzycznej. Zawsze odpowiadaj w języku polskim z poprawną gramatyką i terminologią muzyczną."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=Config.OPENAI_MAX_TOKENS,
-                temperature=Config.OPENAI_TEMPERATURE
+            stream = self.llm_client.stream_chat(
+                messages,
+                max_tokens=prompt_config.max_tokens,
+                temperature=prompt_config.temperature,
+                model=prompt_config.model
             )
+            while True:
+                # Only the wait for the next chunk is upstream time, not the
+                # time the consumer spends handling the previous one
+                with phase('upstream', upstream_waits):
+                    content = next(stream, None)
+                if content is None:
+                    break
+                if time_to_first_token is None:
+                    time_to_first_token = time.time() - start_time
+                parts.append(content)
+                yield {'event': 'token', 'content': content}
+        except Exception as e:
+            self._record_generation(description_type, {'success': False})
+            yield {'event': 'error', 'error': str(e)}
+            return
+        finally:
+            observe_phases(upstream_waits)
+        
+        result = {
+            'success': True,
+            'description': ''.join(parts).strip(),
+            # Streaming responses carry no usage, so count chunks (about one
+            # token each) plus the estimated prompt size
+            'tokens_used': len(parts) + prompt_tokens,
+            'model_version': prompt_config.model,
+            'cached': False,
+            'prompt_tokens_estimate': prompt_tokens
+        }
+        if cache_key:
+            self.response_cache.set(cache_key, result)
+        self._record_generation(description_type, result)
+        yield dict(result, event='done', time_to_first_token=time_to_first_token)
+    
+    def _build_messages(self, prompt):
+        """Wrap a prompt with the system message"""
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _cache_key(self, messages, prompt_config):
+        """Response cache key for the messages, None when caching is disabled"""
+        if not self.response_cache:
+            return None
+        return self.response_cache.make_key(
+            messages, prompt_config.model, prompt_config.temperature, prompt_config.max_tokens,
+            [prompt_config.prompt_id, prompt_config.prompt_version, prompt_config.adjustments]
+        )
+    
+    def _call_openai(self, prompt, prompt_config, use_cache=True):
+        """Make API call to OpenAI, serving repeated requests from the response cache"""
+        messages = self._build_messages(prompt)
+        
+        cache_key = self._cache_key(messages, prompt_config) if use_cache else None
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached:
+                cached['cached'] = True
+                cached['prompt_tokens_estimate'] = estimate_message_tokens(messages)
+                return cached
+        
+        result = self._request_completion(messages, prompt_config)
+        if result['success'] and cache_key:
+            self.response_cache.set(cache_key, result)
+        return result
+    
+    def _request_completion(self, messages, prompt_config):
+        """Call the chat completion API (no database access, safe in worker threads)"""
+        prompt_tokens = estimate_message_tokens(messages)
+        try:
+            with phase('upstream'):
+                response = self.llm_client.chat(
+                    messages,
+                    max_tokens=prompt_config.max_tokens,
+                    temperature=prompt_config.temperature,
+                    model=prompt_config.model
+                )
             
             return {
                 'success': True,
                 'description': response.choices[0].message.content.strip(),
-                'tokens_used': response.usage.total_tokens if hasattr(response, 'usage') else None,
-                'model_version': Config.OPENAI_MODEL
+                'tokens_used': response.usage.total_tokens if response.usage else None,
+                'model_version': prompt_config.model,
+                'cached': False,
+                'prompt_tokens_estimate': prompt_tokens
             }
         except Exception as e:
             return {
                 'success': False,
-                'error': str(e)
+                'error': str(e),
+                'prompt_tokens_estimate': prompt_tokens
             }
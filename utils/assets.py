@@ -0,0 +1,90 @@
+import json
+import mimetypes
+import os
+from flask import current_app, request, send_from_directory, url_for
+from config.settings import Config
+
+# Fingerprinted copies written by build_assets.py, relative to the static folder
+DIST_DIRECTORY = 'dist'
+MANIFEST_NAME = 'manifest.json'
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}  # in order of preference
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class AssetManifest:
+    """Maps source asset names to their fingerprinted copies
+
+    The manifest is reread when build_assets.py rewrites it. In debug mode a
+    source file edited after the last build is served unfingerprinted, so
+    changes show up without rebuilding.
+    """
+
+    def __init__(self, static_folder, debug=False):
+        self.static_folder = static_folder
+        self.debug = debug
+        self.path = os.path.join(static_folder, DIST_DIRECTORY, MANIFEST_NAME)
+        self._mtime = None
+        self._entries = {}
+
+    def _load(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._mtime, self._entries = None, {}
+            return
+        if mtime != self._mtime:
+            with open(self.path, encoding='utf-8') as manifest_file:
+                self._entries = json.load(manifest_file)
+            self._mtime = mtime
+
+    def lookup(self, filename):
+        """Fingerprinted path of filename, or filename itself when not built"""
+        self._load()
+        built = self._entries.get(filename)
+        if built is None:
+            return filename
+        if self.debug:
+            source = os.path.join(self.static_folder, filename)
+            target = os.path.join(self.static_folder, built)
+            if not os.path.exists(target) or os.path.getmtime(source) > os.path.getmtime(target):
+                return filename
+        return built
+
+
+def asset_url(filename):
+    """url_for('static') of the fingerprinted copy of an asset"""
+    manifest = current_app.extensions['asset_manifest']
+    return url_for('static', filename=manifest.lookup(filename))
+
+
+def serve_static(filename):
+    """Static files; fingerprinted ones are precompressed and cached forever"""
+    app = current_app
+    if not filename.startswith(DIST_DIRECTORY + '/'):
+        return app.send_static_file(filename)
+
+    response = None
+    for encoding, suffix in ENCODING_SUFFIXES.items():
+        # Variants are optional, brotli ones exist only if it was installed at build time
+        compressed = filename + suffix
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(app.static_folder, compressed)):
+            response = send_from_directory(
+                app.static_folder,
+                compressed,
+                mimetype=mimetypes.guess_type(filename)[0]
+            )
+            response.headers['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = app.send_static_file(filename)
+    response.vary.add('Accept-Encoding')
+    # The name changes with the content, so the file itself never does
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def init_app(app):
+    """Serve fingerprinted assets and expose asset_url() to templates"""
+    app.extensions['asset_manifest'] = AssetManifest(app.static_folder, debug=app.debug or Config.DEBUG)
+    app.view_functions['static'] = serve_static
+    app.context_processor(lambda: {'asset_url': asset_url})
@@ -0,0 +1,199 @@
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from config.settings import Config
+from utils.response_cache import ResponseCache
+
+CASSETTE_MODES = ('record', 'replay', 'auto')
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a request that was never recorded"""
+
+
+class Cassette:
+    """On-disk recording of LLM requests and responses
+
+    Entries are JSON lines (gzip compressed when the path ends with .gz) keyed
+    by the same request hash as the response cache. A request recorded more
+    than once replays its responses in recording order, cycling at the end.
+    Each entry keeps the upstream latency seen while recording, so replays can
+    tell our own processing time apart from time spent waiting on the model.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._file = None
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.replayed_upstream_seconds = 0.0
+        self._load()
+        atexit.register(self.close)
+
+    def _open(self, mode):
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, mode + 't', encoding='utf-8')
+        return open(self.path, mode, encoding='utf-8')
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with self._open('r') as cassette_file:
+            try:
+                for line in cassette_file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry['key'], deque()).append(entry)
+            except (EOFError, ValueError):
+                # Recording was killed before the file was closed, every
+                # flushed line before the damage is still usable
+                pass
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def play(self, key):
+        """Return the next recorded entry for key or None"""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                return None
+            entry = entries[0]
+            entries.rotate(-1)
+            self.hits += 1
+            self.replayed_upstream_seconds += entry.get('latency', 0)
+            return entry
+
+    def record(self, entry):
+        """Append an entry to the cassette file"""
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                self._file = self._open('a')
+            self._file.write(line + '\n')
+            self._file.flush()
+            self._entries.setdefault(entry['key'], deque()).append(entry)
+            self.recorded += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'path': self.path,
+                'entries': sum(len(entries) for entries in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'recorded': self.recorded,
+                'replayed_upstream_seconds': round(self.replayed_upstream_seconds, 3)
+            }
+
+
+class CassetteClient:
+    """LLM client wrapper that records to or replays from a Cassette
+
+    Modes: record (always call upstream and record), replay (serve only
+    recorded responses, CassetteMiss otherwise) and auto (replay when
+    recorded, otherwise call upstream and record). Replays return instantly
+    unless replay_latency is set, then the recorded upstream latency is slept.
+    """
+
+    def __init__(self, client, cassette, mode, replay_latency=False):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f'Unknown cassette mode: {mode}')
+        self.client = client
+        self.cassette = cassette
+        self.mode = mode
+        self.replay_latency = replay_latency
+
+    def _key(self, kind, messages, max_tokens, temperature, model):
+        return ResponseCache.make_key(messages, f'{kind}:{model or Config.OPENAI_MODEL}', temperature, max_tokens)
+
+    def _replay(self, key):
+        if self.mode == 'record':
+            return None
+        entry = self.cassette.play(key)
+        if entry is None:
+            if self.mode == 'replay':
+                raise CassetteMiss('No recorded response for this request')
+            return None
+        if self.replay_latency:
+            time.sleep(entry.get('latency', 0))
+        return entry
+
+    def chat(self, messages, max_tokens, temperature, model=None):
+        """Chat completion served from or recorded to the cassette"""
+        key = self._key('chat', messages, max_tokens, temperature, model)
+        entry = self._replay(key)
+        if entry is not None:
+            return ChatCompletion(
+                id=entry.get('id') or 'cassette',
+                object='chat.completion',
+                created=int(time.time()),
+                model=entry['model'],
+                choices=[Choice(
+                    index=0,
+                    finish_reason='stop',
+                    message=ChatCompletionMessage(role='assistant', content=entry['content'])
+                )],
+                usage=CompletionUsage(**entry['usage']) if entry.get('usage') else None
+            )
+
+        start_time = time.time()
+        response = self.client.chat(messages, max_tokens, temperature, model)
+        self.cassette.record({
+            'key': key,
+            'kind': 'chat',
+            'id': response.id,
+            'model': response.model,
+            'messages': messages,
+            'content': response.choices[0].message.content,
+            'usage': response.usage.model_dump() if response.usage else None,
+            'latency': round(time.time() - start_time, 4)
+        })
+        return response
+
+    def stream_chat(self, messages, max_tokens, temperature, model=None):
+        """Streamed completion, replayed with the recorded chunking"""
+        key = self._key('stream', messages, max_tokens, temperature, model)
+        entry = self._replay(key)
+        if entry is not None:
+            yield from entry['chunks']
+            return
+
+        start_time = time.time()
+        chunks = []
+        for content in self.client.stream_chat(messages, max_tokens, temperature, model):
+            chunks.append(content)
+            yield content
+        # Only complete streams are recorded
+        self.cassette.record({
+            'key': key,
+            'kind': 'stream',
+            'model': model or Config.OPENAI_MODEL,
+            'messages': messages,
+            'chunks': chunks,
+            'latency': round(time.time() - start_time, 4)
+        })
+
+    def stats(self):
+        return dict(self.client.stats(), cassette=dict(self.cassette.stats(), mode=self.mode))
+
+    def close(self):
+        self.cassette.close()
+        self.client.close()
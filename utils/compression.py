@@ -0,0 +1,71 @@
+import gzip
+from flask import request
+from config.settings import Config
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/css',
+    'text/html',
+    'text/plain',
+}
+
+
+def choose_encoding(accept_encodings):
+    """Best content coding supported by both sides, or None"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, level=None):
+    level = Config.COMPRESSION_LEVEL if level is None else level
+    if encoding == 'br':
+        # Brotli qualities run 0-11, gzip levels 1-9
+        return brotli.compress(data, quality=min(11, level + 2))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_response(response):
+    """Compress a buffered JSON, HTML, JS or CSS response above the size threshold"""
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.is_streamed
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        # Streamed responses (server-sent events, NDJSON) must reach the
+        # client chunk by chunk; files are precompressed by build_assets.py
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if response.status_code != 200 or 'no-transform' in response.headers.get('Cache-Control', ''):
+        return response
+
+    encoding = choose_encoding(request.accept_encodings)
+    data = response.get_data()
+    if encoding is None or len(data) < Config.COMPRESSION_MIN_SIZE:
+        return response
+
+    compressed = compress(data, encoding)
+    if len(compressed) >= len(data):
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # The compressed bytes are a different representation of the same data
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Compress responses of the app"""
+    if Config.COMPRESSION_ENABLED:
+        app.after_request(compress_response)
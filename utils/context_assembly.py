@@ -0,0 +1,87 @@
+from utils.metrics import CONTEXT_ITEMS
+from utils.tokens import estimate_tokens, truncate_to_tokens
+from collections import namedtuple
+
+# A truncated item shorter than this carries too little to be worth its heading
+MIN_TRUNCATED_TOKENS = 40
+
+ContextItem = namedtuple('ContextItem', ['prefix', 'body', 'prefix_tokens', 'body_tokens', 'truncatable'])
+
+
+class ContextSection:
+    """Heading and items of one part of the learning context, most valuable item first"""
+
+    def __init__(self, name, heading, priority):
+        self.name = name
+        self.heading = heading
+        self.priority = priority
+        self.items = []
+        self.included = []
+
+    def add(self, prefix, body='', tokens=None, truncatable=False):
+        """Offer the line prefix + body; only the body of a truncatable item may be cut
+
+        tokens can be passed when the body's estimate is already known.
+        """
+        if tokens is None:
+            tokens = estimate_tokens(body)
+        self.items.append(ContextItem(prefix, body, estimate_tokens(prefix), tokens, truncatable))
+
+
+class ContextAssembler:
+    """Packs learning context sections into a token budget
+
+    Sections are filled in priority order (lowest first), each with its items
+    in the order they were added, so the most valuable items claim the budget
+    first. An item that does not fit is cut at a word boundary if it is
+    truncatable and enough budget is left, otherwise skipped in favour of
+    smaller items after it. Sections render in the order they were created.
+    A budget of 0 or None includes everything.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = budget or None
+        self.sections = []
+        self.tokens = 0
+
+    def section(self, name, heading, priority=0):
+        """Add a section; its heading is only rendered if one of its items fits"""
+        section = ContextSection(name, heading, priority)
+        self.sections.append(section)
+        return section
+
+    def render(self):
+        """Pack the offered items and return the context text"""
+        self._pack()
+        parts = []
+        for section in self.sections:
+            if section.included:
+                parts.append(section.heading)
+                parts.extend(section.included)
+        return ''.join(parts)
+
+    def _pack(self):
+        self.tokens = 0
+        for section in sorted(self.sections, key=lambda section: section.priority):
+            section.included = []
+            heading_tokens = estimate_tokens(section.heading)
+            for item in section.items:
+                overhead = 0 if section.included else heading_tokens
+                body, body_tokens = item.body, item.body_tokens
+                available = None
+                if self.budget is not None:
+                    available = self.budget - self.tokens - overhead - item.prefix_tokens
+
+                if available is None or body_tokens <= available:
+                    outcome = 'included'
+                elif item.truncatable and available >= MIN_TRUNCATED_TOKENS:
+                    body = truncate_to_tokens(body, available)
+                    body_tokens = estimate_tokens(body)
+                    outcome = 'truncated'
+                else:
+                    CONTEXT_ITEMS.inc(section=section.name, outcome='dropped')
+                    continue
+
+                section.included.append(f"{item.prefix}{body}\n")
+                self.tokens += overhead + item.prefix_tokens + body_tokens
+                CONTEXT_ITEMS.inc(section=section.name, outcome=outcome)
@@ -0,0 +1,38 @@
+import hashlib
+from functools import wraps
+from flask import make_response, request, Response
+from flask_login import current_user
+from models.resource_versions import get_versions
+
+
+def conditional(*resources):
+    """Serve a view with an ETag built from the user's resource versions
+
+    The ETag covers the user, the path, the query string and the current
+    versions of resources, so a matching If-None-Match is answered with 304
+    after a single version lookup, before the view loads or serializes rows.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = get_versions(current_user.id, resources)
+            fingerprint = '|'.join([
+                str(current_user.id),
+                request.path,
+                request.query_string.decode('latin-1'),
+                ','.join(f'{resource}:{versions[resource]}' for resource in resources)
+            ])
+            etag = hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:32]
+
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Browsers may keep the body but must revalidate before reusing it
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,260 @@
+import heapq
+import math
+import random
+import threading
+import time
+from collections import namedtuple
+from config.settings import Config
+from models.database import db
+from models.descriptions import SavedDescription, load_tag_names, normalize_tag_names
+from models.resource_versions import PUBLIC_EXAMPLES, committed_global_version, get_global_version
+from utils.polish_text import analyze, fold_diacritics, raw_tokens
+
+# Field weights used both as BM25 term frequency boosts and keyword scores
+CATEGORY_WEIGHT = 3
+TITLE_WEIGHT = 2
+TAG_WEIGHT = 1
+
+IndexedExample = namedtuple('IndexedExample', ['description_type', 'length', 'terms', 'phrases'])
+
+
+class ExampleIndex:
+    """In-process inverted index over public example descriptions
+
+    The index is built lazily from the database on first use and then kept up
+    to date by the API routes that add, update, delete or toggle examples.
+    Writes handled by other processes are noticed through the public examples
+    version, checked at most every EXAMPLE_INDEX_CHECK_INTERVAL seconds, and
+    trigger a rebuild.
+    Term statistics are kept per description type so rankers can score
+    candidates by walking only the postings of the query terms.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._loaded = False
+        # Public examples version the index reflects
+        self._watermark = None
+        self._next_check = 0
+        # id -> IndexedExample
+        self._docs = {}
+        # description_type -> term -> {id: weighted term frequency}
+        self._postings = {}
+        # description_type -> first folded token -> {folded phrase: {id: weight}}
+        self._phrases = {}
+        # description_type -> sum of document lengths
+        self._total_length = {}
+        # description_type -> list of ids (with positions for O(1) removal)
+        self._members = {}
+        self._positions = {}
+        # id -> document length in terms, for BM25 length normalization
+        self._lengths = {}
+
+    def ensure_loaded(self):
+        """Build the index, or rebuild it if examples changed in another process"""
+        if self._loaded and time.monotonic() < self._next_check:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if self._loaded and now < self._next_check:
+                return
+            # Read before the rows, so a write racing the build bumps it again
+            watermark = self._read_watermark()
+            self._next_check = now + Config.EXAMPLE_INDEX_CHECK_INTERVAL
+            if self._loaded and watermark == self._watermark:
+                return
+            self._clear()
+            self._watermark = watermark
+            self._next_check = now + Config.EXAMPLE_INDEX_CHECK_INTERVAL
+            tags_by_id = load_tag_names(db.select(SavedDescription.id).filter_by(is_public=True))
+            rows = SavedDescription.query.with_entities(
+                SavedDescription.id,
+                SavedDescription.description_type,
+                SavedDescription.category,
+                SavedDescription.title,
+                SavedDescription.content
+            ).filter_by(is_public=True).order_by(SavedDescription.id).yield_per(1000)
+            self._index_rows(rows, tags_by_id)
+
+    def build(self, rows, tags_by_id=None):
+        """Index rows with id, description_type, category, title and content
+
+        Tags come from tags_by_id, or from a tags attribute on the rows. An
+        index built from given rows is never reloaded from the database.
+        """
+        with self.lock:
+            self._index_rows(rows, tags_by_id)
+            self._next_check = math.inf
+
+    def _index_rows(self, rows, tags_by_id):
+        for row in rows:
+            tags = tags_by_id.get(row.id) if tags_by_id is not None else row.tags
+            self._add(row.id, row.description_type, row.category, row.title, tags, row.content)
+        self._loaded = True
+
+    def reset(self):
+        """Drop all indexed data, the next lookup rebuilds it"""
+        with self.lock:
+            self._clear()
+
+    def _read_watermark(self):
+        """Public examples version, bumped by every commit that changes an example"""
+        return get_global_version(PUBLIC_EXAMPLES)
+
+    def _advance_watermark(self):
+        """Adopt the version committed by this process's own write
+
+        Only a version directly following the indexed one is adopted, a gap
+        means another process wrote in between and the index must be rebuilt.
+        """
+        if self._watermark is None:
+            # Built from given rows, never reloaded
+            return
+        version = committed_global_version(db.session, PUBLIC_EXAMPLES)
+        if version == self._watermark + 1:
+            self._watermark = version
+
+    def add(self, description):
+        """Index or re-index a SavedDescription after it was committed"""
+        with self.lock:
+            if not self._loaded:
+                return
+            self._remove(description.id)
+            if description.is_public:
+                self._add(
+                    description.id,
+                    description.description_type,
+                    description.category,
+                    description.title,
+                    description.tag_names,
+                    description.content
+                )
+            self._advance_watermark()
+
+    def remove(self, description_id):
+        """Remove a description from the index"""
+        with self.lock:
+            if self._loaded:
+                self._remove(description_id)
+                self._advance_watermark()
+
+    def search(self, ranker, description_type, input_text, limit=3):
+        """Return ids of the examples the ranker scores highest for the input text"""
+        self.ensure_loaded()
+        with self.lock:
+            scores = ranker.score(self, self._types(description_type), input_text)
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [doc_id for doc_id, score in top if score > 0]
+
+    def random_ids(self, description_type, k, rng=random):
+        """Return up to k random example ids of the given type"""
+        self.ensure_loaded()
+        with self.lock:
+            pool = [doc_id for t in self._types(description_type) for doc_id in self._members[t]]
+            return rng.sample(pool, min(k, len(pool)))
+
+    # Read accessors for rankers, callers must hold the lock
+
+    def doc_count(self, description_type):
+        return len(self._members.get(description_type, ()))
+
+    def postings(self, description_type, term):
+        return self._postings.get(description_type, {}).get(term, {})
+
+    def phrases(self, description_type, first_token):
+        return self._phrases.get(description_type, {}).get(first_token, {})
+
+    def average_length(self, description_type):
+        """Mean document length of a type, kept up to date on every add and remove"""
+        doc_count = self.doc_count(description_type)
+        return (self._total_length.get(description_type, 0) / doc_count if doc_count else 0) or 1
+
+    def doc_lengths(self):
+        """Mapping of id -> document length"""
+        return self._lengths
+
+    def _types(self, description_type):
+        if description_type:
+            return [description_type] if description_type in self._members else []
+        return list(self._members)
+
+    def _add(self, doc_id, description_type, category, title, tags, content):
+        terms = {}
+        for term in analyze(content):
+            terms[term] = terms.get(term, 0) + 1
+        length = sum(terms.values())
+
+        phrases = {}
+        fields = [(category, CATEGORY_WEIGHT), (title, TITLE_WEIGHT)]
+        fields.extend((tag, TAG_WEIGHT) for tag in normalize_tag_names(tags))
+        for text, weight in fields:
+            if not text or not text.strip():
+                continue
+            phrase = fold_diacritics(text.strip().lower())
+            phrases[phrase] = phrases.get(phrase, 0) + weight
+            for term in analyze(text):
+                terms[term] = terms.get(term, 0) + weight
+                length += 1
+
+        postings = self._postings.setdefault(description_type, {})
+        for term, frequency in terms.items():
+            postings.setdefault(term, {})[doc_id] = frequency
+
+        type_phrases = self._phrases.setdefault(description_type, {})
+        for phrase, weight in phrases.items():
+            phrase_tokens = raw_tokens(phrase)
+            if phrase_tokens:
+                type_phrases.setdefault(phrase_tokens[0], {}).setdefault(phrase, {})[doc_id] = weight
+
+        members = self._members.setdefault(description_type, [])
+        self._positions[doc_id] = len(members)
+        members.append(doc_id)
+        self._total_length[description_type] = self._total_length.get(description_type, 0) + length
+        self._docs[doc_id] = IndexedExample(description_type, length, tuple(terms), tuple(phrases))
+        self._lengths[doc_id] = length
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        description_type = doc.description_type
+
+        postings = self._postings[description_type]
+        for term in doc.terms:
+            term_postings = postings.get(term)
+            if term_postings is not None:
+                term_postings.pop(doc_id, None)
+                if not term_postings:
+                    del postings[term]
+
+        type_phrases = self._phrases[description_type]
+        for phrase in doc.phrases:
+            phrase_tokens = raw_tokens(phrase)
+            if not phrase_tokens:
+                continue
+            bucket = type_phrases.get(phrase_tokens[0], {})
+            weights = bucket.get(phrase, {})
+            weights.pop(doc_id, None)
+            if not weights:
+                bucket.pop(phrase, None)
+            if not bucket:
+                type_phrases.pop(phrase_tokens[0], None)
+
+        # Swap-remove from the per-type member list
+        members = self._members[description_type]
+        position = self._positions.pop(doc_id)
+        last_id = members.pop()
+        if last_id != doc_id:
+            members[position] = last_id
+            self._positions[last_id] = position
+        if not members:
+            del self._members[description_type]
+
+        self._total_length[description_type] -= doc.length
+        del self._lengths[doc_id]
+
+
+example_index = ExampleIndex()
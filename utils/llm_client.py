@@ -0,0 +1,204 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import httpx
+import openai
+from config.settings import Config
+from utils.resilience import CircuitBreaker, RateLimiter, RateLimitExceeded
+from utils.tokens import estimate_message_tokens
+
+
+def retry_after_seconds(error):
+    """Seconds the upstream asked us to wait, from Retry-After headers"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClient:
+    """Long-lived OpenAI client shared by all threads of a process
+
+    Holds a single httpx connection pool with keep-alive connections, so
+    generations reuse established TLS connections instead of handshaking on
+    every call. Connect and read timeouts keep hung upstream calls from
+    pinning workers. The underlying client is created on first use, which
+    lets the application start without an API key configured.
+
+    Calls pass a process-wide rate limiter (requests and estimated tokens per
+    minute) and a circuit breaker. Rate limits, timeouts and 5xx responses are
+    retried with jittered exponential backoff that honors Retry-After.
+    """
+
+    def __init__(self, api_key=None, base_url=None, pool_size=None,
+                 connect_timeout=None, read_timeout=None, max_retries=None):
+        self.api_key = api_key
+        self.base_url = base_url or Config.OPENAI_BASE_URL
+        self.pool_size = pool_size or Config.OPENAI_POOL_SIZE
+        self.connect_timeout = connect_timeout or Config.OPENAI_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or Config.OPENAI_READ_TIMEOUT
+        self.max_retries = Config.OPENAI_MAX_RETRIES if max_retries is None else max_retries
+        self.limiter = RateLimiter(
+            Config.OPENAI_RPM_LIMIT, Config.OPENAI_TPM_LIMIT, Config.OPENAI_LIMITER_MAX_WAIT
+        )
+        self.breaker = CircuitBreaker(Config.OPENAI_BREAKER_THRESHOLD, Config.OPENAI_BREAKER_RESET)
+        self.retries = 0
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The shared openai.OpenAI instance, created on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    timeout = httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+                    http_client = httpx.Client(
+                        timeout=timeout,
+                        limits=httpx.Limits(
+                            max_connections=self.pool_size,
+                            max_keepalive_connections=self.pool_size,
+                            keepalive_expiry=Config.OPENAI_KEEPALIVE_EXPIRY
+                        )
+                    )
+                    self._client = openai.OpenAI(
+                        api_key=self.api_key or Config.OPENAI_API_KEY,
+                        base_url=self.base_url,
+                        timeout=timeout,
+                        # Retries are handled here, together with the limiter
+                        max_retries=0,
+                        http_client=http_client
+                    )
+        return self._client
+
+    def chat(self, messages, max_tokens, temperature, model=None):
+        """Create a chat completion and return the SDK response"""
+        estimated_tokens = estimate_message_tokens(messages) + max_tokens
+        response = self._with_retries(lambda: self.client.chat.completions.create(
+            model=model or Config.OPENAI_MODEL,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        ), estimated_tokens)
+        if response.usage:
+            self.limiter.release(0, estimated_tokens, response.usage.total_tokens)
+        return response
+
+    def stream_chat(self, messages, max_tokens, temperature, model=None):
+        """Yield content deltas of a streamed chat completion
+
+        The HTTP response is closed when the caller stops iterating, so an
+        abandoned stream returns its connection to the pool. Only opening the
+        stream is retried, never a stream that already produced output.
+        """
+        stream = self._with_retries(lambda: self.client.chat.completions.create(
+            model=model or Config.OPENAI_MODEL,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        ), estimate_message_tokens(messages) + max_tokens)
+        try:
+            for chunk in stream:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    yield content
+        finally:
+            stream.response.close()
+
+    def stats(self):
+        """Limiter, retry and circuit breaker counters"""
+        return {
+            'circuit_state': self.breaker.state,
+            'rejected_calls': self.breaker.rejected_calls,
+            'retries': self.retries,
+            'throttled_calls': self.limiter.throttled_calls,
+            'throttled_seconds': round(self.limiter.throttled_seconds, 3)
+        }
+
+    def _with_retries(self, request, estimated_tokens):
+        """Run request under the limiter and breaker, retrying transient errors"""
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                self.limiter.acquire(estimated_tokens)
+            except RateLimitExceeded:
+                self.breaker.cancel_call()
+                raise
+            try:
+                response = request()
+            except openai.RateLimitError as e:
+                # The upstream answered, it is only out of quota
+                self.breaker.record_success()
+                error = e
+                delay = self._retry_delay(attempt, e)
+            except (openai.APIConnectionError, openai.InternalServerError) as e:
+                self.breaker.record_failure()
+                error = e
+                delay = self._retry_delay(attempt, e)
+            except Exception:
+                self.breaker.record_success()
+                self.limiter.release(0, estimated_tokens, 0)
+                raise
+            else:
+                self.breaker.record_success()
+                return response
+
+            self.limiter.release(0, estimated_tokens, 0)
+            if attempt >= self.max_retries or delay is None:
+                raise error
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            if isinstance(error, openai.RateLimitError):
+                # Every thread backs off together instead of piling on more 429s,
+                # the next acquire waits out the pause
+                self.limiter.pause(delay)
+            else:
+                time.sleep(delay)
+
+    def _retry_delay(self, attempt, error):
+        """Jittered exponential backoff, or the upstream Retry-After
+
+        Returns None when the upstream asks for a longer wait than we allow.
+        """
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            if retry_after > Config.OPENAI_BACKOFF_MAX:
+                return None
+            return retry_after + random.uniform(0, Config.OPENAI_BACKOFF_BASE)
+        return random.uniform(0, min(Config.OPENAI_BACKOFF_MAX, Config.OPENAI_BACKOFF_BASE * 2 ** attempt))
+
+    def close(self):
+        """Close pooled connections, the next call opens a new pool"""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+llm_client = LLMClient()
+
+if Config.LLM_CASSETTE_MODE:
+    # Record or replay upstream responses, see utils/cassette.py
+    from utils.cassette import Cassette, CassetteClient
+    llm_client = CassetteClient(
+        llm_client,
+        Cassette(Config.LLM_CASSETTE_PATH),
+        Config.LLM_CASSETTE_MODE,
+        Config.LLM_CASSETTE_REPLAY_LATENCY
+    )
@@ -0,0 +1,273 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+
+# Latency buckets in seconds, from fast cache hits to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        text = value if isinstance(value, str) else _format_value(value)
+        escaped = text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    samples.append((self.name + '_bucket', key + (bound,), cumulative))
+                samples.append((self.name + '_bucket', key + (float('inf'),), state[-1]))
+                samples.append((self.name + '_sum', key, state[-2]))
+                samples.append((self.name + '_count', key, state[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics rendered in the Prometheus text format
+
+    Collectors are callables returning (name, kind, help, value) tuples for
+    values kept elsewhere, like cache or limiter counters.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def register_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """Text exposition of every metric"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for sample_name, key, value in metric.samples():
+                names = metric.labels + (('le',) if sample_name.endswith('_bucket') else ())
+                lines.append(f'{sample_name}{_format_labels(names, key)} {_format_value(value)}')
+
+        for collector in collectors:
+            for name, kind, help_text, value in collector():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+PHASE_SECONDS = metrics.histogram(
+    'guitar_ai_phase_seconds',
+    'Time spent in each phase of description generation, excluding nested phases',
+    labels=('phase',)
+)
+GENERATIONS = metrics.counter(
+    'guitar_ai_generations_total',
+    'Description generations by type and outcome',
+    labels=('type', 'outcome')
+)
+PROMPT_TOKENS = metrics.histogram(
+    'guitar_ai_prompt_tokens_estimate',
+    'Estimated prompt tokens sent upstream',
+    labels=('type',),
+    buckets=TOKEN_BUCKETS
+)
+CONTEXT_ITEMS = metrics.counter(
+    'guitar_ai_context_items_total',
+    'Learning context items offered to the prompt, by section and whether they fit the token budget',
+    labels=('section', 'outcome')
+)
+UPSTREAM_TOKENS = metrics.counter(
+    'guitar_ai_upstream_tokens_total',
+    'Tokens reported by the upstream API'
+)
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    'guitar_ai_http_request_seconds',
+    'HTTP request latency by endpoint, method and status',
+    labels=('endpoint', 'method', 'status')
+)
+
+# Phase timings of the request being handled, see track_phases()
+_current_phases = ContextVar('current_phases', default=None)
+# Time spent in nested phases, one entry per open phase
+_phase_stack = ContextVar('phase_stack', default=None)
+
+
+class PhaseTimings:
+    """Exclusive time per phase of one request"""
+
+    def __init__(self):
+        self.totals = {}
+
+    def get(self, name, default=None):
+        return self.totals.get(name, default)
+
+    def as_dict(self):
+        return {name: round(seconds, 6) for name, seconds in self.totals.items()}
+
+
+@contextmanager
+def track_phases(timings=None):
+    """Collect the phases recorded inside the block into a PhaseTimings
+
+    Pass the timings of an earlier block to keep adding to them.
+    """
+    if timings is None:
+        timings = PhaseTimings()
+    token = _current_phases.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_phases.reset(token)
+
+
+@contextmanager
+def phase(name, pending=None):
+    """Time a phase; time spent in nested phases is attributed to them only
+
+    With a pending dict the time is added to pending[name] instead of being
+    observed right away, so a phase entered many times in one request (e.g.
+    once per streamed chunk) is observed once with observe_phases(pending).
+    """
+    stack = _phase_stack.get()
+    if stack is None:
+        stack = []
+        _phase_stack.set(stack)
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        exclusive = elapsed - stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        timings = _current_phases.get()
+        if timings is not None:
+            timings.totals[name] = timings.totals.get(name, 0.0) + exclusive
+        if pending is None:
+            PHASE_SECONDS.observe(exclusive, phase=name)
+        else:
+            pending[name] = pending.get(name, 0.0) + exclusive
+
+
+def observe_phases(pending):
+    """Observe the phase times collected with phase(name, pending)"""
+    for name, seconds in pending.items():
+        PHASE_SECONDS.observe(seconds, phase=name)
+    pending.clear()
+
+
+def init_app(app):
+    """Record the latency of every HTTP request"""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start_time = time.perf_counter()
+
+    @app.after_request
+    def record_request_time(response):
+        start_time = g.pop('request_start_time', None)
+        if start_time is None:
+            return response
+        labels = {
+            'endpoint': request.url_rule.rule if request.url_rule else 'unmatched',
+            'method': request.method,
+            'status': response.status_code
+        }
+
+        def observe():
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start_time, **labels)
+
+        if response.is_streamed:
+            # Server-sent events and NDJSON are still being generated here;
+            # the response is closed once the stream ends or the client leaves
+            response.call_on_close(observe)
+        else:
+            observe()
+        return response
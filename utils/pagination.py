@@ -0,0 +1,95 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import or_, inspect as sa_inspect
+from sqlalchemy.orm import ColumnProperty, load_only, noload
+from config.settings import Config
+
+# A field a list endpoint can return: the model attribute it needs loaded
+# (column or relationship) and how to serialize it from a row
+ListField = namedtuple('ListField', ['attribute', 'serialize'])
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for a malformed cursor, limit or fields parameter"""
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing just after row in (created_at, id) descending order"""
+    payload = json.dumps([row.created_at.isoformat(), row.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (created_at, id) pair a cursor points after"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, UnicodeEncodeError):
+        raise InvalidPageRequest('Invalid cursor')
+
+
+def parse_page_args(args, fields):
+    """Read cursor, limit and fields from request args
+
+    Returns (cursor position or None, page size, list of requested field names).
+    """
+    cursor = decode_cursor(args['cursor']) if args.get('cursor') else None
+
+    try:
+        limit = int(args.get('limit', Config.LIST_PAGE_SIZE))
+    except ValueError:
+        raise InvalidPageRequest('limit must be an integer')
+    if limit < 1:
+        raise InvalidPageRequest('limit must be positive')
+    limit = min(limit, Config.LIST_MAX_PAGE_SIZE)
+
+    requested = [name.strip() for name in args.get('fields', '').split(',') if name.strip()]
+    unknown = [name for name in requested if name not in fields]
+    if unknown:
+        raise InvalidPageRequest(f'Unknown fields: {", ".join(unknown)}. Available: {", ".join(fields)}')
+    return cursor, limit, requested or list(fields)
+
+
+def paginate(query, model, fields, requested, cursor, limit):
+    """Fetch one page of query newest first, loading only the requested fields
+
+    Keyset pagination on (created_at, id): the cursor filter is an index range
+    scan instead of an OFFSET that rereads every earlier row. Returns the
+    serialized items and the cursor of the next page (None on the last page).
+    """
+    attributes = [fields[name].attribute for name in requested]
+    columns = [attribute for attribute in attributes if isinstance(attribute.property, ColumnProperty)]
+    # created_at and id are needed for the next cursor
+    options = [load_only(model.id, model.created_at, *columns)]
+    requested_keys = {attribute.key for attribute in attributes}
+    for relationship in sa_inspect(model).relationships:
+        if relationship.key not in requested_keys:
+            options.append(noload(getattr(model, relationship.key)))
+    query = query.options(*options)
+
+    if cursor:
+        created_at, row_id = cursor
+        # The redundant upper bound lets the database seek the (created_at, id)
+        # index to the cursor instead of scanning the rows before it
+        query = query.filter(
+            model.created_at <= created_at,
+            or_(model.created_at < created_at, model.id < row_id)
+        )
+
+    # One extra row tells whether another page exists
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+
+    items = [
+        {name: fields[name].serialize(row) for name in requested}
+        for row in rows[:limit]
+    ]
+    return items, next_cursor
+
+
+def isoformat(value):
+    """ISO 8601 string of a datetime or None"""
+    return value.isoformat() if value else None
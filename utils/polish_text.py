@@ -0,0 +1,81 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+POLISH_LETTERS = {
+    'ą': 'a', 'ć': 'c', 'ę': 'e', 'ł': 'l', 'ń': 'n',
+    'ó': 'o', 'ś': 's', 'ź': 'z', 'ż': 'z'
+}
+POLISH_FOLDING = str.maketrans(dict(
+    POLISH_LETTERS,
+    **{letter.upper(): base.upper() for letter, base in POLISH_LETTERS.items()}
+))
+
+# Inflectional suffixes (already folded), longest first so that the most
+# specific ending is removed
+POLISH_SUFFIXES = sorted([
+    'owaniami', 'owaniach', 'owania', 'owanie', 'owaniu', 'owaniem',
+    'iami', 'iach', 'ami', 'ach', 'iom', 'iem', 'owi', 'owie', 'owy', 'owa',
+    'owe', 'owej', 'owych', 'owym', 'ych', 'ymi', 'imi', 'ich', 'ego', 'emu',
+    'iej', 'ej', 'om', 'ow', 'em', 'ie', 'ia', 'iu', 'ym', 'im',
+    'y', 'a', 'e', 'i', 'u', 'o'
+], key=len, reverse=True)
+
+MIN_STEM_LENGTH = 4
+
+POLISH_STOPWORDS = frozenset([
+    'a', 'aby', 'ale', 'bez', 'by', 'co', 'dla', 'do', 'i', 'ich', 'jak', 'jako',
+    'jest', 'jej', 'jego', 'ktora', 'ktore', 'ktory', 'lub', 'ma', 'na', 'nie',
+    'o', 'od', 'oraz', 'po', 'pod', 'przez', 'przy', 'sie', 'sa', 'ta', 'te',
+    'tej', 'to', 'w', 'we', 'z', 'za', 'ze', 'zo'
+])
+
+
+def fold_diacritics(text):
+    """Replace Polish (and other) diacritics with their base letters"""
+    folded = text.translate(POLISH_FOLDING)
+    if folded.isascii():
+        return folded
+    decomposed = unicodedata.normalize('NFKD', folded)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(token):
+    """Strip one inflectional suffix from a folded token"""
+    if len(token) <= MIN_STEM_LENGTH or not token.isalpha():
+        return token
+    for suffix in POLISH_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            return token[:-len(suffix)]
+    return token
+
+
+@lru_cache(maxsize=200000)
+def normalize_token(token):
+    """Lowercase, fold and stem a single token (cached for the process lifetime)
+
+    Returns an empty string for stopwords.
+    """
+    folded = fold_diacritics(token.lower())
+    if folded in POLISH_STOPWORDS:
+        return ''
+    return stem(folded)
+
+
+def raw_tokens(text):
+    """Split text into lowercased word tokens without normalization"""
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+
+def analyze(text):
+    """Turn text into a list of normalized terms, dropping stopwords"""
+    terms = []
+    for token in raw_tokens(text):
+        term = normalize_token(token)
+        if term:
+            terms.append(term)
+    return terms
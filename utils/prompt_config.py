@@ -0,0 +1,127 @@
+from config.settings import Config
+from models.descriptions import AIPrompt, ModelAdjustment
+from models.events import on_commit
+from models.resource_versions import ADJUSTMENTS, RESOURCES, get_global_version, get_versions
+from utils.cache import LRUCache
+from utils.metrics import phase
+from collections import namedtuple
+
+# Adjustment types that set a model parameter, with the parser of their value
+MODEL_PARAMETERS = {
+    'temperature': float,
+    'max_tokens': int,
+}
+
+PromptConfig = namedtuple('PromptConfig', [
+    'description_type',
+    'prompt_id',
+    'prompt_version',
+    'prompt',
+    'adjustments',
+    'model',
+    'temperature',
+    'max_tokens',
+    'context_budget'
+])
+
+# Resolved configurations keyed by (user id, description type, config version)
+prompt_config_cache = LRUCache(Config.PROMPT_CONFIG_CACHE_MAX_ENTRIES, Config.CONTEXT_CACHE_TTL)
+
+# Config versions keyed by user id, re-read at most every PROMPT_CONFIG_CHECK_INTERVAL
+config_version_cache = LRUCache(Config.PROMPT_CONFIG_CACHE_MAX_ENTRIES, Config.PROMPT_CONFIG_CHECK_INTERVAL)
+
+
+def _invalidate_prompt_configs(changes):
+    """Drop resolved configurations after a committed prompt or adjustment write"""
+    # Other workers notice the write through the version in the cache key
+    prompt_config_cache.clear()
+    config_version_cache.clear()
+
+
+on_commit([AIPrompt, ModelAdjustment], _invalidate_prompt_configs)
+
+
+def get_prompt_config(description_type, user_id=None):
+    """Resolved prompt configuration of a user for a description type
+
+    The cache key includes the versions of the user's prompts and of the
+    adjustments, so a prompt activated in any worker is used by every worker
+    once it re-reads the versions, at most PROMPT_CONFIG_CHECK_INTERVAL
+    seconds later.
+    """
+    with phase('context_queries'):
+        version = config_version(user_id)
+    return prompt_config_cache.get_or_load(
+        (user_id, description_type, version),
+        lambda: _load_prompt_config(description_type, user_id)
+    )
+
+
+def config_version(user_id):
+    """(user's prompts version, adjustments version), bumped by every write to them"""
+    if Config.PROMPT_CONFIG_CHECK_INTERVAL <= 0:
+        return _read_config_version(user_id)
+    return config_version_cache.get_or_load(user_id, lambda: _read_config_version(user_id))
+
+
+def _read_config_version(user_id):
+    prompts_version = 0
+    if user_id:
+        prompts_resource = RESOURCES[AIPrompt]
+        prompts_version = get_versions(user_id, [prompts_resource])[prompts_resource]
+    return prompts_version, get_global_version(ADJUSTMENTS)
+
+
+def _load_prompt_config(description_type, user_id):
+    """Query the active prompt and adjustments and resolve the model parameters"""
+    prompt = None
+    with phase('context_queries'):
+        if user_id:
+            prompt = AIPrompt.query.with_entities(
+                AIPrompt.id,
+                AIPrompt.version,
+                AIPrompt.content
+            ).filter_by(
+                user_id=user_id,
+                prompt_type=description_type,
+                is_active=True
+            ).first()
+        adjustments = _load_adjustments(description_type)
+
+    parameters = {'temperature': Config.OPENAI_TEMPERATURE, 'max_tokens': Config.OPENAI_MAX_TOKENS}
+    overridden = set()
+    for adjustment_type, adjustment_value in adjustments:
+        # Adjustments come highest priority first, so the first valid one wins
+        parse = MODEL_PARAMETERS.get(adjustment_type)
+        if parse is None or adjustment_type in overridden:
+            continue
+        try:
+            parameters[adjustment_type] = parse(adjustment_value)
+        except ValueError:
+            continue
+        overridden.add(adjustment_type)
+
+    return PromptConfig(
+        description_type=description_type,
+        prompt_id=prompt.id if prompt else None,
+        prompt_version=prompt.version if prompt else None,
+        prompt=prompt.content if prompt else None,
+        adjustments=tuple(adjustments),
+        model=Config.OPENAI_MODEL,
+        context_budget=Config.CONTEXT_TOKEN_BUDGETS.get(description_type, Config.CONTEXT_TOKEN_BUDGET),
+        **parameters
+    )
+
+
+def _load_adjustments(description_type):
+    """Active adjustments as (type, value) pairs, highest priority first"""
+    adjustments_query = ModelAdjustment.query.with_entities(
+        ModelAdjustment.adjustment_type,
+        ModelAdjustment.adjustment_value
+    ).filter_by(is_active=True)
+    if description_type:
+        adjustments_query = adjustments_query.filter(
+            (ModelAdjustment.description_type == description_type) |
+            (ModelAdjustment.description_type.is_(None))
+        )
+    return [tuple(row) for row in adjustments_query.order_by(ModelAdjustment.priority.desc()).all()]
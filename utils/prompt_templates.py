@@ -0,0 +1,151 @@
+import re
+from config.settings import Config
+from utils.cache import LRUCache
+from collections import namedtuple
+
+SYSTEM_PROMPT = "Jesteś ekspertem w dziedzinie gitar z głęboką znajomością instrumentów muzycznych, firm produkujących gitary i branży muzycznej. Zawsze odpowiadaj w języku polskim z poprawną gramatyką i terminologią muzyczną."
+
+SLOT_PATTERN = re.compile(r'\{(\w+)\}')
+
+
+class PromptTemplate:
+    """Prompt text compiled into literal parts and named slots
+
+    Rendering copies the parts, fills the slots by position and joins once,
+    so its cost does not depend on how the template was written or on the
+    number of += steps a hand-built string would need.
+    """
+
+    def __init__(self, parts):
+        self.parts = []
+        self.slots = []
+        for text, slot in parts:
+            if text:
+                self.parts.append(text)
+            if slot:
+                self.slots.append((len(self.parts), slot))
+                self.parts.append('')
+
+    @classmethod
+    def compile(cls, text):
+        """Template from text with {name} slots"""
+        pieces = SLOT_PATTERN.split(text)
+        # split() alternates literal text and slot names, ending with text
+        return cls(zip(pieces[::2], pieces[1::2] + [None]))
+
+    @classmethod
+    def literal(cls, text, *parts):
+        """Template starting with text used verbatim, e.g. a user's prompt"""
+        return cls([(text, None)] + list(parts))
+
+    @property
+    def slot_names(self):
+        return {slot for _, slot in self.slots}
+
+    def render(self, **values):
+        """Fill every slot and join the parts"""
+        parts = list(self.parts)
+        for position, slot in self.slots:
+            parts[position] = values[slot]
+        return ''.join(parts)
+
+
+DescriptionType = namedtuple('DescriptionType', ['name', 'template', 'fallback_context'])
+
+# Description type name -> DescriptionType, in registration order
+description_types = {}
+
+# Templates of users' prompts keyed by (prompt id, prompt version)
+custom_templates = LRUCache(Config.PROMPT_CONFIG_CACHE_MAX_ENTRIES, Config.CONTEXT_CACHE_TTL)
+
+
+def register_description_type(name, template, examples_heading, examples):
+    """Register a description type with its default template and fallback examples
+
+    template has {context} and {input} slots. The examples fill the context
+    when there is no learning context and no custom prompt.
+    """
+    compiled = PromptTemplate.compile(template)
+    if compiled.slot_names != {'context', 'input'}:
+        raise ValueError(f'Template of {name} needs exactly the {{context}} and {{input}} slots')
+    fallback_context = ''.join([f"\n\n{examples_heading}:\n"] + [f"- {example}\n" for example in examples])
+    description_types[name] = DescriptionType(name, compiled, fallback_context)
+    return description_types[name]
+
+
+def is_description_type(value):
+    """Whether value names a registered description type; False for non-strings like lists"""
+    return isinstance(value, str) and value in description_types
+
+
+def get_template(description_type, prompt_config):
+    """Compiled template for a description type, the user's custom prompt first"""
+    if prompt_config.prompt:
+        return custom_templates.get_or_load(
+            (prompt_config.prompt_id, prompt_config.prompt_version),
+            lambda: PromptTemplate.literal(
+                prompt_config.prompt,
+                ("\n\n", 'context'),
+                ("\n\nInformacje wejściowe: ", 'input')
+            )
+        )
+    return description_types[description_type].template
+
+
+def render_prompt(description_type, prompt_config, context, input_text):
+    """Render the prompt of a description type for the given context and input"""
+    if not context and not prompt_config.prompt:
+        context = description_types[description_type].fallback_context
+    return get_template(description_type, prompt_config).render(context=context, input=input_text)
+
+
+register_description_type(
+    'guitar',
+    """Jesteś ekspertem w dziedzinie gitar z głęboką znajomością instrumentów muzycznych. Stwórz szczegółowy, angażujący opis gitary w języku polskim na podstawie poniższych informacji.
+
+{context}
+
+Informacje wejściowe: {input}
+
+Uwaga: Przykłady zawierają metadane w nawiasach kwadratowych [kategoria] i (tagi: tag1, tag2). Użyj tych informacji, aby lepiej zrozumieć kontekst i styl opisu.
+
+Proszę o kompleksowy opis w języku polskim, który zawiera:
+- Specyfikacje techniczne
+- Charakterystykę dźwięku
+- Jakość wykonania i materiały
+- Docelową grupę odbiorców
+- Kontekst historyczny (jeśli istotny)
+
+Opis powinien być informacyjny, ale dostępny zarówno dla początkujących, jak i doświadczonych graczy. Używaj polskiej terminologii muzycznej i technicznej. Dostosuj styl do kategorii i tagów z przykładów, jeśli są dostępne.""",
+    'Przykładowe opisy gitar',
+    getattr(Config, 'POLISH_GUITAR_EXAMPLES', None) or [
+        "Fender Stratocaster to ikoniczna gitara elektryczna z charakterystycznym dźwiękiem idealnym do bluesa i rocka.",
+        "Gibson Les Paul to legenda wśród gitar elektrycznych znana z ciepłego, pełnego brzmienia."
+    ]
+)
+
+register_description_type(
+    'company',
+    """Jesteś ekspertem w dziedzinie produkcji gitar i historii firm muzycznych. Stwórz szczegółowy opis firmy produkującej gitary w języku polskim na podstawie poniższych informacji.
+
+{context}
+
+Informacje wejściowe: {input}
+
+Uwaga: Przykłady zawierają metadane w nawiasach kwadratowych [kategoria] i (tagi: tag1, tag2). Użyj tych informacji, aby lepiej zrozumieć kontekst i styl opisu.
+
+Proszę o kompleksowy opis w języku polskim, który zawiera:
+- Historię firmy i jej założenie
+- Znaczące osiągnięcia i innowacje
+- Charakterystyczne produkty i modele
+- Filozofię i wartości firmy
+- Pozycję rynkową i reputację
+- Kluczowe osoby i kamienie milowe
+
+Opis powinien być angażujący i informacyjny dla entuzjastów gitar. Używaj polskiej terminologii biznesowej i muzycznej. Dostosuj styl do kategorii i tagów z przykładów, jeśli są dostępne.""",
+    'Przykładowe opisy firm',
+    getattr(Config, 'POLISH_COMPANY_EXAMPLES', None) or [
+        "Fender to amerykański producent gitar elektrycznych znany z innowacyjnych rozwiązań.",
+        "Gibson to legenda wśród producentów gitar premium z długą tradycją."
+    ]
+)
@@ -0,0 +1,116 @@
+import math
+from utils.polish_text import analyze, fold_diacritics, normalize_token, raw_tokens
+
+MIN_CONTENT_WORD_LENGTH = 4
+CONTENT_WORD_WEIGHT = 0.5
+# Longest input token whose fragments are looked up as phrase starts
+MAX_FRAGMENT_TOKEN_LENGTH = 40
+
+
+def _fragments(token):
+    """Every substring of token, the possible first tokens of a phrase inside it"""
+    token = token[:MAX_FRAGMENT_TOKEN_LENGTH]
+    return {token[start:end] for start in range(len(token)) for end in range(start + 1, len(token) + 1)}
+
+
+class KeywordRanker:
+    """Weighted keyword matching (category, title, tags and content words)
+
+    Mirrors the original ad hoc scorer, but works on the inverted index and on
+    diacritic-folded text. As before, a category, title or tag counts when it
+    occurs anywhere in the input, also inside a longer word ("strat" in
+    "stratocaster").
+    """
+
+    name = 'keyword'
+
+    def score(self, index, description_types, input_text):
+        """Return {example id: score} for examples matching the input text"""
+        folded_input = fold_diacritics(input_text.lower())
+        input_tokens = raw_tokens(folded_input)
+        content_terms = [
+            normalize_token(token) for token in input_tokens
+            if len(token) >= MIN_CONTENT_WORD_LENGTH
+        ]
+        scores = {}
+
+        for description_type in description_types:
+            # Category, title and tag phrases contained in the input. A phrase
+            # inside the input starts with a fragment of one input token
+            matched = {}
+            for fragment in set().union(*map(_fragments, set(input_tokens))):
+                for phrase, weights in index.phrases(description_type, fragment).items():
+                    if phrase in folded_input:
+                        matched[phrase] = weights
+            for weights in matched.values():
+                for doc_id, weight in weights.items():
+                    scores[doc_id] = scores.get(doc_id, 0) + weight
+
+            # Input words found in the example text
+            for term in content_terms:
+                if not term:
+                    continue
+                for doc_id in index.postings(description_type, term):
+                    scores[doc_id] = scores.get(doc_id, 0) + CONTENT_WORD_WEIGHT
+
+        return scores
+
+
+class BM25Ranker:
+    """Okapi BM25 over normalized terms with boosted metadata fields"""
+
+    name = 'bm25'
+
+    def __init__(self, k1=1.2, b=0.75, max_df_ratio=0.4, min_docs_for_pruning=1000):
+        self.k1 = k1
+        self.b = b
+        # Terms present in most documents carry almost no weight but cost the
+        # most to score, so on large corpora they are skipped as long as the
+        # query has a rarer term to rank by
+        self.max_df_ratio = max_df_ratio
+        self.min_docs_for_pruning = min_docs_for_pruning
+
+    def score(self, index, description_types, input_text):
+        """Return {example id: score} for examples matching the input text"""
+        query_terms = set(analyze(input_text))
+        scores = {}
+        k1_plus_one = self.k1 + 1
+        lengths = index.doc_lengths()
+
+        for description_type in description_types:
+            doc_count = index.doc_count(description_type)
+            if not doc_count:
+                continue
+            # Length normalization k1 * (1 - b + b * length / average), from the
+            # running totals so adds and removes never force a recompute
+            norm_base = self.k1 * (1 - self.b)
+            norm_per_term = self.k1 * self.b / index.average_length(description_type)
+
+            matched = [(term, index.postings(description_type, term)) for term in query_terms]
+            matched = [(term, postings) for term, postings in matched if postings]
+            if doc_count >= self.min_docs_for_pruning:
+                max_df = doc_count * self.max_df_ratio
+                rare = [(term, postings) for term, postings in matched if len(postings) <= max_df]
+                if rare:
+                    matched = rare
+
+            for term, postings in matched:
+                document_frequency = len(postings)
+                idf = math.log(1 + (doc_count - document_frequency + 0.5) / (document_frequency + 0.5))
+                scaled_idf = idf * k1_plus_one
+                for doc_id, frequency in postings.items():
+                    norm = norm_base + norm_per_term * lengths[doc_id]
+                    scores[doc_id] = scores.get(doc_id, 0) + scaled_idf * frequency / (frequency + norm)
+
+        return scores
+
+
+RANKERS = {
+    KeywordRanker.name: KeywordRanker,
+    BM25Ranker.name: BM25Ranker
+}
+
+
+def get_ranker(name):
+    """Create a ranker by name, falling back to BM25"""
+    return RANKERS.get(name, BM25Ranker)()
@@ -0,0 +1,172 @@
+import threading
+import time
+
+# Burst allowance of a token bucket, in seconds of quota
+BURST_SECONDS = 10
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call would have to wait longer than allowed for quota"""
+
+
+class CircuitOpenError(Exception):
+    """Raised while the circuit breaker rejects calls to a failing upstream"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate
+
+    Callers reserve capacity up front and may go into debt; the returned wait
+    paces them so that consumption converges on the configured rate instead
+    of bursting and then stalling.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, self.rate * BURST_SECONDS)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount):
+        """Take amount tokens and return the seconds to wait before using them"""
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self, amount):
+        """Give back tokens that were reserved but not used"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    @property
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared by all threads
+
+    A limit of 0 disables the corresponding bucket.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_wait, sleep=time.sleep):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_wait = max_wait
+        self._sleep = sleep
+        self._clock = time.monotonic
+        self._paused_until = 0.0
+        self._stats_lock = threading.Lock()
+        self.throttled_calls = 0
+        self.throttled_seconds = 0.0
+
+    def acquire(self, estimated_tokens):
+        """Block until a request with estimated_tokens fits the quota"""
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+
+        if wait > self.max_wait:
+            self.release(1, estimated_tokens, 0)
+            raise RateLimitExceeded(f'Rate limit reached, retry in {wait:.0f}s')
+
+        wait = max(wait, self._paused_until - self._clock())
+        if wait > 0:
+            with self._stats_lock:
+                self.throttled_calls += 1
+                self.throttled_seconds += wait
+            self._sleep(wait)
+
+    def release(self, requests, reserved_tokens, used_tokens):
+        """Return unused quota, or charge the difference when usage exceeded the estimate"""
+        if self.requests and requests:
+            self.requests.refund(requests)
+        if self.tokens:
+            difference = reserved_tokens - used_tokens
+            if difference > 0:
+                self.tokens.refund(difference)
+            elif difference < 0:
+                self.tokens.reserve(-difference)
+
+    def pause(self, seconds):
+        """Hold back every caller, e.g. after the upstream answered 429"""
+        with self._stats_lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are rejected for reset_timeout seconds. Then a single trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected_calls = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through"""
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self.reset_timeout - (self._clock() - self._opened_at)
+                if remaining > 0:
+                    self.rejected_calls += 1
+                    raise CircuitOpenError(f'Upstream unavailable, retry in {remaining:.1f}s')
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self.rejected_calls += 1
+                    raise CircuitOpenError('Upstream unavailable, recovery check in progress')
+                self._trial_in_flight = True
+
+    def cancel_call(self):
+        """Forget a call allowed by before_call that was never made"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
@@ -0,0 +1,126 @@
+import json
+import hashlib
+import random
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from models.database import db
+from models.descriptions import GenerationCache
+from utils.metrics import phase
+
+
+class ResponseCache:
+    """Database-backed cache of AI responses shared by all worker processes
+
+    Entries are keyed by a SHA-256 hash of the fully assembled request (system
+    prompt, user prompt, model and sampling parameters), expire after a TTL
+    and the least recently hit entries are evicted above max_entries.
+    """
+
+    def __init__(self, ttl, max_entries, eviction_probability=0.05):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Eviction runs on a fraction of writes to keep writes cheap
+        self.eviction_probability = eviction_probability
+
+    @staticmethod
+    def make_key(messages, model, temperature, max_tokens, config_version=None):
+        """Hash everything that influences the model output
+
+        config_version identifies the prompt configuration the messages were
+        built from (e.g. the active prompt version and adjustments), so a newly
+        activated configuration never reuses older responses.
+        """
+        payload = json.dumps({
+            'messages': messages,
+            'model': model,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'config_version': config_version
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, cache_key, record_hit=True):
+        """Return the cached result dict or None
+
+        The hit is recorded in the caller's transaction and written when the
+        caller commits its unit of work; pass record_hit=False to record hits
+        later with record_hits().
+        """
+        with phase('response_cache'):
+            return self._get(cache_key, record_hit)
+
+    def _get(self, cache_key, record_hit):
+        entry = GenerationCache.query.filter(
+            GenerationCache.cache_key == cache_key,
+            GenerationCache.expires_at > datetime.utcnow()
+        ).first()
+        if entry is None:
+            return None
+
+        if record_hit:
+            self.record_hits([cache_key])
+
+        return {
+            'success': True,
+            'description': entry.description,
+            'tokens_used': entry.tokens_used,
+            'model_version': entry.model_version
+        }
+
+    def record_hits(self, cache_keys):
+        """Bump hit counts and last hit times, without committing the session"""
+        if not cache_keys:
+            return
+        GenerationCache.query.filter(GenerationCache.cache_key.in_(set(cache_keys))).update({
+            'last_hit_at': datetime.utcnow(),
+            'hit_count': GenerationCache.hit_count + 1
+        }, synchronize_session=False)
+
+    def set(self, cache_key, result):
+        """Store a successful result, replacing an expired entry with the same key"""
+        with phase('response_cache'):
+            self._set(cache_key, result)
+
+    def _set(self, cache_key, result):
+        now = datetime.utcnow()
+        try:
+            GenerationCache.query.filter_by(cache_key=cache_key).delete(synchronize_session=False)
+            db.session.add(GenerationCache(
+                cache_key=cache_key,
+                description=result['description'],
+                tokens_used=result.get('tokens_used'),
+                model_version=result.get('model_version'),
+                created_at=now,
+                last_hit_at=now,
+                expires_at=now + timedelta(seconds=self.ttl)
+            ))
+            db.session.commit()
+        except IntegrityError:
+            # Another worker stored the same response first
+            db.session.rollback()
+            return
+
+        if random.random() < self.eviction_probability:
+            self.evict()
+
+    def evict(self):
+        """Delete expired entries and the least recently hit ones above max_entries"""
+        GenerationCache.query.filter(
+            GenerationCache.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+
+        excess = GenerationCache.query.count() - self.max_entries
+        if excess > 0:
+            oldest_ids = db.select(GenerationCache.id)\
+                .order_by(GenerationCache.last_hit_at.asc())\
+                .limit(excess)\
+                .scalar_subquery()
+            GenerationCache.query.filter(
+                GenerationCache.id.in_(oldest_ids)
+            ).delete(synchronize_session=False)
+        db.session.commit()
+
+    def clear(self):
+        """Delete all cached responses"""
+        GenerationCache.query.delete(synchronize_session=False)
+        db.session.commit()
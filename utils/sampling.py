@@ -0,0 +1,150 @@
+import random
+from sqlalchemy import func
+from config.settings import Config
+from models.descriptions import ModelCorrection
+from models.events import on_commit
+from utils.cache import LRUCache
+
+# Probes per requested row before walking the id index from a random start
+MAX_PROBES_PER_ROW = 4
+
+# (description_type, stratify) -> [(correction_type, min id, max id, row count)],
+# the only aggregates the sampler needs, recomputed after corrections change
+correction_bounds_cache = LRUCache(100, Config.CONTEXT_CACHE_TTL)
+
+
+def _invalidate_correction_bounds(changes):
+    """Forget id ranges and stratum sizes once corrections were written"""
+    correction_bounds_cache.clear()
+
+
+on_commit([ModelCorrection], _invalidate_correction_bounds)
+
+
+def sample_rows(query, model, k, rng=random, bounds=None):
+    """Pick up to k random rows of a filtered query inside the database
+
+    Uses random-id probing over the indexed primary key range: each probe is
+    a single "id >= r ORDER BY id LIMIT 1" lookup, so the cost depends on k,
+    not on the table size. Rows following large id gaps are slightly favoured,
+    which is fine for picking few-shot context. If probing keeps hitting
+    duplicates the remainder is read in id order from a random start.
+
+    bounds is (min id, max id, row count) of the query; pass cached bounds to
+    skip the aggregate, which has to count every matching row.
+    """
+    if k <= 0:
+        return []
+
+    if bounds is None:
+        bounds = query.with_entities(func.min(model.id), func.max(model.id), func.count(model.id)).one()
+    min_id, max_id, row_count = bounds
+    if not row_count:
+        return []
+    return _probe(query, model, min(k, row_count), min_id, max_id, rng)
+
+
+def sample_corrections(k, description_type=None, stratify=False, rng=None):
+    """Sample up to k unapplied corrections, optionally stratified by correction_type
+
+    The id ranges and stratum sizes are cached until corrections change, so a
+    call only runs indexed id lookups. Without an rng the draw is seeded by
+    the description type and those bounds, so every process picks the same
+    sample until corrections change.
+    """
+    query = ModelCorrection.query.filter_by(is_applied=False)
+    if description_type:
+        query = query.filter_by(description_type=description_type)
+    strata = correction_bounds_cache.get_or_load(
+        (description_type, stratify),
+        lambda: _correction_bounds(query, stratify)
+    )
+    if rng is None:
+        rng = random.Random(repr((description_type, stratify, strata)))
+
+    if not stratify:
+        return sample_rows(query, ModelCorrection, k, rng, strata[0][1:])
+
+    allocation = _allocate(k, {stratum[0]: stratum[3] for stratum in strata}, rng)
+    sample = []
+    for correction_type, min_id, max_id, row_count in strata:
+        stratum_k = allocation.get(correction_type, 0)
+        if not stratum_k:
+            continue
+        if correction_type is None:
+            stratum_query = query.filter(ModelCorrection.correction_type.is_(None))
+        else:
+            stratum_query = query.filter(ModelCorrection.correction_type == correction_type)
+        sample.extend(sample_rows(stratum_query, ModelCorrection, stratum_k, rng, (min_id, max_id, row_count)))
+    rng.shuffle(sample)
+    return sample
+
+
+def _correction_bounds(query, stratify):
+    """Id range and size of the whole query, or of each correction_type stratum"""
+    if not stratify:
+        return [(None,) + tuple(query.with_entities(
+            func.min(ModelCorrection.id),
+            func.max(ModelCorrection.id),
+            func.count(ModelCorrection.id)
+        ).one())]
+    # One grouped query gives the id range and size of every stratum
+    return [tuple(stratum) for stratum in query.with_entities(
+        ModelCorrection.correction_type,
+        func.min(ModelCorrection.id),
+        func.max(ModelCorrection.id),
+        func.count(ModelCorrection.id)
+    ).group_by(ModelCorrection.correction_type).order_by(ModelCorrection.correction_type).all()]
+
+
+def _allocate(k, sizes, rng):
+    """Split k draws across strata proportionally, giving each stratum at least one"""
+    allocation = {}
+    strata = [stratum for stratum, size in sizes.items() if size]
+    rng.shuffle(strata)
+    total = sum(sizes[stratum] for stratum in strata)
+    if not total:
+        return allocation
+
+    # Every stratum gets one draw while k lasts, the rest is proportional
+    for stratum in strata[:k]:
+        allocation[stratum] = 1
+    remaining = k - len(allocation)
+    if remaining > 0:
+        for stratum in strata:
+            extra = int(remaining * sizes[stratum] / total)
+            allocation[stratum] = min(sizes[stratum], allocation[stratum] + extra)
+        # Hand out draws lost to rounding, largest strata first
+        leftover = k - sum(allocation.values())
+        for stratum in sorted(strata, key=lambda s: sizes[s], reverse=True):
+            if leftover <= 0:
+                break
+            spare = min(sizes[stratum] - allocation[stratum], leftover)
+            allocation[stratum] += spare
+            leftover -= spare
+    return allocation
+
+
+def _probe(query, model, k, min_id, max_id, rng):
+    picked = {}
+    for _ in range(k * MAX_PROBES_PER_ROW):
+        if len(picked) >= k:
+            break
+        probe_id = rng.randint(min_id, max_id)
+        row = query.filter(model.id >= probe_id).order_by(model.id).limit(1).first()
+        if row is not None:
+            picked.setdefault(row.id, row)
+
+    if len(picked) < k:
+        # Take the next unpicked rows in id order from a random start, wrapping
+        # around once; both halves are index range scans bounded by k
+        start_id = rng.randint(min_id, max_id)
+        for condition in (model.id >= start_id, model.id < start_id):
+            remaining = query.filter(condition)
+            if picked:
+                remaining = remaining.filter(~model.id.in_(list(picked)))
+            for row in remaining.order_by(model.id).limit(k - len(picked)).all():
+                picked[row.id] = row
+            if len(picked) >= k:
+                break
+    return list(picked.values())
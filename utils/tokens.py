@@ -0,0 +1,53 @@
+import re
+from functools import lru_cache
+
+# Tokens added by the chat format for every message and for priming the reply
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 3
+
+_PIECES = re.compile(r'\w+|[^\w\s]', re.UNICODE)
+
+
+@lru_cache(maxsize=50000)
+def _word_tokens(word):
+    # BPE vocabularies hold most short English words whole; Polish words and
+    # words with diacritics split into roughly 3-character pieces
+    if word.isascii():
+        return 1 + (len(word) - 1) // 4
+    return 1 + (len(word) - 1) // 3
+
+
+def _piece_tokens(piece):
+    return _word_tokens(piece) if piece[0].isalnum() or piece[0] == '_' else 1
+
+
+def estimate_tokens(text):
+    """Approximate the BPE token count of text without a tokenizer
+
+    Counts word pieces and punctuation separately, which tracks cl100k token
+    counts for Polish prose far better than a flat characters / 4 rule.
+    """
+    if not text:
+        return 0
+    return sum(_piece_tokens(piece) for piece in _PIECES.findall(text))
+
+
+def truncate_to_tokens(text, max_tokens, ellipsis='…'):
+    """Cut text after the last whole word that keeps it within max_tokens
+
+    The ellipsis marking the cut counts as one token. Text that already fits
+    is returned unchanged.
+    """
+    used = 0
+    end = 0
+    for match in _PIECES.finditer(text):
+        used += _piece_tokens(match.group())
+        if used > max_tokens - 1:
+            return text[:end].rstrip() + ellipsis
+        end = match.end()
+    return text
+
+
+def estimate_message_tokens(messages):
+    """Approximate prompt tokens of a chat completion request"""
+    return sum(estimate_tokens(message['content']) + MESSAGE_OVERHEAD for message in messages) + REPLY_OVERHEAD